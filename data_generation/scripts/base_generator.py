@@ -2,14 +2,81 @@
 Base class for data generators in the Summit Sports data generation project.
 """
 
+import copy
+import functools
 import os
+import re
 import yaml
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
+import numpy as np
 import pandas as pd
 from faker import Faker
 
 
+# libyaml C loader when available, pure-Python loader otherwise
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+_ENV_VAR_PATTERN = re.compile(r'\$\{([^}]+)\}')
+
+
+def draw_names(fake: Faker, attr: str, size: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Draw names from a Faker person provider pool in a single vectorized call.
+    
+    Args:
+        fake: Faker instance whose locale provides the pool
+        attr: Provider name pool, e.g. 'first_names' or 'last_names'
+        size: Number of names to draw
+        rng: NumPy Generator used for the draw
+        
+    Returns:
+        Array of names
+    """
+    pool = getattr(fake.factories[0].provider('faker.providers.person'), attr)
+    if isinstance(pool, dict):
+        # Weighted pools (e.g. en_US) map name -> frequency
+        weights = np.fromiter(pool.values(), dtype=float)
+        return rng.choice(np.array(list(pool), dtype=object), size, p=weights / weights.sum())
+    return rng.choice(np.array(pool, dtype=object), size)
+
+
+def _substitute_env_vars(obj: Any) -> Any:
+    """
+    Replace ${VAR} references inside string scalars of a parsed configuration.
+    """
+    if isinstance(obj, dict):
+        return {k: _substitute_env_vars(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_substitute_env_vars(item) for item in obj]
+    if isinstance(obj, str) and '${' in obj:
+        return _ENV_VAR_PATTERN.sub(lambda m: os.getenv(m.group(1), m.group(0)), obj)
+    return obj
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_config_file(config_path: str) -> Dict[str, Any]:
+    """
+    Read and parse a configuration file once. Environment values are
+    substituted after parsing so they are never interpreted as YAML.
+    """
+    with open(config_path, 'r') as file:
+        config = yaml.load(file, Loader=_YAML_LOADER)
+    return _substitute_env_vars(config)
+
+
+def _load_config_cached(config_path: str) -> Dict[str, Any]:
+    """
+    Return a private copy of the cached configuration for a file.
+    
+    Args:
+        config_path: Absolute path to configuration file
+        
+    Returns:
+        Configuration dictionary
+    """
+    return copy.deepcopy(_parse_config_file(config_path))
+
+
 class BaseDataGenerator(ABC):
     """
     Abstract base class for all data generators.
@@ -23,8 +90,10 @@ class BaseDataGenerator(ABC):
             config_path: Path to configuration file. If None, uses default config.
         """
         self.config = self._load_config(config_path)
+        seed = self.config.get('generation', {}).get('random_seed', 42)
         self.fake = Faker()
-        self.fake.seed_instance(self.config.get('generation', {}).get('random_seed', 42))
+        self.fake.seed_instance(seed)
+        self.rng = np.random.default_rng(seed)
         
     def _load_config(self, config_path: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -43,25 +112,8 @@ class BaseDataGenerator(ABC):
                 'config.yaml'
             )
         
-        with open(config_path, 'r') as file:
-            config = yaml.safe_load(file)
-            
-        # Replace environment variables
-        return self._replace_env_vars(config)
-    
-    def _replace_env_vars(self, obj):
-        """
-        Recursively replace environment variables in configuration.
-        """
-        if isinstance(obj, dict):
-            return {k: self._replace_env_vars(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._replace_env_vars(item) for item in obj]
-        elif isinstance(obj, str) and obj.startswith('${') and obj.endswith('}'):
-            env_var = obj[2:-1]
-            return os.getenv(env_var, obj)
-        else:
-            return obj
+        # Parsed once per file; each generator gets its own copy to mutate freely
+        return _load_config_cached(os.path.abspath(config_path))
     
     @abstractmethod
     def generate_data(self, num_records: int) -> pd.DataFrame:
@@ -96,23 +148,38 @@ class BaseDataGenerator(ABC):
         
         os.makedirs(output_dir, exist_ok=True)
         
-        output_format = self.config.get('output', {}).get('format', 'csv')
+        output_format = self.config.get('output', {}).get('format', 'parquet')
         include_headers = self.config.get('output', {}).get('include_headers', True)
+        compression = self.config.get('output', {}).get('compression', 'zstd')
         
-        if output_format == 'csv':
+        if output_format == 'parquet':
+            filepath = os.path.join(output_dir, f"{filename}.parquet")
+            # pyarrow dictionary-encodes repetitive columns itself, so dtypes are written as-is
+            data.to_parquet(filepath, index=False, engine='pyarrow', compression=compression)
+        elif output_format == 'csv':
             filepath = os.path.join(output_dir, f"{filename}.csv")
             data.to_csv(filepath, index=False, header=include_headers)
         elif output_format == 'json':
             filepath = os.path.join(output_dir, f"{filename}.json")
             data.to_json(filepath, orient='records', indent=2)
-        elif output_format == 'parquet':
-            filepath = os.path.join(output_dir, f"{filename}.parquet")
-            data.to_parquet(filepath, index=False)
         else:
             raise ValueError(f"Unsupported output format: {output_format}")
         
         return filepath
     
+    def draw_names(self, attr: str, size: int) -> np.ndarray:
+        """
+        Draw names from the Faker person provider in a single vectorized call.
+        
+        Args:
+            attr: Provider name pool, e.g. 'first_names' or 'last_names'
+            size: Number of names to draw
+            
+        Returns:
+            Array of names
+        """
+        return draw_names(self.fake, attr, size, self.rng)
+    
     def get_config_value(self, key_path: str, default: Any = None) -> Any:
         """
         Get configuration value using dot notation.
@@ -124,10 +191,10 @@ class BaseDataGenerator(ABC):
         Returns:
             Configuration value
         """
-        keys = key_path.split('.')
+        # Walks the live config rather than a memo, so changes to self.config are always seen
         value = self.config
         
-        for key in keys:
+        for key in key_path.split('.'):
             if isinstance(value, dict) and key in value:
                 value = value[key]
             else:
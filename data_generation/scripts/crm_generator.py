@@ -1,56 +1,170 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
 import snowflake.snowpark as snowpark
 #from snowflake.snowpark.functions import col, rand, when, lit
 import pandas as pd
-import random
+import numpy as np
+import uuid
 import faker
 from faker.providers import person, address, internet, date_time
 
-def generate_customers(num_customers, store_ids):
+# Works both as a package module and as a standalone script next to base_generator.py
+try:
+    from .base_generator import draw_names
+except ImportError:
+    from base_generator import draw_names
+
+# Upload tuning for the large CRM tables: bigger Parquet chunks, snappy
+# compression and more PUT threads than the write_pandas defaults.
+# Frames are converted to Arrow-backed dtypes (convert_dtypes(dtype_backend="pyarrow"))
+# before upload, so the Parquet conversion inside write_pandas is close to zero-copy.
+WRITE_PANDAS_OPTIONS = {
+    "chunk_size": 500_000,
+    "compression": "snappy",
+    "parallel": 8,
+    "use_logical_type": True,
+}
+
+# Shared generator for unseeded calls; seeded paths build their own with default_rng
+RNG = np.random.default_rng(42)
+
+def generate_customers(num_customers, store_ids, seed=None):
     fake = faker.Faker("fr_FR")
-    customers = []
-    for _ in range(num_customers):
-        customer_id = fake.unique.uuid4()
-        first_name = fake.first_name()
-        last_name = fake.last_name()
-        email = fake.email() if random.random() > 0.15 else None
-        phone = fake.unique.phone_number() if random.random() > 0.20 else None
-        registration_date = fake.date_this_century()
-        preferred_store = random.choice(store_ids)
-        marketing_opt_in = random.choice([True, False])
-        customers.append((customer_id, first_name, last_name, email, phone, registration_date, preferred_store, marketing_opt_in))
-    return pd.DataFrame(customers, columns=["CUSTOMER_ID", "FIRST_NAME", "LAST_NAME", "EMAIL", "PHONE", "REGISTRATION_DATE", "PREFERRED_STORE", "MARKETING_OPT_IN"])
-
-def generate_loyalty_cards(customers_df):
+    rng = RNG if seed is None else np.random.default_rng(seed)
+    if seed is not None:
+        fake.seed_instance(int(rng.integers(2**32)))
+    n = num_customers
+
+    # Build each column in one pass instead of assembling row tuples
+    customer_ids = np.array([str(uuid.uuid4()) for _ in range(n)], dtype=object)
+    first_names = draw_names(fake, "first_names", n, rng)
+    last_names = draw_names(fake, "last_names", n, rng)
+
+    emails = np.array([fake.email() for _ in range(n)], dtype=object)
+    emails[rng.random(n) <= 0.15] = None
+
+    phones = np.full(n, None, dtype=object)
+    has_phone = rng.random(n) > 0.20
+    phones[has_phone] = [fake.unique.phone_number() for _ in range(int(has_phone.sum()))]
+
+    # Same range as fake.date_this_century(): 2000-01-01 up to today
+    min_ts = int(pd.Timestamp("2000-01-01").timestamp())
+    max_ts = int(pd.Timestamp.today().normalize().timestamp())
+    registration_dates = pd.to_datetime(rng.integers(min_ts, max_ts, n), unit="s").date
+
+    return pd.DataFrame({
+        "CUSTOMER_ID": customer_ids,
+        "FIRST_NAME": first_names,
+        "LAST_NAME": last_names,
+        "EMAIL": emails,
+        "PHONE": phones,
+        "REGISTRATION_DATE": registration_dates,
+        "PREFERRED_STORE": rng.choice(store_ids, size=n),
+        "MARKETING_OPT_IN": rng.integers(0, 2, n, dtype=bool),
+    })
+
+def _generate_customer_shard(args):
+    num_customers, store_ids, seed = args
+    return generate_customers(num_customers, store_ids, seed=seed)
+
+def _redraw_duplicate_phones(customers_df, seed):
+    # fake.unique only covers one shard's Faker, so phones repeated across shards are redrawn here
+    phones = customers_df["PHONE"]
+    duplicated = phones.notna() & phones.duplicated()
+    if not duplicated.any():
+        return customers_df
     fake = faker.Faker("fr_FR")
-    loyalty_cards = []
-    for _, row in customers_df.iterrows():
-        num_cards = random.randint(1, 3) if random.random() < 0.05 else 1
-        for _ in range(num_cards):
-            loyalty_cards.append((
-                fake.unique.uuid4(),
-                row["CUSTOMER_ID"],
-                row["REGISTRATION_DATE"],
-                random.choice(["ACTIVE", "LOST", "EXPIRED"]),
-                random.randint(0, 50000),
-                fake.date_this_decade()
-            ))
-    return pd.DataFrame(loyalty_cards, columns=["CARD_ID", "CUSTOMER_ID", "CARD_ISSUE_DATE", "CARD_STATUS", "POINTS_BALACE", "LAST_USE_DATE"])
-
-def link_transactions_to_customers(session, customers_df, loyalty_cards_df):
-    transactions_df = session.table("SPORTS_DB.SPORTS_DATA.INSTORE_SALES_DATA_INDEXED").to_pandas()
-    transactions_df["CUSTOMER_ID"] = None
-    transactions_df["CARD_ID"] = None
-    transactions_df["PAYMENT_METHOD"] = transactions_df["PAYMENT_METHOD"].apply(lambda x: "CASH" if random.random() < 0.40 else x)
-    
-    for i in range(len(transactions_df)):
-        if random.random() > 0.30:
-            linked_customer = customers_df.sample(1).iloc[0]
-            transactions_df.at[i, "CUSTOMER_ID"] = linked_customer["CUSTOMER_ID"]
-            if random.random() > 0.20:
-                linked_card = loyalty_cards_df[loyalty_cards_df["CUSTOMER_ID"] == linked_customer["CUSTOMER_ID"]].sample(1)["CARD_ID"].values[0]
-                transactions_df.at[i, "CARD_ID"] = linked_card
-    
-    session.write_pandas(transactions_df, "SPORTS_DB.SPORTS_DATA.INSTORE_SALES_DATA_CRM", auto_create_table=True, overwrite=True)
+    fake.seed_instance(seed)
+    taken = set(phones.dropna())
+    redrawn = []
+    for _ in range(int(duplicated.sum())):
+        phone = fake.phone_number()
+        while phone in taken:
+            phone = fake.phone_number()
+        taken.add(phone)
+        redrawn.append(phone)
+    customers_df.loc[duplicated, "PHONE"] = redrawn
+    return customers_df
+
+def generate_customers_parallel(num_customers, store_ids, num_workers=None, base_seed=42):
+    # Shards get independent child seeds so they are reproducible without repeating each other
+    num_workers = max(1, min(num_workers or os.cpu_count() or 1, num_customers))
+    if num_workers == 1:
+        return generate_customers(num_customers, store_ids, seed=base_seed)
+
+    shard_sizes = [len(shard) for shard in np.array_split(np.arange(num_customers), num_workers)]
+    shard_seeds = np.random.SeedSequence(base_seed).spawn(num_workers)
+    shard_args = [(size, store_ids, seed) for size, seed in zip(shard_sizes, shard_seeds)]
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        shard_dfs = list(executor.map(_generate_customer_shard, shard_args))
+    return _redraw_duplicate_phones(pd.concat(shard_dfs, ignore_index=True), base_seed)
+
+def generate_loyalty_cards(customers_df, rng=None):
+    rng = rng or RNG
+    n = len(customers_df)
+
+    # ~5% of customers hold 1-3 cards, everyone else holds exactly one
+    n_cards = np.where(rng.random(n) < 0.05, rng.integers(1, 4, n), 1)
+    total_cards = int(n_cards.sum())
+
+    # Same range as fake.date_this_decade(): start of the current decade up to today
+    today = pd.Timestamp.today().normalize()
+    min_ts = int(pd.Timestamp(year=today.year - today.year % 10, month=1, day=1).timestamp())
+    max_ts = int(today.timestamp())
+
+    return pd.DataFrame({
+        "CARD_ID": np.array([str(uuid.uuid4()) for _ in range(total_cards)], dtype=object),
+        "CUSTOMER_ID": np.repeat(customers_df["CUSTOMER_ID"].to_numpy(dtype=object), n_cards),
+        "CARD_ISSUE_DATE": np.repeat(customers_df["REGISTRATION_DATE"].to_numpy(dtype=object), n_cards),
+        "CARD_STATUS": rng.choice(["ACTIVE", "LOST", "EXPIRED"], total_cards),
+        "POINTS_BALACE": rng.integers(0, 50001, total_cards),
+        "LAST_USE_DATE": pd.to_datetime(rng.integers(min_ts, max_ts, total_cards), unit="s").date,
+    })
+
+def _link_transaction_batch(transactions_df, customer_ids, card_owner_ids, group_starts, group_sizes, sorted_card_ids, rng):
+    n = len(transactions_df)
+    transactions_df["PAYMENT_METHOD"] = np.where(rng.random(n) < 0.40, "CASH", transactions_df["PAYMENT_METHOD"])
+
+    link_mask = rng.random(n) > 0.30
+    card_mask = link_mask & (rng.random(n) > 0.20)
+
+    # Pick a customer for every transaction in one draw
+    chosen_cust_ids = customer_ids[rng.integers(0, len(customer_ids), n)]
+
+    # Pick one of the chosen customer's cards by offset into its card group
+    group_pos = np.searchsorted(card_owner_ids, chosen_cust_ids)
+    card_offsets = (rng.random(n) * group_sizes[group_pos]).astype(np.int64)
+    chosen_card_ids = sorted_card_ids[group_starts[group_pos] + card_offsets]
+
+    # Fill plain object arrays, then assign each column exactly once
+    cust_assign = np.full(n, None, dtype=object)
+    card_assign = np.full(n, None, dtype=object)
+    cust_assign[link_mask] = chosen_cust_ids[link_mask]
+    card_assign[card_mask] = chosen_card_ids[card_mask]
+    transactions_df["CUSTOMER_ID"] = cust_assign
+    transactions_df["CARD_ID"] = card_assign
+    return transactions_df.convert_dtypes(dtype_backend="pyarrow")
+
+def link_transactions_to_customers(session, customers_df, loyalty_cards_df, rng=None):
+    rng = rng or RNG
+    customer_ids = customers_df["CUSTOMER_ID"].to_numpy(dtype=object)
+
+    # Group cards by customer once; every batch reuses the same lookup arrays
+    cards_sorted = loyalty_cards_df.sort_values("CUSTOMER_ID", kind="stable")
+    card_owner_ids, group_starts, group_sizes = np.unique(
+        cards_sorted["CUSTOMER_ID"].to_numpy(dtype=object), return_index=True, return_counts=True
+    )
+    sorted_card_ids = cards_sorted["CARD_ID"].to_numpy(dtype=object)
+
+    # Stream the sales table batch by batch so only one batch is held in memory
+    transactions = session.table("SPORTS_DB.SPORTS_DATA.INSTORE_SALES_DATA_INDEXED")
+    first_batch = True
+    for transactions_df in transactions.to_pandas_batches():
+        linked_df = _link_transaction_batch(
+            transactions_df, customer_ids, card_owner_ids, group_starts, group_sizes, sorted_card_ids, rng
+        )
+        session.write_pandas(linked_df, "SPORTS_DB.SPORTS_DATA.INSTORE_SALES_DATA_CRM", auto_create_table=True, overwrite=first_batch, **WRITE_PANDAS_OPTIONS)
+        first_batch = False
 
 def main(session: snowpark.Session):
     
@@ -58,16 +172,16 @@ def main(session: snowpark.Session):
     store_ids = store_catalogue.select("STOREID").to_pandas()["STOREID"].tolist()
     
     print("Generating customers...")
-    customers_df = generate_customers(500_000, store_ids)
+    customers_df = generate_customers_parallel(500_000, store_ids).convert_dtypes(dtype_backend="pyarrow")
     
     print("Generating loyalty cards...")
-    loyalty_cards_df = generate_loyalty_cards(customers_df)
+    loyalty_cards_df = generate_loyalty_cards(customers_df).convert_dtypes(dtype_backend="pyarrow")
     
     print("Writing customers to Snowflake...")
-    session.write_pandas(customers_df, "CUSTOMERS", auto_create_table=True, overwrite=True)
+    session.write_pandas(customers_df, "CUSTOMERS", auto_create_table=True, overwrite=True, **WRITE_PANDAS_OPTIONS)
     
     print("Writing loyalty cards to Snowflake...")
-    session.write_pandas(loyalty_cards_df, "FIDELITY_CARDS", auto_create_table=True, overwrite=True)
+    session.write_pandas(loyalty_cards_df, "FIDELITY_CARDS", auto_create_table=True, overwrite=True, **WRITE_PANDAS_OPTIONS)
     
     print("Linking transactions to customers...")
     link_transactions_to_customers(session, customers_df, loyalty_cards_df)
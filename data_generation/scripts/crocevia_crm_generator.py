@@ -12,16 +12,76 @@ Based on the simplified pattern from sportsretailer_crm_generator.py:
 
 Usage:
     python crocevia_crm_generator.py
+
+run_in_warehouse(session) is an alternative handler that builds the same
+table with set-based SQL, without pulling the source CRM to the client.
 """
 
 import snowflake.snowpark as snowpark
 import pandas as pd
 import numpy as np
-import random
 from faker import Faker
 
+# Works both as a package module and as a standalone script next to base_generator.py
+try:
+    from .base_generator import draw_names
+except ImportError:
+    from base_generator import draw_names
+
+
+# French email domains for localization
+FRENCH_EMAIL_DOMAINS = ['gmail.com', 'orange.fr', 'free.fr', 'wanadoo.fr', 'sfr.fr', 'laposte.net']
+
+# Upload tuning for write_pandas: bigger Parquet chunks, snappy compression
+# and more PUT threads than the defaults.
+WRITE_PANDAS_OPTIONS = {
+    "chunk_size": 500_000,
+    "compression": "snappy",
+    "parallel": 8,
+    "use_logical_type": True,
+}
+
+# Shared generator for helpers called without an explicit one
+RNG = np.random.default_rng(42)
+
+# Overlap flag bits combined per customer, and the OVERLAP_TYPE each combination maps to
+OVERLAP_EMAIL, OVERLAP_PHONE, OVERLAP_NAME, OVERLAP_TRIPLE = 1, 2, 4, 8
+
+
+def _overlap_type_for_flags(flags: int) -> str:
+    if flags & OVERLAP_TRIPLE:
+        return 'TRIPLE'
+    if flags & OVERLAP_EMAIL and flags & OVERLAP_PHONE:
+        return 'EMAIL_PHONE'
+    if flags & OVERLAP_EMAIL:
+        return 'EMAIL'
+    if flags & OVERLAP_PHONE:
+        return 'PHONE'
+    if flags & OVERLAP_NAME:
+        return 'NAME'
+    return 'NONE'
+
+
+OVERLAP_TYPE_BY_FLAGS = np.array([_overlap_type_for_flags(f) for f in range(16)], dtype=object)
+
+
+def ascii_fold(values) -> pd.Series:
+    """
+    Lowercase names and strip diacritics/apostrophes for email local parts
+    (e.g. "Hélène D'Arc" -> "helene darc") using pandas string kernels.
+    """
+    return (
+        pd.Series(values, dtype=object)
+        .str.normalize('NFKD')
+        .str.encode('ascii', errors='ignore')
+        .str.decode('ascii')
+        .str.replace("'", "", regex=False)
+        .str.lower()
+    )
+
 
-def load_french_addresses(session: snowpark.Session, num_addresses: int, unique_pct: float = 0.80) -> list:
+def load_french_addresses(session: snowpark.Session, num_addresses: int, unique_pct: float = 0.80,
+                          rng: np.random.Generator = None) -> pd.DataFrame:
     """
     Load real French addresses from CROCEVIA_DB.RAW_DATA.ADRESSES_FRANCE table.
     
@@ -29,32 +89,37 @@ def load_french_addresses(session: snowpark.Session, num_addresses: int, unique_
         session: Snowflake Snowpark session
         num_addresses: Number of addresses to load
         unique_pct: Percentage of addresses that should be unique
+        rng: NumPy Generator used for duplicates and shuffling (defaults to the module RNG)
     
     Returns:
-        List of address dictionaries with street, city, postal_code, lat, lng
+        DataFrame with street, city, postal_code, latitude, longitude columns
     """
+    rng = rng or RNG
     # Calculate how many unique addresses we need
     unique_count = int(num_addresses * unique_pct)
     
-    # Load random sample of addresses from the French addresses table
+    # Load random sample of addresses from the French addresses table.
+    # Filter first, then SAMPLE the valid rows in a single pass instead of
+    # sorting the whole table with ORDER BY RANDOM().
     addresses_query = f"""
-    SELECT 
-        CASE 
-            WHEN NUMERO IS NOT NULL AND NOM_VOIE IS NOT NULL 
-            THEN CONCAT(NUMERO, ' ', NOM_VOIE)
-            ELSE NOM_VOIE
-        END AS street,
-        NOM_COMMUNE AS city,
-        CODE_POSTAL AS postal_code,
-        LAT AS latitude,
-        LON AS longitude
-    FROM CROCEVIA_DB.RAW_DATA.ADRESSES_FRANCE
-    WHERE LAT IS NOT NULL 
-      AND LON IS NOT NULL 
-      AND NOM_COMMUNE IS NOT NULL
-      AND CODE_POSTAL IS NOT NULL
-    ORDER BY RANDOM()
-    LIMIT {unique_count}
+    WITH valid_addresses AS (
+        SELECT 
+            CASE 
+                WHEN NUMERO IS NOT NULL AND NOM_VOIE IS NOT NULL 
+                THEN CONCAT(NUMERO, ' ', NOM_VOIE)
+                ELSE NOM_VOIE
+            END AS street,
+            NOM_COMMUNE AS city,
+            CODE_POSTAL AS postal_code,
+            LAT AS latitude,
+            LON AS longitude
+        FROM CROCEVIA_DB.RAW_DATA.ADRESSES_FRANCE
+        WHERE LAT IS NOT NULL 
+          AND LON IS NOT NULL 
+          AND NOM_COMMUNE IS NOT NULL
+          AND CODE_POSTAL IS NOT NULL
+    )
+    SELECT * FROM valid_addresses SAMPLE ({unique_count} ROWS)
     """
     
     print(f"Loading {unique_count} unique addresses from French address database...")
@@ -63,25 +128,26 @@ def load_french_addresses(session: snowpark.Session, num_addresses: int, unique_
     if addresses_df.empty:
         raise ValueError("No addresses found in CROCEVIA_DB.RAW_DATA.ADRESSES_FRANCE table")
     
-    # Convert to list of dictionaries
-    addresses = []
-    for _, row in addresses_df.iterrows():
-        addresses.append({
-            "street": row["STREET"],
-            "city": row["CITY"], 
-            "postal_code": str(int(row["POSTAL_CODE"])) if pd.notna(row["POSTAL_CODE"]) else None,
-            "latitude": float(row["LATITUDE"]) if pd.notna(row["LATITUDE"]) else None,
-            "longitude": float(row["LONGITUDE"]) if pd.notna(row["LONGITUDE"]) else None
-        })
+    # Normalize column types without leaving pandas
+    postal_codes = pd.to_numeric(addresses_df["POSTAL_CODE"]).astype("Int64").astype(str)
+    unique_df = pd.DataFrame({
+        "street": addresses_df["STREET"].values,
+        "city": addresses_df["CITY"].values,
+        "postal_code": postal_codes.where(addresses_df["POSTAL_CODE"].notna(), None).values,
+        "latitude": addresses_df["LATITUDE"].astype(float).values,
+        "longitude": addresses_df["LONGITUDE"].astype(float).values,
+    })
     
     # Add duplicate addresses by repeating some of the unique ones for realism
     duplicate_count = num_addresses - unique_count
     if duplicate_count > 0:
-        duplicate_sources = random.choices(addresses, k=duplicate_count)
-        addresses.extend(duplicate_sources)
+        dup_idx = rng.integers(0, len(unique_df), duplicate_count)
+        addresses = pd.concat([unique_df, unique_df.iloc[dup_idx]], ignore_index=True)
+    else:
+        addresses = unique_df
     
     # Shuffle to distribute duplicates randomly
-    random.shuffle(addresses)
+    addresses = addresses.iloc[rng.permutation(len(addresses))].reset_index(drop=True)
     
     print(f"Loaded {len(addresses)} addresses ({unique_count} unique, {duplicate_count} duplicates)")
     return addresses
@@ -103,8 +169,8 @@ def generate_crocevia_customers(source_customers_df: pd.DataFrame,
         DataFrame with Crocevia customers including overlap metadata
     """
     fake = Faker("fr_FR")
-    random.seed(42)
     fake.seed_instance(42)
+    rng = np.random.default_rng(42)
     
     # Sample source data for overlaps
     source_sample = source_customers_df.sample(n=min(source_sample_size, len(source_customers_df)), random_state=42)
@@ -115,189 +181,370 @@ def generate_crocevia_customers(source_customers_df: pd.DataFrame,
     src_first_names = source_sample['FIRST_NAME'].dropna().astype(str).values
     src_last_names = source_sample['LAST_NAME'].dropna().astype(str).values
     
-    # French email domains for localization
-    french_domains = ['gmail.com', 'orange.fr', 'free.fr', 'wanadoo.fr', 'sfr.fr', 'laposte.net']
-    
     # Overlap configuration
     triple_match_count = int(num_customers * 0.20)  # 20% triple matches
     email_overlap_count = int(num_customers * 0.60)  # 60% email overlaps total
     phone_overlap_count = int(num_customers * 0.50)  # 50% phone overlaps total
     name_overlap_count = int(num_customers * 0.35)   # 35% name overlaps total
     
-    # Create overlap index sets
-    np.random.seed(42)
-    all_indices = set(range(num_customers))
+    # Assign overlap flags per customer
+    n = num_customers
+    overlap_flags = np.zeros(n, dtype=np.int8)
     
     # Triple matches (exact overlap on all three fields)
-    triple_indices = set(np.random.choice(list(all_indices), size=triple_match_count, replace=False))
-    remaining = all_indices - triple_indices
+    perm = rng.permutation(n)
+    overlap_flags[perm[:triple_match_count]] = OVERLAP_TRIPLE
+    remaining = perm[triple_match_count:]
     
     # Additional overlaps (can intersect with each other but not with triple)
     email_extra = email_overlap_count - triple_match_count
     phone_extra = phone_overlap_count - triple_match_count
     name_extra = name_overlap_count - triple_match_count
     
-    email_indices = set(np.random.choice(list(remaining), size=email_extra, replace=False))
-    phone_indices = set(np.random.choice(list(remaining), size=phone_extra, replace=False))
-    name_indices = set(np.random.choice(list(remaining), size=name_extra, replace=False))
+    overlap_flags[rng.choice(remaining, size=email_extra, replace=False)] |= OVERLAP_EMAIL
+    overlap_flags[rng.choice(remaining, size=phone_extra, replace=False)] |= OVERLAP_PHONE
+    overlap_flags[rng.choice(remaining, size=name_extra, replace=False)] |= OVERLAP_NAME
     
     # Load addresses for 50% of customers from real French address data
     address_count = int(num_customers * 0.50)
-    addresses = load_french_addresses(session, address_count, unique_pct=0.80)
-    address_indices = set(np.random.choice(range(num_customers), size=address_count, replace=False))
-    address_idx = 0
-    
-    # Generate customers
-    customers = []
-    
-    for i in range(num_customers):
-        # Determine overlap type for this customer
-        overlap_type = 'NONE'
-        if i in triple_indices:
-            overlap_type = 'TRIPLE'
-        elif i in email_indices and i in phone_indices:
-            overlap_type = 'EMAIL_PHONE'
-        elif i in email_indices:
-            overlap_type = 'EMAIL'
-        elif i in phone_indices:
-            overlap_type = 'PHONE'
-        elif i in name_indices:
-            overlap_type = 'NAME'
-        
-        # Generate base data
-        if overlap_type == 'TRIPLE':
-            # Use same source record for consistency
-            src_row = source_sample.iloc[i % len(source_sample)]
-            first_name = src_row['FIRST_NAME']
-            last_name = src_row['LAST_NAME']
-            email = src_row['EMAIL']
-            phone = src_row['PHONE']
-        else:
-            # Generate synthetic French names
-            first_name = fake.first_name()
-            last_name = fake.last_name()
-            
-            # Handle email overlaps
-            if overlap_type in ['EMAIL', 'EMAIL_PHONE']:
-                email = random.choice(src_emails)
-            else:
-                # Generate French email
-                if random.random() < 0.7:  # 70% name-based emails
-                    local = f"{first_name.lower()}.{last_name.lower()}".replace("'", "").replace("ç", "c").replace("é", "e")
-                    email = f"{local}@{random.choice(french_domains)}"
-                else:
-                    email = fake.email()
-                    local_part = email.split('@')[0]
-                    email = f"{local_part}@{random.choice(french_domains)}"
-            
-            # Handle phone overlaps
-            if overlap_type in ['PHONE', 'EMAIL_PHONE']:
-                phone = random.choice(src_phones)
-            else:
-                phone = fake.phone_number()
-            
-            # Handle name overlaps
-            if overlap_type == 'NAME':
-                name_pair_idx = random.randint(0, len(source_sample) - 1)
-                src_row = source_sample.iloc[name_pair_idx]
-                first_name = src_row['FIRST_NAME']
-                last_name = src_row['LAST_NAME']
-        
-        # Add data quality issues
-        # Missing emails (15% outside email overlap sets)
-        if overlap_type not in ['TRIPLE', 'EMAIL', 'EMAIL_PHONE'] and random.random() < 0.15:
-            email = None
-            
-        # Missing phones (20% outside phone overlap sets)
-        if overlap_type not in ['TRIPLE', 'PHONE', 'EMAIL_PHONE'] and random.random() < 0.20:
-            phone = None
-        
-        # Generate other fields
-        customer_id = f"CRV-{i:010d}"
-        date_of_birth = fake.date_of_birth(minimum_age=18, maximum_age=90) if random.random() < 0.40 else None
-        registration_date = fake.date_this_decade()
-        marketing_opt_in = random.choice([True, False])
-        
-        # Add address information if this customer should have one
-        if i in address_indices:
-            address = addresses[address_idx]
-            address_idx += 1
-            street = address["street"]
-            city = address["city"]
-            postal_code = address["postal_code"]
-            latitude = address["latitude"]
-            longitude = address["longitude"]
-        else:
-            street = None
-            city = None
-            postal_code = fake.postcode() if random.random() < 0.60 else None  # Keep some postal codes for non-address customers
-            latitude = None
-            longitude = None
-        
-        customers.append({
-            'CUSTOMER_ID': customer_id,
-            'FIRST_NAME': first_name,
-            'LAST_NAME': last_name,
-            'EMAIL': email,
-            'PHONE': phone,
-            'STREET': street,
-            'CITY': city,
-            'POSTAL_CODE': postal_code,
-            'LATITUDE': latitude,
-            'LONGITUDE': longitude,
-            'DATE_OF_BIRTH': date_of_birth,
-            'REGISTRATION_DATE': registration_date,
-            'MARKETING_OPT_IN': marketing_opt_in,
-            'OVERLAP_TYPE': overlap_type
-        })
-    
-    return pd.DataFrame(customers)
+    addresses = load_french_addresses(session, address_count, unique_pct=0.80, rng=rng)
+    has_address = np.zeros(n, dtype=bool)
+    has_address[rng.choice(n, size=address_count, replace=False)] = True
+    
+    # Determine overlap type per customer from its flags
+    overlap_types = OVERLAP_TYPE_BY_FLAGS[overlap_flags]
+    is_triple = overlap_types == 'TRIPLE'
+    
+    is_email_overlap = np.isin(overlap_types, ['EMAIL', 'EMAIL_PHONE'])
+    is_phone_overlap = np.isin(overlap_types, ['PHONE', 'EMAIL_PHONE'])
+    is_name_overlap = overlap_types == 'NAME'
+    
+    src_first_all = source_sample['FIRST_NAME'].values
+    src_last_all = source_sample['LAST_NAME'].values
+    
+    # Generate synthetic French names
+    first_names = draw_names(fake, "first_names", n, rng)
+    last_names = draw_names(fake, "last_names", n, rng)
+    
+    # Generate French emails for customers without an email overlap
+    needs_email = ~(is_triple | is_email_overlap)
+    email_domains = rng.choice(FRENCH_EMAIL_DOMAINS, n)
+    name_based = rng.random(n) < 0.7  # 70% name-based emails
+    emails = np.full(n, None, dtype=object)
+    
+    email_rows = np.flatnonzero(needs_email)
+    use_name = name_based[email_rows]
+    local_parts = np.empty(len(email_rows), dtype=object)
+    name_rows = email_rows[use_name]
+    local_parts[use_name] = (
+        ascii_fold(first_names[name_rows]) + '.' + ascii_fold(last_names[name_rows])
+    ).to_numpy(dtype=object)
+    local_parts[~use_name] = [fake.email().split('@')[0] for _ in range(int((~use_name).sum()))]
+    emails[email_rows] = local_parts + '@' + email_domains[email_rows].astype(object)
+    emails[is_email_overlap] = rng.choice(src_emails, int(is_email_overlap.sum()))
+    
+    # Generate phones for customers without a phone overlap
+    needs_phone = ~(is_triple | is_phone_overlap)
+    phones = np.full(n, None, dtype=object)
+    phones[needs_phone] = [fake.phone_number() for _ in range(int(needs_phone.sum()))]
+    phones[is_phone_overlap] = rng.choice(src_phones, int(is_phone_overlap.sum()))
+    
+    # Handle name overlaps with a random source record
+    name_src = rng.integers(0, len(source_sample), int(is_name_overlap.sum()))
+    first_names[is_name_overlap] = src_first_all[name_src]
+    last_names[is_name_overlap] = src_last_all[name_src]
+    
+    # Triple matches use the same source record for consistency
+    triple_src = np.flatnonzero(is_triple) % len(source_sample)
+    first_names[is_triple] = src_first_all[triple_src]
+    last_names[is_triple] = src_last_all[triple_src]
+    emails[is_triple] = source_sample['EMAIL'].values[triple_src]
+    phones[is_triple] = source_sample['PHONE'].values[triple_src]
+    
+    # Add data quality issues
+    # Missing emails (15% outside email overlap sets)
+    emails[needs_email & (rng.random(n) < 0.15)] = None
+    # Missing phones (20% outside phone overlap sets)
+    phones[needs_phone & (rng.random(n) < 0.20)] = None
+    
+    # Generate other fields
+    has_dob = rng.random(n) < 0.40
+    dates_of_birth = np.full(n, None, dtype=object)
+    dates_of_birth[has_dob] = [
+        fake.date_of_birth(minimum_age=18, maximum_age=90) for _ in range(int(has_dob.sum()))
+    ]
+    
+    # Add address information in customer order for the selected customers
+    streets = np.full(n, None, dtype=object)
+    cities = np.full(n, None, dtype=object)
+    postal_codes = np.full(n, None, dtype=object)
+    latitudes = np.full(n, None, dtype=object)
+    longitudes = np.full(n, None, dtype=object)
+    streets[has_address] = addresses["street"].values
+    cities[has_address] = addresses["city"].values
+    postal_codes[has_address] = addresses["postal_code"].values
+    latitudes[has_address] = addresses["latitude"].values
+    longitudes[has_address] = addresses["longitude"].values
+    
+    # Keep some postal codes for non-address customers
+    keeps_postcode = ~has_address & (rng.random(n) < 0.60)
+    postal_codes[keeps_postcode] = [fake.postcode() for _ in range(int(keeps_postcode.sum()))]
+    
+    return pd.DataFrame({
+        'CUSTOMER_ID': [f"CRV-{i:010d}" for i in range(n)],
+        'FIRST_NAME': first_names,
+        'LAST_NAME': last_names,
+        'EMAIL': emails,
+        'PHONE': phones,
+        'STREET': streets,
+        'CITY': cities,
+        'POSTAL_CODE': postal_codes,
+        'LATITUDE': latitudes,
+        'LONGITUDE': longitudes,
+        'DATE_OF_BIRTH': dates_of_birth,
+        'REGISTRATION_DATE': [fake.date_this_decade() for _ in range(n)],
+        'MARKETING_OPT_IN': rng.integers(0, 2, n, dtype=bool),
+        'OVERLAP_TYPE': overlap_types
+    })
+
+
+def generate_crocevia_customers_in_warehouse(session: snowpark.Session,
+                                             table_name: str = "CROCEVIA_CRM",
+                                             num_customers: int = 10000,
+                                             source_sample_size: int = 5000,
+                                             duplicate_pct: float = 0.10) -> None:
+    """
+    Generate Crocevia customers entirely inside Snowflake with set-based SQL.
+    
+    Mirrors generate_crocevia_customers + add_duplicate_customers (same overlap
+    proportions, missing-value rates and duplicate variations) without pulling
+    the source CRM to the client. Synthetic names are recombined from
+    independently sampled source first/last names instead of Faker.
+    
+    Args:
+        session: Snowflake Snowpark session
+        table_name: Target table, replaced on each run
+        num_customers: Number of Crocevia customers to generate
+        source_sample_size: Sample size from source for overlaps
+        duplicate_pct: Percentage of customers to duplicate
+    """
+    triple_match_count = int(num_customers * 0.20)
+    email_extra = int(num_customers * 0.60) - triple_match_count
+    phone_extra = int(num_customers * 0.50) - triple_match_count
+    name_extra = int(num_customers * 0.35) - triple_match_count
+    address_count = int(num_customers * 0.50)
+    unique_address_count = int(address_count * 0.80)
+    duplicate_count = int(num_customers * duplicate_pct)
+    
+    # UNIFORM() needs constant bounds, so date ranges are resolved here
+    today = pd.Timestamp.today().normalize()
+    decade_start = pd.Timestamp(year=today.year - today.year % 10, month=1, day=1)
+    decade_days = (today - decade_start).days
+    
+    domains_sql = ", ".join(f"'{d}'" for d in FRENCH_EMAIL_DOMAINS)
+    rand01 = "UNIFORM(0::FLOAT, 1::FLOAT, RANDOM())"
+    
+    generate_sql = f"""
+    CREATE OR REPLACE TABLE {table_name} AS
+    WITH src AS (
+        SELECT FIRST_NAME, LAST_NAME, EMAIL, PHONE,
+               ROW_NUMBER() OVER (ORDER BY RANDOM()) - 1 AS SRC_IDX
+        FROM SS_101.RAW_CUSTOMER.CUSTOMER_LOYALTY SAMPLE ({source_sample_size} ROWS)
+    ),
+    src_emails AS (
+        SELECT EMAIL, ROW_NUMBER() OVER (ORDER BY RANDOM()) - 1 AS IDX FROM src WHERE EMAIL IS NOT NULL
+    ),
+    src_phones AS (
+        SELECT PHONE, ROW_NUMBER() OVER (ORDER BY RANDOM()) - 1 AS IDX FROM src WHERE PHONE IS NOT NULL
+    ),
+    addr AS (
+        SELECT STREET, CITY, POSTAL_CODE, LATITUDE, LONGITUDE,
+               ROW_NUMBER() OVER (ORDER BY RANDOM()) - 1 AS ADDR_IDX
+        FROM (
+            SELECT
+                CASE
+                    WHEN NUMERO IS NOT NULL AND NOM_VOIE IS NOT NULL
+                    THEN CONCAT(NUMERO, ' ', NOM_VOIE)
+                    ELSE NOM_VOIE
+                END AS STREET,
+                NOM_COMMUNE AS CITY,
+                TO_VARCHAR(CODE_POSTAL::INT) AS POSTAL_CODE,
+                LAT::FLOAT AS LATITUDE,
+                LON::FLOAT AS LONGITUDE
+            FROM CROCEVIA_DB.RAW_DATA.ADRESSES_FRANCE
+            WHERE LAT IS NOT NULL
+              AND LON IS NOT NULL
+              AND NOM_COMMUNE IS NOT NULL
+              AND CODE_POSTAL IS NOT NULL
+        ) SAMPLE ({unique_address_count} ROWS)
+    ),
+    counts AS (
+        SELECT (SELECT COUNT(*) FROM src) AS SRC_N,
+               (SELECT COUNT(*) FROM src_emails) AS EMAIL_N,
+               (SELECT COUNT(*) FROM src_phones) AS PHONE_N,
+               (SELECT COUNT(*) FROM addr) AS ADDR_N
+    ),
+    base AS (
+        SELECT ROW_NUMBER() OVER (ORDER BY SEQ4()) - 1 AS I,
+               ROW_NUMBER() OVER (ORDER BY RANDOM()) - 1 < {triple_match_count} AS IS_TRIPLE,
+               ROW_NUMBER() OVER (ORDER BY RANDOM()) - 1 AS ADDR_RANK,
+               RANDOM() AS EMAIL_KEY,
+               RANDOM() AS PHONE_KEY,
+               RANDOM() AS NAME_KEY
+        FROM TABLE(GENERATOR(ROWCOUNT => {num_customers}))
+    ),
+    flagged AS (
+        SELECT b.*, c.*,
+               NOT b.IS_TRIPLE AND ROW_NUMBER() OVER (PARTITION BY b.IS_TRIPLE ORDER BY b.EMAIL_KEY) <= {email_extra} AS IS_EMAIL,
+               NOT b.IS_TRIPLE AND ROW_NUMBER() OVER (PARTITION BY b.IS_TRIPLE ORDER BY b.PHONE_KEY) <= {phone_extra} AS IS_PHONE,
+               NOT b.IS_TRIPLE AND ROW_NUMBER() OVER (PARTITION BY b.IS_TRIPLE ORDER BY b.NAME_KEY) <= {name_extra} AS IS_NAME
+        FROM base b CROSS JOIN counts c
+    ),
+    typed AS (
+        SELECT f.*,
+               CASE
+                   WHEN IS_TRIPLE THEN 'TRIPLE'
+                   WHEN IS_EMAIL AND IS_PHONE THEN 'EMAIL_PHONE'
+                   WHEN IS_EMAIL THEN 'EMAIL'
+                   WHEN IS_PHONE THEN 'PHONE'
+                   WHEN IS_NAME THEN 'NAME'
+                   ELSE 'NONE'
+               END AS OVERLAP_TYPE,
+               IFF(IS_TRIPLE, MOD(I, SRC_N), FLOOR({rand01} * SRC_N)) AS PAIR_IDX,
+               FLOOR({rand01} * SRC_N) AS ALT_IDX,
+               FLOOR({rand01} * EMAIL_N) AS EMAIL_IDX,
+               FLOOR({rand01} * PHONE_N) AS PHONE_IDX,
+               IFF(ADDR_RANK < ADDR_N, ADDR_RANK, FLOOR({rand01} * ADDR_N)) AS ADDR_IDX_PICK
+        FROM flagged f
+    ),
+    assembled AS (
+        SELECT t.I, t.OVERLAP_TYPE, t.ADDR_RANK,
+               fn.FIRST_NAME, ln.LAST_NAME,
+               IFF(t.OVERLAP_TYPE = 'TRIPLE', fn.EMAIL, NULL) AS TRIPLE_EMAIL,
+               IFF(t.OVERLAP_TYPE = 'TRIPLE', fn.PHONE, NULL) AS TRIPLE_PHONE,
+               se.EMAIL AS SRC_EMAIL,
+               sp.PHONE AS SRC_PHONE,
+               a.STREET, a.CITY, a.POSTAL_CODE, a.LATITUDE, a.LONGITUDE
+        FROM typed t
+        JOIN src fn ON fn.SRC_IDX = t.PAIR_IDX
+        JOIN src ln ON ln.SRC_IDX = IFF(t.OVERLAP_TYPE IN ('TRIPLE', 'NAME'), t.PAIR_IDX, t.ALT_IDX)
+        LEFT JOIN src_emails se ON se.IDX = t.EMAIL_IDX
+        LEFT JOIN src_phones sp ON sp.IDX = t.PHONE_IDX
+        LEFT JOIN addr a ON a.ADDR_IDX = t.ADDR_IDX_PICK AND t.ADDR_RANK < {address_count}
+    )
+    SELECT
+        'CRV-' || LPAD(I, 10, '0') AS CUSTOMER_ID,
+        FIRST_NAME,
+        LAST_NAME,
+        CASE
+            WHEN OVERLAP_TYPE = 'TRIPLE' THEN TRIPLE_EMAIL
+            WHEN OVERLAP_TYPE IN ('EMAIL', 'EMAIL_PHONE') THEN SRC_EMAIL
+            WHEN {rand01} < 0.15 THEN NULL
+            WHEN {rand01} < 0.7
+                THEN LOWER(TRANSLATE(FIRST_NAME || '.' || LAST_NAME, 'çéèëêàâîïôûüÇÉÈ''', 'ceeeeaaiiouuCEE'))
+                     || '@' || GET(ARRAY_CONSTRUCT({domains_sql}), UNIFORM(0, {len(FRENCH_EMAIL_DOMAINS) - 1}, RANDOM()))::STRING
+            ELSE LOWER(TRANSLATE(FIRST_NAME || LAST_NAME, 'çéèëêàâîïôûüÇÉÈ'' ', 'ceeeeaaiiouuCEE'))
+                 || UNIFORM(1, 9999, RANDOM())
+                 || '@' || GET(ARRAY_CONSTRUCT({domains_sql}), UNIFORM(0, {len(FRENCH_EMAIL_DOMAINS) - 1}, RANDOM()))::STRING
+        END AS EMAIL,
+        CASE
+            WHEN OVERLAP_TYPE = 'TRIPLE' THEN TRIPLE_PHONE
+            WHEN OVERLAP_TYPE IN ('PHONE', 'EMAIL_PHONE') THEN SRC_PHONE
+            WHEN {rand01} < 0.20 THEN NULL
+            ELSE '0' || UNIFORM(1, 9, RANDOM()) || ' ' || LPAD(UNIFORM(0, 99, RANDOM()), 2, '0')
+                 || ' ' || LPAD(UNIFORM(0, 99, RANDOM()), 2, '0')
+                 || ' ' || LPAD(UNIFORM(0, 99, RANDOM()), 2, '0')
+                 || ' ' || LPAD(UNIFORM(0, 99, RANDOM()), 2, '0')
+        END AS PHONE,
+        STREET,
+        CITY,
+        IFF(ADDR_RANK < {address_count}, POSTAL_CODE,
+            IFF({rand01} < 0.60, LPAD(UNIFORM(1000, 95999, RANDOM()), 5, '0'), NULL)) AS POSTAL_CODE,
+        LATITUDE,
+        LONGITUDE,
+        IFF({rand01} < 0.40,
+            DATEADD(DAY, -UNIFORM({18 * 365}, {90 * 365}, RANDOM()), CURRENT_DATE()),
+            NULL) AS DATE_OF_BIRTH,
+        DATEADD(DAY, UNIFORM(0, {decade_days}, RANDOM()), '{decade_start.date()}'::DATE) AS REGISTRATION_DATE,
+        UNIFORM(0, 1, RANDOM()) = 1 AS MARKETING_OPT_IN,
+        OVERLAP_TYPE
+    FROM assembled
+    """
+    session.sql(generate_sql).collect()
+    
+    if duplicate_count > 0:
+        duplicate_sql = f"""
+        INSERT INTO {table_name}
+        SELECT
+            CUSTOMER_ID || '_DUP',
+            FIRST_NAME,
+            LAST_NAME,
+            IFF(EMAIL IS NOT NULL AND {rand01} < 0.5 AND CONTAINS(EMAIL, '@'),
+                SPLIT_PART(EMAIL, '@', 1) || UNIFORM(0, 9, RANDOM()) || '@' || SPLIT_PART(EMAIL, '@', 2),
+                EMAIL),
+            IFF(PHONE IS NOT NULL AND PHONE != '' AND {rand01} < 0.5,
+                LEFT(PHONE, LENGTH(PHONE) - 1) || UNIFORM(0, 9, RANDOM()),
+                PHONE),
+            STREET, CITY, POSTAL_CODE, LATITUDE, LONGITUDE,
+            DATE_OF_BIRTH, REGISTRATION_DATE, MARKETING_OPT_IN,
+            'DUPLICATE'
+        FROM {table_name} SAMPLE ({duplicate_count} ROWS)
+        """
+        session.sql(duplicate_sql).collect()
 
 
-def add_duplicate_customers(customers_df: pd.DataFrame, duplicate_pct: float = 0.10) -> pd.DataFrame:
+def add_duplicate_customers(customers_df: pd.DataFrame, duplicate_pct: float = 0.10,
+                            rng: np.random.Generator = None) -> pd.DataFrame:
     """
     Add duplicate customers with slight variations to simulate real-world data quality issues.
     
     Args:
         customers_df: Original customers DataFrame
         duplicate_pct: Percentage of customers to duplicate
+        rng: NumPy Generator used to pick and perturb duplicates (defaults to the module RNG)
     
     Returns:
         DataFrame with original customers plus duplicates
     """
+    rng = rng or RNG
     duplicate_count = int(len(customers_df) * duplicate_pct)
     if duplicate_count == 0:
         return customers_df
     
     # Select random customers to duplicate
-    source_indices = np.random.choice(len(customers_df), size=duplicate_count, replace=False)
-    duplicates = []
-    
-    for src_idx in source_indices:
-        src_row = customers_df.iloc[src_idx].copy()
-        
-        # Create new customer ID with DUP suffix
-        src_row['CUSTOMER_ID'] = f"{src_row['CUSTOMER_ID']}_DUP"
-        src_row['OVERLAP_TYPE'] = 'DUPLICATE'
-        
-        # Add slight variations for realism
-        if random.random() < 0.5 and src_row['EMAIL']:
-            # Modify email slightly
-            email_parts = str(src_row['EMAIL']).split('@')
-            if len(email_parts) == 2:
-                src_row['EMAIL'] = f"{email_parts[0]}{random.randint(0, 9)}@{email_parts[1]}"
-        
-        if random.random() < 0.5 and src_row['PHONE']:
-            # Modify last digit of phone
-            phone_str = str(src_row['PHONE'])
-            if phone_str:
-                src_row['PHONE'] = phone_str[:-1] + str(random.randint(0, 9))
-        
-        duplicates.append(src_row)
+    source_indices = rng.choice(len(customers_df), size=duplicate_count, replace=False)
+    dup_df = customers_df.iloc[source_indices].copy().reset_index(drop=True)
+    
+    # Create new customer ID with DUP suffix
+    dup_df['CUSTOMER_ID'] = dup_df['CUSTOMER_ID'].astype(str) + '_DUP'
+    dup_df['OVERLAP_TYPE'] = 'DUPLICATE'
+    
+    # Add slight variations for realism
+    # Modify email slightly (only well-formed local@domain addresses)
+    emails = dup_df['EMAIL'].astype(object)
+    email_parts = emails.str.split('@')
+    email_mask = (
+        (rng.random(duplicate_count) < 0.5)
+        & emails.notna() & (emails != '')
+        & (email_parts.str.len() == 2)
+    ).to_numpy()
+    if email_mask.any():
+        digits = rng.integers(0, 10, int(email_mask.sum())).astype(str)
+        dup_df.loc[email_mask, 'EMAIL'] = (
+            email_parts[email_mask].str[0] + digits + '@' + email_parts[email_mask].str[1]
+        )
+    
+    # Modify last digit of phone
+    phones = dup_df['PHONE'].astype(object)
+    phone_mask = (
+        (rng.random(duplicate_count) < 0.5) & phones.notna() & (phones != '')
+    ).to_numpy()
+    if phone_mask.any():
+        digits = rng.integers(0, 10, int(phone_mask.sum())).astype(str)
+        dup_df.loc[phone_mask, 'PHONE'] = phones[phone_mask].astype(str).str[:-1] + digits
     
     # Combine original and duplicates
-    duplicates_df = pd.DataFrame(duplicates)
-    return pd.concat([customers_df, duplicates_df], ignore_index=True)
+    return pd.concat([customers_df, dup_df], ignore_index=True)
 
 
 def validate_overlap_results(customers_df: pd.DataFrame, source_customers_df: pd.DataFrame) -> dict:
@@ -323,14 +570,12 @@ def validate_overlap_results(customers_df: pd.DataFrame, source_customers_df: pd
     name_pct = (overlap_counts.get('TRIPLE', 0) + overlap_counts.get('NAME', 0)) / total_records
     duplicate_pct = overlap_counts.get('DUPLICATE', 0) / total_records
     
-    # Check actual overlaps with source data
-    src_emails = set(source_customers_df['EMAIL'].dropna().astype(str))
-    src_phones = set(source_customers_df['PHONE'].dropna().astype(str))
-    src_names = set(source_customers_df['FIRST_NAME'].astype(str) + '|' + source_customers_df['LAST_NAME'].astype(str))
-    
-    actual_email_overlap = customers_df['EMAIL'].dropna().astype(str).isin(src_emails).sum() / total_records
-    actual_phone_overlap = customers_df['PHONE'].dropna().astype(str).isin(src_phones).sum() / total_records
-    actual_name_overlap = (customers_df['FIRST_NAME'].astype(str) + '|' + customers_df['LAST_NAME'].astype(str)).isin(src_names).sum() / total_records
+    # Check actual overlaps with source data (hash-based isin, no Python sets or concatenated keys)
+    actual_email_overlap = customers_df['EMAIL'].isin(source_customers_df['EMAIL'].dropna()).sum() / total_records
+    actual_phone_overlap = customers_df['PHONE'].isin(source_customers_df['PHONE'].dropna()).sum() / total_records
+    src_names = pd.MultiIndex.from_arrays([source_customers_df['FIRST_NAME'], source_customers_df['LAST_NAME']])
+    crv_names = pd.MultiIndex.from_arrays([customers_df['FIRST_NAME'], customers_df['LAST_NAME']])
+    actual_name_overlap = crv_names.isin(src_names).sum() / total_records
     
     return {
         'total_records': total_records,
@@ -374,6 +619,9 @@ def main(session: snowpark.Session) -> snowpark.DataFrame:
     print("Adding duplicate customers for realism...")
     customers_df = add_duplicate_customers(customers_df)
     
+    # Arrow-backed columns make isin/concat cheaper and write_pandas close to zero-copy
+    customers_df = customers_df.convert_dtypes(dtype_backend="pyarrow")
+    
     print("Validating overlap results...")
     validation = validate_overlap_results(customers_df, source_customers_df)
     
@@ -391,7 +639,8 @@ def main(session: snowpark.Session) -> snowpark.DataFrame:
         customers_df, 
         "CROCEVIA_CRM", 
         auto_create_table=True, 
-        overwrite=True
+        overwrite=True,
+        **WRITE_PANDAS_OPTIONS
     )
     
     print("Crocevia CRM generation complete!")
@@ -401,3 +650,34 @@ def main(session: snowpark.Session) -> snowpark.DataFrame:
     return session.create_dataframe(sample_df)
 
 
+def run_in_warehouse(session: snowpark.Session,
+                     target_size: int = 10000,
+                     source_sample_size: int = 5000) -> snowpark.DataFrame:
+    """
+    Entrypoint that generates the Crocevia CRM with set-based SQL instead of
+    the pandas round-trip used by main().
+    
+    Args:
+        session: Snowflake Snowpark session
+        target_size: Number of Crocevia customers to generate
+        source_sample_size: Sample size from source for overlaps
+    
+    Returns:
+        Snowpark DataFrame with sample of generated customers
+    """
+    print(f"Generating {target_size} Crocevia customers in Snowflake...")
+    generate_crocevia_customers_in_warehouse(
+        session,
+        "CROCEVIA_CRM",
+        num_customers=target_size,
+        source_sample_size=source_sample_size
+    )
+    
+    breakdown = session.sql(
+        "SELECT OVERLAP_TYPE, COUNT(*) AS N FROM CROCEVIA_CRM GROUP BY OVERLAP_TYPE"
+    ).collect()
+    overlap_counts = {row['OVERLAP_TYPE']: row['N'] for row in breakdown}
+    print(f"Overlap breakdown: {overlap_counts}")
+    print("Crocevia CRM generation complete!")
+    
+    return session.table("CROCEVIA_CRM").sample(n=100)
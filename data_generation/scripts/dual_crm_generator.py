@@ -26,13 +26,14 @@ the host application constructs and passes a Snowpark Session.
 from __future__ import annotations
 
 import math
-import random
-import string
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Tuple, Dict, Optional
+from typing import Iterator, List, Tuple, Dict, Optional
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import snowflake.snowpark as snowpark
 
 
@@ -45,8 +46,29 @@ CROCEVIA_TABLE: str = f"{WRITE_SCHEMA}.CROCEVIA_CRM"
 SUMMIT_TABLE: str = f"{WRITE_SCHEMA}.SUMMIT_SPORTS_CRM"
 
 # Batch sizes should balance memory footprint and Snowflake load times
-BATCH_SIZE_CROCEVIA: int = 200_000
-BATCH_SIZE_SUMMIT: int = 200_000
+BATCH_SIZE_CROCEVIA: int = 500_000
+BATCH_SIZE_SUMMIT: int = 500_000
+
+# Upload tuning for write_pandas: Parquet chunks of this many rows, snappy compression
+# and more PUT threads than the defaults; several chunks per batch keep the upload busy
+WRITE_PANDAS_OPTIONS: Dict[str, object] = {
+    "chunk_size": 250_000,
+    "compression": "snappy",
+    "parallel": 8,
+    "use_logical_type": True,
+}
+
+# Source pools are pulled from Snowflake once per table and resampled per batch
+PEOPLE_POOL_MAX_ROWS: int = 3_000_000
+ADDRESS_POOL_MAX_ROWS: int = 2_000_000
+
+# Batch string columns are Arrow-backed so string ops run on Arrow kernels and the
+# Parquet conversion inside write_pandas does not have to convert Python objects
+ARROW_STRING_DTYPE: str = "string[pyarrow]"
+
+# Single generator for every random draw; helpers draw whole-batch arrays from it
+RANDOM_SEED: int = 42
+RNG: np.random.Generator = np.random.default_rng(RANDOM_SEED)
 
 # Missingness probabilities (tuned for realism)
 MISSING_EMAIL_P: float = 0.15
@@ -64,6 +86,32 @@ FRENCH_EMAIL_DOMAINS: List[str] = [
     "gmail.com", "orange.fr", "free.fr", "wanadoo.fr", "sfr.fr", "laposte.net"
 ]
 
+# Field combinations copied from Crocevia for each overlap category
+# All 4 core fields: FIRST_NAME, LAST_NAME, BIRTH_DATE, PHONE (and we include EMAIL too)
+OVERLAP_ALL_FIELDS: List[str] = [
+    "FIRST_NAME", "LAST_NAME", "BIRTH_DATE", "PHONE", "EMAIL", "STREET", "POSTAL_CODE"
+]
+# Three-field overlaps (random combos)
+OVERLAP_TRIPLETS: List[List[str]] = [
+    ["FIRST_NAME", "LAST_NAME", "BIRTH_DATE"],
+    ["FIRST_NAME", "LAST_NAME", "PHONE"],
+    ["FIRST_NAME", "BIRTH_DATE", "PHONE"],
+    ["LAST_NAME", "BIRTH_DATE", "PHONE"],
+]
+# Two-field overlaps
+OVERLAP_PAIRS: List[List[str]] = [
+    ["FIRST_NAME", "LAST_NAME"],
+    ["FIRST_NAME", "BIRTH_DATE"],
+    ["FIRST_NAME", "PHONE"],
+    ["LAST_NAME", "BIRTH_DATE"],
+    ["LAST_NAME", "PHONE"],
+    ["BIRTH_DATE", "PHONE"],
+]
+# One-field overlaps
+OVERLAP_SINGLES: List[List[str]] = [
+    ["FIRST_NAME"], ["LAST_NAME"], ["BIRTH_DATE"], ["PHONE"], ["EMAIL"], ["POSTAL_CODE"]
+]
+
 
 # ------------------------------ Data Models ------------------------------
 
@@ -87,81 +135,92 @@ class OverlapPlan:
             one_field=self.one_field / total * SUMMIT_OVERLAP_RATIO,
         )
 
+    def counts(self, target_overlap: int) -> Tuple[int, int, int, int]:
+        """Split `target_overlap` rows into (all, three, two, one)-field counts."""
+        c_all = int(target_overlap * self.all_fields)
+        c_three = int(target_overlap * self.three_fields)
+        c_two = int(target_overlap * self.two_fields)
+        c_one = int(target_overlap * self.one_field)
+        # Distribute any remainder to one_field
+        c_one += target_overlap - (c_all + c_three + c_two + c_one)
+        return c_all, c_three, c_two, c_one
+
 
 # ------------------------------ Utilities --------------------------------
 
-def _safe_choice(seq: List, size: int) -> List:
-    if not seq:
-        return []
-    if size <= len(seq):
-        return random.sample(seq, size)
-    # If fewer unique than needed, sample with replacement
-    return random.choices(seq, k=size)
-
-
-def _sanitize_for_email(local: str) -> str:
-    local = local.lower()
-    local = local.replace("'", "").replace("ç", "c").replace("é", "e").replace("è", "e").replace("ë", "e")
-    local = local.replace("à", "a").replace("â", "a").replace("î", "i").replace("ï", "i").replace("ô", "o").replace("û", "u")
-    allowed = string.ascii_lowercase + string.digits + ".-_"
-    return "".join(ch for ch in local if ch in allowed)
-
-
-def _generate_emails(first_names: List[str], last_names: List[str]) -> List[str]:
-    emails: List[str] = []
-    for fn, ln in zip(first_names, last_names):
-        if random.random() < 0.7:
-            local = _sanitize_for_email(f"{fn}.{ln}")
-            emails.append(f"{local}@{random.choice(FRENCH_EMAIL_DOMAINS)}")
-        else:
-            # random handle
-            handle = _sanitize_for_email(f"{fn}{ln}{random.randint(1, 9999)}")
-            emails.append(f"{handle}@{random.choice(FRENCH_EMAIL_DOMAINS)}")
-    return emails
-
-
-def _generate_french_phones(n: int, unique_ratio: float = 0.90) -> List[str]:
+def _sanitize_for_email(values: pd.Series) -> pd.Series:
+    # Names repeat heavily, so clean each distinct value once and map back by code
+    codes, uniques = pd.factorize(values.astype(ARROW_STRING_DTYPE))
+    # Fold accents to ASCII and keep only characters valid in an email local part
+    cleaned = (
+        pd.Series(uniques, dtype=ARROW_STRING_DTYPE).str.lower()
+        .str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+        .str.replace(r"[^a-z0-9._-]", "", regex=True)
+        .astype(ARROW_STRING_DTYPE)
+    )
+    return pd.Series(cleaned.array.take(codes, allow_fill=True), index=values.index)
+
+
+def _generate_emails(first_names: List[str], last_names: List[str]) -> np.ndarray:
+    size = len(first_names)
+    fn = _sanitize_for_email(pd.Series(first_names, dtype=object))
+    ln = _sanitize_for_email(pd.Series(last_names, dtype=object))
+
+    # Draw every random choice for the batch up front
+    name_based = RNG.random(size) < 0.7
+    suffix = RNG.integers(1, 10000, size=size).astype(str)
+    domains = np.asarray(FRENCH_EMAIL_DOMAINS, dtype=object)[RNG.integers(0, len(FRENCH_EMAIL_DOMAINS), size=size)]
+
+    # 70% first.last, otherwise a random handle
+    local = np.where(name_based, (fn + "." + ln).to_numpy(dtype=object), (fn + ln + suffix).to_numpy(dtype=object))
+    return local + "@" + domains
+
+
+FRENCH_PHONE_FIRST_DIGITS = np.array([6, 7, 1, 2, 3, 4, 5, 9])  # include mobile (6,7) and landlines
+
+
+def _draw_french_phones(n: int) -> np.ndarray:
+    # Format: 0X XX XX XX XX, written as ASCII bytes from one draw of all digits
+    chars = np.full((n, 14), ord(" "), dtype=np.uint8)
+    chars[:, 0] = ord("0")
+    chars[:, 1] = ord("0") + RNG.choice(FRENCH_PHONE_FIRST_DIGITS, size=n)
+    chars[:, [3, 4, 6, 7, 9, 10, 12, 13]] = ord("0") + RNG.integers(0, 10, size=(n, 8))
+    return chars.view("S14").ravel().astype(str)
+
+
+def _generate_french_phones(n: int, unique_ratio: float = 0.90) -> np.ndarray:
     """Generate French phone numbers as strings. 90% unique by default."""
-    unique_count = int(n * unique_ratio)
-    unique_set = set()
-    phones: List[str] = []
-
-    def make_phone() -> str:
-        # Format: 0X XX XX XX XX with realistic starting digits
-        first_digit = random.choice([6, 7, 1, 2, 3, 4, 5, 9])  # include mobile (6,7) and landlines
-        digits = ["0", str(first_digit)] + [str(random.randint(0, 9)) for _ in range(8)]
-        # group as 0X XX XX XX XX
-        return f"{digits[0]}{digits[1]} {digits[2]}{digits[3]} {digits[4]}{digits[5]} {digits[6]}{digits[7]} {digits[8]}{digits[9]}"
-
-    while len(unique_set) < unique_count:
-        unique_set.add(make_phone())
-
-    unique_list = list(unique_set)
-    phones.extend(unique_list)
-    remaining = n - len(phones)
-    if remaining > 0:
-        phones.extend(random.choices(unique_list, k=remaining))
-    random.shuffle(phones)
+    unique_count = int(n * unique_ratio) or n
+    unique = np.unique(_draw_french_phones(unique_count))
+    # Collisions are rare in the 10^8 number space; top up until we have enough
+    while unique.size < unique_count:
+        unique = np.unique(np.concatenate([unique, _draw_french_phones(unique_count - unique.size)]))
+
+    phones = unique.astype(object)
+    remaining = n - phones.size
+    if remaining > 0 and phones.size > 0:
+        phones = np.concatenate([phones, RNG.choice(phones, size=remaining)])
+    RNG.shuffle(phones)
     return phones
 
 
 def _inject_missingness(df: pd.DataFrame) -> pd.DataFrame:
     # Missing email
-    mask = np.random.rand(len(df)) < MISSING_EMAIL_P
+    mask = RNG.random(len(df)) < MISSING_EMAIL_P
     df.loc[mask, "EMAIL"] = None
 
     # Missing phone
-    mask = np.random.rand(len(df)) < MISSING_PHONE_P
+    mask = RNG.random(len(df)) < MISSING_PHONE_P
     df.loc[mask, "PHONE"] = None
 
     # Missing postal code
     if "POSTAL_CODE" in df.columns:
-        mask = np.random.rand(len(df)) < MISSING_POSTAL_P
+        mask = RNG.random(len(df)) < MISSING_POSTAL_P
         df.loc[mask, "POSTAL_CODE"] = None
 
     # Missing birth date
     if "BIRTH_DATE" in df.columns:
-        mask = np.random.rand(len(df)) < MISSING_BIRTHDATE_P
+        mask = RNG.random(len(df)) < MISSING_BIRTHDATE_P
         df.loc[mask, "BIRTH_DATE"] = None
 
     return df
@@ -172,50 +231,59 @@ def _add_duplicate_profiles(df: pd.DataFrame, ratio: float) -> pd.DataFrame:
     count = int(len(df) * ratio)
     if count <= 0:
         return df
-    idxs = np.random.choice(len(df), size=count, replace=False)
-    dupes = df.iloc[idxs].copy()
+    idxs = RNG.choice(len(df), size=count, replace=False)
+    # Gather originals and duplicates into one frame in a single take, then edit the tail in place
+    base_rows = len(df)
+    out = df.take(np.concatenate([np.arange(base_rows), idxs]))
+    out.index = pd.RangeIndex(len(out))
+    dupe_rows = np.arange(base_rows, base_rows + count)
+    n = count
     # Modify minor fields to simulate real-world variations
     # - sometimes tweak email local part
-    for i in range(len(dupes)):
-        if pd.notna(dupes.iloc[i]["EMAIL"]) and random.random() < 0.5:
-            email = str(dupes.iloc[i]["EMAIL"])  # type: ignore[index]
-            parts = email.split("@")
-            if len(parts) == 2:
-                dupes.iat[i, dupes.columns.get_loc("EMAIL")] = f"{parts[0]}{random.randint(0,9)}@{parts[1]}"
-        # sometimes tweak last digit of phone
-        if pd.notna(dupes.iloc[i]["PHONE"]) and random.random() < 0.5:
-            phone = str(dupes.iloc[i]["PHONE"])  # type: ignore[index]
-            digits = [c for c in phone if c.isdigit()]
-            if digits:
-                digits[-1] = str(random.randint(0, 9))
-                # reconstruct in 0X XX XX XX XX
-                try:
-                    new_phone = f"{digits[0]}{digits[1]} {digits[2]}{digits[3]} {digits[4]}{digits[5]} {digits[6]}{digits[7]} {digits[8]}{digits[9]}"
-                    dupes.iat[i, dupes.columns.get_loc("PHONE")] = new_phone
-                except Exception:
-                    pass
-        # maybe blank postal code or street
-        if "POSTAL_CODE" in dupes.columns and random.random() < 0.2:
-            dupes.iat[i, dupes.columns.get_loc("POSTAL_CODE")] = None
-        if "STREET" in dupes.columns and random.random() < 0.1:
-            dupes.iat[i, dupes.columns.get_loc("STREET")] = None
+    emails = out["EMAIL"].iloc[base_rows:].astype("string")
+    email_mask = (emails.str.count("@") == 1).fillna(False).to_numpy() & (RNG.random(n) < 0.5)
+    if email_mask.any():
+        parts = emails[email_mask].str.split("@", n=1, expand=True)
+        digits = RNG.integers(0, 10, size=int(email_mask.sum())).astype(str)
+        out.loc[dupe_rows[email_mask], "EMAIL"] = (parts[0] + digits + "@" + parts[1]).to_numpy(dtype=object)
+    # sometimes tweak last digit of phone (format 0X XX XX XX XX)
+    phones = out["PHONE"].iloc[base_rows:].astype("string")
+    phone_mask = (phones.str.len() == 14).fillna(False).to_numpy() & (RNG.random(n) < 0.5)
+    if phone_mask.any():
+        digits = RNG.integers(0, 10, size=int(phone_mask.sum())).astype(str)
+        out.loc[dupe_rows[phone_mask], "PHONE"] = (phones[phone_mask].str.slice(0, 13) + digits).to_numpy(dtype=object)
+    # maybe blank postal code or street
+    if "POSTAL_CODE" in out.columns:
+        out.loc[dupe_rows[RNG.random(n) < 0.2], "POSTAL_CODE"] = None
+    if "STREET" in out.columns:
+        out.loc[dupe_rows[RNG.random(n) < 0.1], "STREET"] = None
     # Give new customer ids to duplicates
-    if "CUSTOMER_ID" in dupes.columns:
-        suffix = np.random.randint(0, 9, size=len(dupes))
-        dupes["CUSTOMER_ID"] = dupes["CUSTOMER_ID"].astype(str) + "_DUP" + suffix.astype(str)
-    return pd.concat([df, dupes], ignore_index=True)
+    if "CUSTOMER_ID" in out.columns:
+        suffix = RNG.integers(0, 9, size=n)
+        out.loc[dupe_rows, "CUSTOMER_ID"] = (
+            out["CUSTOMER_ID"].iloc[base_rows:].astype(str) + "_DUP" + suffix.astype(str)
+        ).to_numpy(dtype=object)
+    return out
 
 
 # ---------------------------- Data Loaders -------------------------------
 
+def _fetch_arrow(session: snowpark.Session, query: str) -> pd.DataFrame:
+    """Run `query` and return the result as an Arrow-backed DataFrame without a pandas block copy."""
+    result = session.sql(query)
+    if not hasattr(result, "to_arrow"):
+        # Older Snowpark releases only expose to_pandas
+        return result.to_pandas().convert_dtypes(dtype_backend="pyarrow")
+    table = result.to_arrow()
+    return table.to_pandas(types_mapper=pd.ArrowDtype, self_destruct=True, split_blocks=True)
+
+
 def load_people(session: snowpark.Session, count: int) -> pd.DataFrame:
     query = f"""
         SELECT GENDER, FIRST_NAME, LAST_NAME, BIRTH_DATE
-        FROM SS_101.SOURCE_DATA.FRENCH_PEOPLE
-        ORDER BY RANDOM()
-        LIMIT {count}
+        FROM SS_101.SOURCE_DATA.FRENCH_PEOPLE SAMPLE ROW ({count} ROWS)
     """
-    df = session.sql(query).to_pandas()
+    df = _fetch_arrow(session, query)
     # Ensure correct dtypes
     for col in ["GENDER", "FIRST_NAME", "LAST_NAME"]:
         if col in df.columns:
@@ -225,27 +293,30 @@ def load_people(session: snowpark.Session, count: int) -> pd.DataFrame:
 
 
 def load_addresses(session: snowpark.Session, count: int) -> pd.DataFrame:
+    # Filter first, then SAMPLE the valid rows instead of sorting them with ORDER BY RANDOM()
     query = f"""
-        SELECT NUMERO, NOM_VOIE, CODE_POSTAL, LON, LAT
-        FROM SS_101.SOURCE_DATA.ADRESSES_FRANCE
-        WHERE CODE_POSTAL IS NOT NULL
-        ORDER BY RANDOM()
-        LIMIT {count}
+        WITH valid_addresses AS (
+            SELECT NUMERO, NOM_VOIE, CODE_POSTAL, LON, LAT
+            FROM SS_101.SOURCE_DATA.ADRESSES_FRANCE
+            WHERE CODE_POSTAL IS NOT NULL
+        )
+        SELECT * FROM valid_addresses SAMPLE ROW ({count} ROWS)
     """
-    adf = session.sql(query).to_pandas()
-    adf["NUMERO"] = adf["NUMERO"].astype(str).replace({"nan": None})
-    adf["NOM_VOIE"] = adf["NOM_VOIE"].astype(str).replace({"nan": None})
-    # Compose street string
-    def compose_street(num, voie):
-        if num and num != "None" and voie and voie != "None":
-            return f"{num} {voie}"
-        return voie if voie and voie != "None" else None
-    adf["STREET"] = [compose_street(n, v) for n, v in zip(adf["NUMERO"], adf["NOM_VOIE"])]
+    adf = _fetch_arrow(session, query)
+    # Compose street string: "NUMERO NOM_VOIE", or just NOM_VOIE when the number is missing
+    numero = adf["NUMERO"].astype("string")
+    voie = adf["NOM_VOIE"].astype("string")
+    adf["STREET"] = (numero + " " + voie).fillna(voie)
     adf.rename(columns={"CODE_POSTAL": "POSTAL_CODE", "LON": "LONGITUDE", "LAT": "LATITUDE"}, inplace=True)
     keep_cols = ["STREET", "POSTAL_CODE", "LATITUDE", "LONGITUDE"]
     return adf[keep_cols]
 
 
+def _sample_rows(df: pd.DataFrame, count: int) -> pd.DataFrame:
+    # Without replacement when the pool is big enough, so a batch does not repeat source rows
+    return df.sample(n=count, replace=count > len(df), random_state=RNG).reset_index(drop=True)
+
+
 # --------------------------- Core Generators -----------------------------
 
 def _build_base_batch(
@@ -256,42 +327,44 @@ def _build_base_batch(
     total_needed: int,
 ) -> pd.DataFrame:
     size = len(people_df)
-    # Match addresses to a fraction of people
-    addr_take = min(len(addr_df), size)
-    # pad addresses if fewer than people
-    if addr_take < size:
-        pad = _safe_choice(addr_df.to_dict("records"), size - addr_take)
-        addr_records = addr_df.to_dict("records") + pad
+    # Give every person an address: take the loaded ones and pad by resampling
+    if len(addr_df) == 0:
+        addr_sample = pd.DataFrame(index=range(size), columns=["STREET", "POSTAL_CODE", "LATITUDE", "LONGITUDE"])
+    elif len(addr_df) < size:
+        pad_count = size - len(addr_df)
+        pad = addr_df.sample(n=pad_count, replace=pad_count > len(addr_df), random_state=RNG)
+        addr_sample = pd.concat([addr_df, pad], ignore_index=True)
     else:
-        addr_records = addr_df.sample(n=size).to_dict("records")
+        addr_sample = addr_df.sample(n=size, random_state=RNG).reset_index(drop=True)
 
     first_names = people_df["FIRST_NAME"].astype(str).tolist()
     last_names = people_df["LAST_NAME"].astype(str).tolist()
-    birth_dates = people_df["BIRTH_DATE"].tolist()
-    genders = people_df["GENDER"].astype(str).tolist()
     emails = _generate_emails(first_names, last_names)
     phones = _generate_french_phones(size, unique_ratio=0.90)
 
-    rows = []
-    for i in range(size):
-        addr = addr_records[i] if i < len(addr_records) else {"STREET": None, "POSTAL_CODE": None, "LATITUDE": None, "LONGITUDE": None}
-        rows.append({
-            "CUSTOMER_ID": f"{source_name[:3].upper()}-{start_index + i:010d}",
-            "FIRST_NAME": first_names[i],
-            "LAST_NAME": last_names[i],
-            "GENDER": genders[i],
-            "BIRTH_DATE": birth_dates[i],
-            "EMAIL": emails[i],
-            "PHONE": phones[i],
-            "STREET": addr.get("STREET"),
-            "POSTAL_CODE": str(addr.get("POSTAL_CODE")) if pd.notna(addr.get("POSTAL_CODE")) else None,
-            "LATITUDE": float(addr.get("LATITUDE")) if pd.notna(addr.get("LATITUDE")) else None,
-            "LONGITUDE": float(addr.get("LONGITUDE")) if pd.notna(addr.get("LONGITUDE")) else None,
-            "SOURCE": source_name,
-            "OVERLAP_TYPE": "NONE",
-        })
-
-    df = pd.DataFrame(rows)
+    # Assemble the batch column by column rather than row dicts
+    # CUSTOMER_ID as PREFIX-0000000042, zero-padded and prefixed with Arrow compute kernels
+    prefix = f"{source_name[:3].upper()}-"
+    sequence = pa.array(np.arange(size, dtype=np.int64) + start_index).cast(pa.string())
+    customer_ids = pc.binary_join_element_wise(prefix, pc.utf8_lpad(sequence, 10, "0"), "")
+    def arrow_strings(values) -> pd.api.extensions.ExtensionArray:
+        return pd.array(values, dtype=ARROW_STRING_DTYPE)
+
+    df = pd.DataFrame({
+        "CUSTOMER_ID": arrow_strings(customer_ids),
+        "FIRST_NAME": arrow_strings(first_names),
+        "LAST_NAME": arrow_strings(last_names),
+        "GENDER": people_df["GENDER"].astype(ARROW_STRING_DTYPE).array,
+        "BIRTH_DATE": people_df["BIRTH_DATE"].to_numpy(),
+        "EMAIL": arrow_strings(emails),
+        "PHONE": arrow_strings(phones),
+        "STREET": addr_sample["STREET"].astype(ARROW_STRING_DTYPE).array,
+        "POSTAL_CODE": addr_sample["POSTAL_CODE"].astype(ARROW_STRING_DTYPE).array,
+        "LATITUDE": pd.to_numeric(addr_sample["LATITUDE"], errors="coerce").to_numpy(),
+        "LONGITUDE": pd.to_numeric(addr_sample["LONGITUDE"], errors="coerce").to_numpy(),
+        "SOURCE": arrow_strings(np.full(size, source_name, dtype=object)),
+        "OVERLAP_TYPE": arrow_strings(np.full(size, "NONE", dtype=object)),
+    })
     df = _inject_missingness(df)
     df = _add_duplicate_profiles(df, DUPLICATE_PROFILE_RATIO)
     return df
@@ -312,79 +385,32 @@ def _apply_overlap_to_summit_batch(
     if target_overlap <= 0:
         return summit_df
 
-    indices = np.random.permutation(n)[:target_overlap]
-    remaining_indices = list(indices)
+    dst_indices = RNG.permutation(n)[:target_overlap]
 
     # Compute counts per overlap category
-    c_all = int(target_overlap * plan.all_fields)
-    c_three = int(target_overlap * plan.three_fields)
-    c_two = int(target_overlap * plan.two_fields)
-    c_one = int(target_overlap * plan.one_field)
-    # Distribute any remainder to one_field
-    used = c_all + c_three + c_two + c_one
-    c_one += (target_overlap - used)
-
-    # Helper to copy fields from a crocevia record to a summit record
-    def copy_fields(dst_idx: int, src_row: pd.Series, fields: List[str]):
-        for f in fields:
-            summit_df.at[dst_idx, f] = src_row.get(f)
-        summit_df.at[dst_idx, "OVERLAP_TYPE"] = "+".join(sorted(fields)) if fields else "NONE"
-
-    # Sample source rows for overlaps
-    src_sample = crocevia_pool_df.sample(n=target_overlap, replace=True).reset_index(drop=True)
-
-    ptr = 0
-    # All 4 core fields: FIRST_NAME, LAST_NAME, BIRTH_DATE, PHONE (and we include EMAIL too)
-    for _ in range(c_all):
-        if not remaining_indices:
-            break
-        idx = remaining_indices.pop()
-        copy_fields(idx, src_sample.iloc[ptr], [
-            "FIRST_NAME", "LAST_NAME", "BIRTH_DATE", "PHONE", "EMAIL", "STREET", "POSTAL_CODE"
-        ])
-        ptr += 1
-
-    # Three-field overlaps (random combos)
-    triplets = [
-        ["FIRST_NAME", "LAST_NAME", "BIRTH_DATE"],
-        ["FIRST_NAME", "LAST_NAME", "PHONE"],
-        ["FIRST_NAME", "BIRTH_DATE", "PHONE"],
-        ["LAST_NAME", "BIRTH_DATE", "PHONE"],
-    ]
-    for _ in range(c_three):
-        if not remaining_indices:
-            break
-        idx = remaining_indices.pop()
-        fields = random.choice(triplets)
-        copy_fields(idx, src_sample.iloc[ptr], fields)
-        ptr += 1
-
-    # Two-field overlaps
-    pairs = [
-        ["FIRST_NAME", "LAST_NAME"],
-        ["FIRST_NAME", "BIRTH_DATE"],
-        ["FIRST_NAME", "PHONE"],
-        ["LAST_NAME", "BIRTH_DATE"],
-        ["LAST_NAME", "PHONE"],
-        ["BIRTH_DATE", "PHONE"],
-    ]
-    for _ in range(c_two):
-        if not remaining_indices:
-            break
-        idx = remaining_indices.pop()
-        fields = random.choice(pairs)
-        copy_fields(idx, src_sample.iloc[ptr], fields)
-        ptr += 1
-
-    # One-field overlaps
-    singles = ["FIRST_NAME", "LAST_NAME", "BIRTH_DATE", "PHONE", "EMAIL", "POSTAL_CODE"]
-    for _ in range(c_one):
-        if not remaining_indices:
-            break
-        idx = remaining_indices.pop()
-        field = random.choice(singles)
-        copy_fields(idx, src_sample.iloc[ptr], [field])
-        ptr += 1
+    c_all, c_three, c_two, c_one = plan.counts(target_overlap)
+
+    # Sample source rows for overlaps; destination k takes source row k
+    src_sample = crocevia_pool_df.sample(n=target_overlap, replace=True, random_state=RNG).reset_index(drop=True)
+
+    # Copy a block of crocevia records onto summit records in one assignment
+    def copy_fields(positions: np.ndarray, fields: List[str]):
+        if len(positions) == 0:
+            return
+        dst_idx = dst_indices[positions]
+        summit_df.loc[dst_idx, fields] = src_sample.loc[positions, fields].to_numpy(dtype=object)
+        summit_df.loc[dst_idx, "OVERLAP_TYPE"] = "+".join(sorted(fields)) if fields else "NONE"
+
+    copy_fields(np.arange(c_all), OVERLAP_ALL_FIELDS)
+
+    # Pick a combo per destination, then assign each combo's rows as one block
+    start = c_all
+    for combos, count in ((OVERLAP_TRIPLETS, c_three), (OVERLAP_PAIRS, c_two), (OVERLAP_SINGLES, c_one)):
+        positions = np.arange(start, start + count)
+        combo_idx = RNG.integers(0, len(combos), size=count)
+        for k, fields in enumerate(combos):
+            copy_fields(positions[combo_idx == k], fields)
+        start += count
 
     return summit_df
 
@@ -397,66 +423,313 @@ def _write_batch(
 ):
     # Ensure uppercase columns for Snowflake compatibility
     df.columns = df.columns.str.upper()
+    # write_pandas stages through its own temporary stage, which also works inside
+    # owner's-rights procedures; the first batch recreates the table from its schema
     session.write_pandas(
         df,
         table_fqn,
         auto_create_table=True,
         overwrite=first_batch,
+        **WRITE_PANDAS_OPTIONS,
     )
 
 
+# ------------------------ Set-based (in-warehouse) ------------------------
+
+# UNIFORM() needs constant bounds; this is a uniform draw in [0, 1)
+_RAND01_SQL = "UNIFORM(0::FLOAT, 1::FLOAT, RANDOM())"
+
+# Accents folded before stripping characters that are not valid in an email local part
+_ACCENTED_CHARS = "àâäçéèêëîïôöùûüÿñ"
+_FOLDED_CHARS = "aaaceeeeiioouuuyn"
+
+CRM_COLUMNS: List[str] = [
+    "CUSTOMER_ID", "FIRST_NAME", "LAST_NAME", "GENDER", "BIRTH_DATE", "EMAIL", "PHONE",
+    "STREET", "POSTAL_CODE", "LATITUDE", "LONGITUDE", "SOURCE", "OVERLAP_TYPE",
+]
+
+
+def _email_local_sql(expr: str) -> str:
+    return f"REGEXP_REPLACE(TRANSLATE(LOWER({expr}), '{_ACCENTED_CHARS}', '{_FOLDED_CHARS}'), '[^a-z0-9._-]', '')"
+
+
+def _base_rows_sql(source_name: str, total_rows: int) -> str:
+    """SELECT producing `total_rows` base CRM rows, the SQL counterpart of _build_base_batch."""
+    people_rows = min(total_rows, PEOPLE_POOL_MAX_ROWS)
+    address_rows = min(max(int(total_rows * 0.6), 1), ADDRESS_POOL_MAX_ROWS)
+    domains_sql = ", ".join(f"'{d}'" for d in FRENCH_EMAIL_DOMAINS)
+    domain_sql = f"GET(ARRAY_CONSTRUCT({domains_sql}), UNIFORM(0, {len(FRENCH_EMAIL_DOMAINS) - 1}, RANDOM()))::STRING"
+    first_digits_sql = ", ".join(str(d) for d in FRENCH_PHONE_FIRST_DIGITS)
+    pair_sql = "LPAD(UNIFORM(0, 99, RANDOM()), 2, '0')"
+    return f"""
+    WITH people AS (
+        SELECT GENDER, FIRST_NAME, LAST_NAME, BIRTH_DATE,
+               ROW_NUMBER() OVER (ORDER BY RANDOM()) - 1 AS PEOPLE_IDX
+        FROM SS_101.SOURCE_DATA.FRENCH_PEOPLE SAMPLE ROW ({people_rows} ROWS)
+    ),
+    addresses AS (
+        SELECT IFF(NUMERO IS NOT NULL, NUMERO || ' ' || NOM_VOIE, NOM_VOIE) AS STREET,
+               TO_VARCHAR(CODE_POSTAL) AS POSTAL_CODE,
+               LAT::FLOAT AS LATITUDE,
+               LON::FLOAT AS LONGITUDE,
+               ROW_NUMBER() OVER (ORDER BY RANDOM()) - 1 AS ADDR_IDX
+        FROM (
+            SELECT NUMERO, NOM_VOIE, CODE_POSTAL, LON, LAT
+            FROM SS_101.SOURCE_DATA.ADRESSES_FRANCE
+            WHERE CODE_POSTAL IS NOT NULL
+        ) SAMPLE ROW ({address_rows} ROWS)
+    ),
+    counts AS (
+        SELECT (SELECT COUNT(*) FROM people) AS PEOPLE_N,
+               (SELECT COUNT(*) FROM addresses) AS ADDR_N
+    ),
+    base AS (
+        SELECT g.I,
+               IFF(g.I < c.PEOPLE_N, g.I, FLOOR({_RAND01_SQL} * c.PEOPLE_N)) AS PEOPLE_PICK,
+               FLOOR({_RAND01_SQL} * c.ADDR_N) AS ADDR_PICK
+        FROM (
+            SELECT ROW_NUMBER() OVER (ORDER BY SEQ4()) - 1 AS I
+            FROM TABLE(GENERATOR(ROWCOUNT => {total_rows}))
+        ) g CROSS JOIN counts c
+    )
+    SELECT
+        '{source_name[:3].upper()}-' || LPAD(b.I, 10, '0') AS CUSTOMER_ID,
+        p.FIRST_NAME,
+        p.LAST_NAME,
+        p.GENDER,
+        IFF({_RAND01_SQL} < {MISSING_BIRTHDATE_P}, NULL, p.BIRTH_DATE) AS BIRTH_DATE,
+        CASE
+            WHEN {_RAND01_SQL} < {MISSING_EMAIL_P} THEN NULL
+            WHEN {_RAND01_SQL} < 0.7
+                THEN {_email_local_sql("p.FIRST_NAME || '.' || p.LAST_NAME")} || '@' || {domain_sql}
+            ELSE {_email_local_sql("p.FIRST_NAME || p.LAST_NAME")} || UNIFORM(1, 9999, RANDOM()) || '@' || {domain_sql}
+        END AS EMAIL,
+        IFF({_RAND01_SQL} < {MISSING_PHONE_P}, NULL,
+            '0' || GET(ARRAY_CONSTRUCT({first_digits_sql}), UNIFORM(0, {len(FRENCH_PHONE_FIRST_DIGITS) - 1}, RANDOM()))::STRING
+            || ' ' || {pair_sql} || ' ' || {pair_sql} || ' ' || {pair_sql} || ' ' || {pair_sql}) AS PHONE,
+        a.STREET,
+        IFF({_RAND01_SQL} < {MISSING_POSTAL_P}, NULL, a.POSTAL_CODE) AS POSTAL_CODE,
+        a.LATITUDE,
+        a.LONGITUDE,
+        '{source_name}' AS SOURCE,
+        'NONE' AS OVERLAP_TYPE
+    FROM base b
+    JOIN people p ON p.PEOPLE_IDX = b.PEOPLE_PICK
+    LEFT JOIN addresses a ON a.ADDR_IDX = b.ADDR_PICK
+    """
+
+
+def _duplicate_profiles_sql(table_fqn: str, count: int) -> str:
+    """INSERT adding `count` near-duplicate rows, the SQL counterpart of _add_duplicate_profiles."""
+    return f"""
+    INSERT INTO {table_fqn} ({", ".join(CRM_COLUMNS)})
+    SELECT
+        CUSTOMER_ID || '_DUP' || UNIFORM(0, 8, RANDOM()),
+        FIRST_NAME,
+        LAST_NAME,
+        GENDER,
+        BIRTH_DATE,
+        IFF(REGEXP_COUNT(EMAIL, '@') = 1 AND {_RAND01_SQL} < 0.5,
+            SPLIT_PART(EMAIL, '@', 1) || UNIFORM(0, 9, RANDOM()) || '@' || SPLIT_PART(EMAIL, '@', 2),
+            EMAIL),
+        IFF(LENGTH(PHONE) = 14 AND {_RAND01_SQL} < 0.5, LEFT(PHONE, 13) || UNIFORM(0, 9, RANDOM()), PHONE),
+        IFF({_RAND01_SQL} < 0.1, NULL, STREET),
+        IFF({_RAND01_SQL} < 0.2, NULL, POSTAL_CODE),
+        LATITUDE,
+        LONGITUDE,
+        SOURCE,
+        OVERLAP_TYPE
+    FROM {table_fqn} SAMPLE ROW ({count} ROWS)
+    """
+
+
+def _generate_base_table_in_warehouse(session: snowpark.Session, table_fqn: str, source_name: str,
+                                      total_rows: int, temporary: bool = False) -> int:
+    session.sql(
+        f"CREATE OR REPLACE {'TEMPORARY ' if temporary else ''}TABLE {table_fqn} AS "
+        f"{_base_rows_sql(source_name, total_rows)}"
+    ).collect()
+    duplicate_count = int(total_rows * DUPLICATE_PROFILE_RATIO)
+    if duplicate_count > 0:
+        session.sql(_duplicate_profiles_sql(table_fqn, duplicate_count)).collect()
+    return total_rows + duplicate_count
+
+
+def generate_crocevia_in_warehouse(session: snowpark.Session, total_rows: int) -> None:
+    """Generate CROCEVIA_CRM with set-based SQL instead of Python batches."""
+    _generate_base_table_in_warehouse(session, CROCEVIA_TABLE, "Crocevia", total_rows)
+    print(f"CROCEVIA: wrote {total_rows:,} rows in Snowflake")
+
+
+def generate_summit_in_warehouse(session: snowpark.Session, total_rows: int) -> None:
+    """
+    Generate SUMMIT_SPORTS_CRM with set-based SQL: build base rows in a temporary
+    table, then copy Crocevia fields onto the overlap rows following OverlapPlan.
+    """
+    base_table = f"{SUMMIT_TABLE}_BASE"
+    n = _generate_base_table_in_warehouse(session, base_table, "Summit Sports", total_rows, temporary=True)
+
+    target_overlap = int(n * SUMMIT_OVERLAP_RATIO)
+    c_all, c_three, c_two, c_one = OverlapPlan().normalized().counts(target_overlap)
+    pool_size = max(int(total_rows * SUMMIT_OVERLAP_RATIO * 1.2), 1)
+
+    # Per copied field: the bucket/combo conditions under which it comes from Crocevia
+    def copy_condition(field: str) -> str:
+        conditions = ["BUCKET = 'ALL'"] if field in OVERLAP_ALL_FIELDS else []
+        for bucket, combo_col, combos in (
+            ("THREE", "TRIPLE_COMBO", OVERLAP_TRIPLETS),
+            ("TWO", "PAIR_COMBO", OVERLAP_PAIRS),
+            ("ONE", "SINGLE_COMBO", OVERLAP_SINGLES),
+        ):
+            combo_ids = [str(k) for k, fields in enumerate(combos) if field in fields]
+            if combo_ids:
+                conditions.append(f"(BUCKET = '{bucket}' AND {combo_col} IN ({', '.join(combo_ids)}))")
+        return " OR ".join(conditions) or "FALSE"
+
+    # Sorted so OVERLAP_TYPE matches the "+".join(sorted(fields)) labels of the pandas path
+    copied_fields = sorted(OVERLAP_ALL_FIELDS)
+    flags_sql = ",\n               ".join(f"{copy_condition(f)} AS COPY_{f}" for f in copied_fields)
+    overlap_labels_sql = ", ".join(f"IFF(f.COPY_{f}, '{f}', NULL)" for f in copied_fields)
+
+    def output_column(col: str) -> str:
+        if col in copied_fields:
+            return f"IFF(f.COPY_{col}, s.{col}, f.{col}) AS {col}"
+        if col == "OVERLAP_TYPE":
+            return f"COALESCE(NULLIF(ARRAY_TO_STRING(ARRAY_CONSTRUCT_COMPACT({overlap_labels_sql}), '+'), ''), f.OVERLAP_TYPE) AS OVERLAP_TYPE"
+        return f"f.{col}"
+
+    select_sql = ",\n        ".join(output_column(col) for col in CRM_COLUMNS)
+
+    session.sql(f"""
+    CREATE OR REPLACE TABLE {SUMMIT_TABLE} AS
+    WITH pool AS (
+        SELECT {", ".join(copied_fields)},
+               ROW_NUMBER() OVER (ORDER BY RANDOM()) - 1 AS POOL_IDX
+        FROM {CROCEVIA_TABLE} SAMPLE ROW ({pool_size} ROWS)
+    ),
+    planned AS (
+        SELECT b.*,
+               CASE
+                   WHEN RNK < {c_all} THEN 'ALL'
+                   WHEN RNK < {c_all + c_three} THEN 'THREE'
+                   WHEN RNK < {c_all + c_three + c_two} THEN 'TWO'
+                   WHEN RNK < {c_all + c_three + c_two + c_one} THEN 'ONE'
+                   ELSE 'NONE'
+               END AS BUCKET,
+               UNIFORM(0, {len(OVERLAP_TRIPLETS) - 1}, RANDOM()) AS TRIPLE_COMBO,
+               UNIFORM(0, {len(OVERLAP_PAIRS) - 1}, RANDOM()) AS PAIR_COMBO,
+               UNIFORM(0, {len(OVERLAP_SINGLES) - 1}, RANDOM()) AS SINGLE_COMBO,
+               FLOOR({_RAND01_SQL} * (SELECT COUNT(*) FROM pool)) AS POOL_PICK
+        FROM (
+            SELECT *, ROW_NUMBER() OVER (ORDER BY RANDOM()) - 1 AS RNK FROM {base_table}
+        ) b
+    ),
+    flagged AS (
+        SELECT p.*,
+               {flags_sql}
+        FROM planned p
+    )
+    SELECT
+        {select_sql}
+    FROM flagged f
+    LEFT JOIN pool s ON s.POOL_IDX = f.POOL_PICK AND f.BUCKET != 'NONE'
+    """).collect()
+    session.sql(f"DROP TABLE IF EXISTS {base_table}").collect()
+    print(f"SUMMIT: wrote {n:,} rows in Snowflake")
+
+
 # ------------------------------ Orchestration ----------------------------
 
-def generate_crocevia(session: snowpark.Session, total_rows: int) -> None:
-    first_batch = True
+def _write_batches_pipelined(
+    session: snowpark.Session,
+    batches: Iterator[Tuple[pd.DataFrame, int]],
+    table_fqn: str,
+    label: str,
+    total_rows: int,
+) -> None:
+    """
+    Upload each (batch_df, batch_rows) on a background thread while the next
+    batch is built. At most one upload is in flight, so memory stays bounded
+    to two batches and the first batch (which creates the table) lands first.
+    """
     generated = 0
-    start_index = 0
-    while generated < total_rows:
-        batch = min(BATCH_SIZE_CROCEVIA, total_rows - generated)
-        people = load_people(session, batch)
-        addresses = load_addresses(session, int(batch * 0.6))  # addresses for ~60%
-        batch_df = _build_base_batch(people, addresses, "Crocevia", start_index, total_rows)
-        _write_batch(session, batch_df, CROCEVIA_TABLE, first_batch)
-        first_batch = False
-        generated += batch
-        start_index += batch
-        print(f"CROCEVIA: wrote {generated:,}/{total_rows:,}")
+    pending: Optional[Future] = None
+    with ThreadPoolExecutor(max_workers=1) as writer:
+        for batch_df, batch_rows in batches:
+            if pending is not None:
+                pending.result()
+                print(f"{label}: wrote {generated:,}/{total_rows:,}")
+            pending = writer.submit(_write_batch, session, batch_df, table_fqn, generated == 0)
+            generated += batch_rows
+        if pending is not None:
+            pending.result()
+            print(f"{label}: wrote {generated:,}/{total_rows:,}")
+
+
+def generate_crocevia(session: snowpark.Session, total_rows: int) -> None:
+    people_pool = load_people(session, min(total_rows, PEOPLE_POOL_MAX_ROWS))
+    address_pool = load_addresses(session, min(int(total_rows * 0.6), ADDRESS_POOL_MAX_ROWS))
+
+    def batches() -> Iterator[Tuple[pd.DataFrame, int]]:
+        start_index = 0
+        while start_index < total_rows:
+            batch = min(BATCH_SIZE_CROCEVIA, total_rows - start_index)
+            people = _sample_rows(people_pool, batch)
+            addresses = _sample_rows(address_pool, int(batch * 0.6))  # addresses for ~60%
+            yield _build_base_batch(people, addresses, "Crocevia", start_index, total_rows), batch
+            start_index += batch
+
+    _write_batches_pipelined(session, batches(), CROCEVIA_TABLE, "CROCEVIA", total_rows)
 
 
 def generate_summit(session: snowpark.Session, total_rows: int) -> None:
     # For overlap, we need access to a pool from Crocevia table in Snowflake to avoid holding 6M locally
     # We will sample a pool of Crocevia rows per batch to serve as overlap sources.
-    first_batch = True
-    generated = 0
-    start_index = 0
     plan = OverlapPlan().normalized()
-    while generated < total_rows:
-        batch = min(BATCH_SIZE_SUMMIT, total_rows - generated)
-        people = load_people(session, batch)
-        addresses = load_addresses(session, int(batch * 0.6))
-        base_df = _build_base_batch(people, addresses, "Summit Sports", start_index, total_rows)
+    people_pool = load_people(session, min(total_rows, PEOPLE_POOL_MAX_ROWS))
+    address_pool = load_addresses(session, min(int(total_rows * 0.6), ADDRESS_POOL_MAX_ROWS))
 
-        # Sample a Crocevia pool from Snowflake for overlap application
+    def pool_query(batch: int) -> str:
         pool_size = int(batch * SUMMIT_OVERLAP_RATIO * 1.2)  # slightly larger pool for randomness
-        pool_query = f"""
+        return f"""
             SELECT FIRST_NAME, LAST_NAME, BIRTH_DATE, PHONE, EMAIL, STREET, POSTAL_CODE
-            FROM {CROCEVIA_TABLE}
-            ORDER BY RANDOM()
-            LIMIT {pool_size}
+            FROM {CROCEVIA_TABLE} SAMPLE ROW ({pool_size} ROWS)
         """
-        crocevia_pool = session.sql(pool_query).to_pandas()
 
-        overlapped_df = _apply_overlap_to_summit_batch(
-            base_df, crocevia_pool, overlap_ratio=SUMMIT_OVERLAP_RATIO, plan=plan
-        )
-        _write_batch(session, overlapped_df, SUMMIT_TABLE, first_batch)
-        first_batch = False
-        generated += batch
-        start_index += batch
-        print(f"SUMMIT: wrote {generated:,}/{total_rows:,}")
+    def batches() -> Iterator[Tuple[pd.DataFrame, int]]:
+        start_index = 0
+        with ThreadPoolExecutor(max_workers=1) as fetcher:
+            # Sample the Crocevia pool for the next batch while the current one is built
+            batch = min(BATCH_SIZE_SUMMIT, total_rows)
+            pool_future = fetcher.submit(_fetch_arrow, session, pool_query(batch))
+            while start_index < total_rows:
+                people = _sample_rows(people_pool, batch)
+                addresses = _sample_rows(address_pool, int(batch * 0.6))
+                base_df = _build_base_batch(people, addresses, "Summit Sports", start_index, total_rows)
+
+                crocevia_pool = pool_future.result()
+                next_batch = min(BATCH_SIZE_SUMMIT, total_rows - start_index - batch)
+                if next_batch > 0:
+                    pool_future = fetcher.submit(_fetch_arrow, session, pool_query(next_batch))
+
+                overlapped_df = _apply_overlap_to_summit_batch(
+                    base_df, crocevia_pool, overlap_ratio=SUMMIT_OVERLAP_RATIO, plan=plan
+                )
+                yield overlapped_df, batch
+                start_index += batch
+                batch = next_batch
+
+    _write_batches_pipelined(session, batches(), SUMMIT_TABLE, "SUMMIT", total_rows)
+
+
+def _enable_copy_on_write() -> None:
+    # Avoid hidden copies in the batch path; pandas >= 3 always uses Copy-on-Write
+    if int(pd.__version__.split(".")[0]) < 3:
+        pd.set_option("mode.copy_on_write", True)
 
 
 def main(session: snowpark.Session) -> snowpark.DataFrame:
+    _enable_copy_on_write()
     print("Starting dual CRM generation...")
     print(f"Target Crocevia rows: {TARGET_ROWS_CROCEVIA:,}")
     print(f"Target Summit Sports rows: {TARGET_ROWS_SUMMIT:,}")
@@ -480,6 +753,7 @@ def run(session: snowpark.Session, crocevia_rows: int = 10000, summit_rows: int
     """
     Parameterized entrypoint for stored procedure calls to enable small test runs.
     """
+    _enable_copy_on_write()
     print("Starting dual CRM generation (parameterized run)...")
     print(f"Target Crocevia rows: {crocevia_rows:,}")
     print(f"Target Summit Sports rows: {summit_rows:,}")
@@ -494,7 +768,25 @@ def run(session: snowpark.Session, crocevia_rows: int = 10000, summit_rows: int
     sample_pdf = session.sql(sample_query).to_pandas()
     return session.create_dataframe(sample_pdf)
 
-# Note: This script follows the pattern of other generators (main(session) entrypoint).
-# It intentionally avoids a __main__ entrypoint to be compatible with Snowpark handler use.
 
+def run_in_warehouse(session: snowpark.Session, crocevia_rows: int = 10000, summit_rows: int = 5000) -> snowpark.DataFrame:
+    """
+    Entrypoint that generates both CRMs with set-based SQL instead of the
+    Python batch pipeline used by main() and run().
+    """
+    print("Starting dual CRM generation in Snowflake...")
+    print(f"Target Crocevia rows: {crocevia_rows:,}")
+    print(f"Target Summit Sports rows: {summit_rows:,}")
+
+    generate_crocevia_in_warehouse(session, crocevia_rows)
+    generate_summit_in_warehouse(session, summit_rows)
 
+    sample_query = f"""
+        SELECT 'CROCEVIA' AS SOURCE, * FROM {CROCEVIA_TABLE} SAMPLE ROW (100) UNION ALL
+        SELECT 'SUMMIT' AS SOURCE, * FROM {SUMMIT_TABLE}  SAMPLE ROW (100)
+    """
+    sample_pdf = session.sql(sample_query).to_pandas()
+    return session.create_dataframe(sample_pdf)
+
+# Note: This script follows the pattern of other generators (main(session) entrypoint).
+# It intentionally avoids a __main__ entrypoint to be compatible with Snowpark handler use.
@@ -1,148 +1,298 @@
 from snowflake.snowpark.functions import col
 import pandas as pd
 import numpy as np
-import random
 from datetime import datetime, timedelta
 import holidays
 import snowflake.snowpark as snowpark
 
+PRODUCT_TABLE = "SPORTS_DB.SPORTS_DATA.SPORTS_PRODUCT_CATALOGUE"
+STORE_TABLE = "SPORTS_DB.SPORTS_DATA.SPORTS_STORES"
+CHDRY_TABLE = "SPORTS_DB.SPORTS_DATA.chdry0120_0325_COMPLETE"
+SALES_TABLE = "instore_sales_data_indexed"
+
+AVG_DAILY_SALES_TARGET = 10000  # Base daily sales target per store in Euros
+PAYMENT_METHODS = ["Credit Card", "Debit Card", "Gift Card", "Cash"]
+
+# Assistant IDs the per-item picks index into, as an object array of Python strings
+SALES_ASSISTANT_IDS = np.array([f"ASSISTANT_{i}" for i in range(1, 801)], dtype=object)
+
+SALES_COLUMNS = [
+    "ORDER_ID", "STOREID", "STORE_NAME", "SALE_DATE", "PRODUCT_ID", "QUANTITY", 
+    "SALES_PRICE_EURO", "DISCOUNT_AMOUNT_EURO", "PAYMENT_METHOD", "SALES_ASSISTANT_ID", "CUSTOMER_ID"
+]
+
+def _sales_periods():
+    year = datetime.now().year
+    return {
+        "winter": [datetime(year, 12, 1), datetime(year, 2, 28)],
+        "summer": [datetime(year, 6, 15), datetime(year, 8, 31)],
+        "back_to_school": [datetime(year, 9, 1), datetime(year, 9, 30)],
+    }
+
 class B2CSalesDataGenerator:
     def __init__(self, product_catalogue, store_catalogue, chdry_data):
         self.product_catalogue = product_catalogue
         self.store_catalogue = store_catalogue
         self.chdry_data = chdry_data
         self.chdry_data["DATE"] = pd.to_datetime(self.chdry_data["DATE"])
-        self.avg_daily_sales_target = 10000  # Base daily sales target per store in Euros
+        self.avg_daily_sales_target = AVG_DAILY_SALES_TARGET
         self.holidays = holidays.France()
-        self.sales_periods = {
-            "winter": [datetime(datetime.now().year, 12, 1), datetime(datetime.now().year, 2, 28)],
-            "summer": [datetime(datetime.now().year, 6, 15), datetime(datetime.now().year, 8, 31)],
-            "back_to_school": [datetime(datetime.now().year, 9, 1), datetime(datetime.now().year, 9, 30)],
-        }
-        self.payment_methods = ["Credit Card", "Debit Card", "Gift Card", "Cash"]
+        self.sales_periods = _sales_periods()
+        # Object array so per-item picks stay Python strings instead of fixed-width <U values
+        self.payment_methods = np.array(PAYMENT_METHODS, dtype=object)
+        self.rng = np.random.default_rng()
 
         # Normalize CAC 40 values
         self.chdry_data["NORMALIZED_chdry"] = (
             (self.chdry_data["CLOSE"] - self.chdry_data["CLOSE"].min()) /
             (self.chdry_data["CLOSE"].max() - self.chdry_data["CLOSE"].min())
         )
+        # Date -> normalized CAC 40 value, built once for per-day lookups
+        chdry_dates = self.chdry_data["DATE"].dt.date
+        first_per_date = ~chdry_dates.duplicated()
+        self._chdry_map = dict(zip(
+            chdry_dates[first_per_date],
+            self.chdry_data.loc[first_per_date, "NORMALIZED_chdry"].to_numpy(),
+        ))
 
     def generate_sales_data(self, end_date=datetime(2023, 3, 14), num_days=365):
-        sales_data = []
+        # One list of NumPy arrays per output column, one array per store-day, concatenated once
+        sales_columns = {name: [] for name in SALES_COLUMNS}
         product_catalogue_pd = self.product_catalogue.to_pandas()
         store_catalogue_pd = self.store_catalogue.to_pandas()
-        
-        for day_delta in range(num_days):
-            date = end_date - timedelta(days=day_delta)
-            if date in self.holidays:
-                continue
 
-            # Get CAC 40 normalized value for the date
-            normalized_chdry = self._get_chdry_value(date)
-            if normalized_chdry is None:
-                continue  # Skip if no CAC 40 data
+        # Product columns as plain arrays so items are picked by index, not DataFrame.sample
+        product_ids = product_catalogue_pd["PRODUCTID"].to_numpy()
+        product_mrp = product_catalogue_pd["MRP"].to_numpy(dtype=float)
+        product_sale = product_catalogue_pd["SALE_PRICE"].to_numpy(dtype=float)
+        product_discount = product_mrp - product_sale
+        mean_price = max(float(np.mean(product_sale)), 1.0)
+
+        # All candidate days, newest first, with holidays and days without CAC 40 data masked out up front
+        all_dates = pd.date_range(end=end_date, periods=num_days)[::-1]
+        french_holidays = holidays.France(years=range(all_dates.min().year, all_dates.max().year + 1))
+        is_holiday = all_dates.normalize().isin(pd.to_datetime(list(french_holidays)))
+        chdry_values = pd.Series(self._chdry_map, dtype=float).reindex(all_dates.date).to_numpy()
+        for missing_date in all_dates[~is_holiday & np.isnan(chdry_values)].date:
+            print(f"⚠️ No chdry data found for {missing_date}")
+        valid_days = ~is_holiday & ~np.isnan(chdry_values)
+        
+        for date, normalized_chdry in zip(all_dates[valid_days].to_pydatetime(), chdry_values[valid_days]):
+            # Date-only checks, evaluated once per day rather than per store or item
+            is_sale_period = self._is_sale_period(date)
+            is_winter = date.month in (12, 1, 2)
+            # Sale periods use the discounted price, otherwise the full price (MRP)
+            product_price = product_sale if is_sale_period else product_mrp
 
             for store_index, store in store_catalogue_pd.iterrows():
-                store_sales_data = []
                 # Adjust daily sales based on CAC 40 index
                 store_target = self.avg_daily_sales_target * (0.7 + 0.6 * normalized_chdry)  # Scales between 70% and 130%
-                peak_sales_multiplier = self._get_peak_sales_multiplier(date, store)
+                peak_sales_multiplier = self._get_peak_sales_multiplier(store, is_winter, is_sale_period)
                 store_target *= peak_sales_multiplier
-                accumulated_sales = 0
-
-                while accumulated_sales < store_target:
-                    order_id = f"ORDER-{random.randint(100000000, 999999999)}"
-                    num_items = random.randint(2, 5)  # Orders now frequently contain multiple products
-                    order_total = 0
-
-                    for _ in range(num_items):
-                        primary_product = product_catalogue_pd.sample(1).iloc[0]
-                        mrp_price = primary_product["MRP"]  # Full price
-                        sales_price = primary_product["SALE_PRICE"]  # Discounted price
-                        discount_amount = mrp_price - sales_price  # Calculate discount
-                        quantity = 1 if random.random() < 0.8 else random.randint(2, 5)  # Most often quantity is 1
-
-                        # Determine whether to use MRP or Sales Price based on sales periods
-                        applicable_price = sales_price if any(start <= date <= end for start, end in self.sales_periods.values()) else mrp_price
-                        
-                        sales_entry = self._generate_sales_entry(
-                            store, date, primary_product, applicable_price, discount_amount, quantity, order_id
-                        )
-                        store_sales_data.append(sales_entry)
-                        order_total += applicable_price * quantity
-
-                    accumulated_sales += order_total
-
-                final_sales_data = self._normalize_sales_to_target(store_sales_data, store_target)
-                sales_data.extend(final_sales_data)
-
-        sales_df = pd.DataFrame(sales_data, columns=[
-            "ORDER_ID", "STOREID", "STORE_NAME", "SALE_DATE", "PRODUCT_ID", "QUANTITY", 
-            "SALES_PRICE_EURO", "DISCOUNT_AMOUNT_EURO", "PAYMENT_METHOD", "SALES_ASSISTANT_ID", "CUSTOMER_ID"
-        ])
-        sales_df["SALE_DATE"] = pd.to_datetime(sales_df["SALE_DATE"]).dt.date  # Ensure SALE_DATE is a date format
-        return sales_df
-
-    def _normalize_sales_to_target(self, store_sales_data, target_sales):
-        actual_sales_total = sum(entry[6] for entry in store_sales_data)
+
+                order_sizes, item_products, item_quantities = self._draw_orders(
+                    product_price, store_target, mean_price
+                )
+                num_items = len(item_products)
+                line_totals = np.round(product_price[item_products] * item_quantities, 2)
+
+                order_numbers = self.rng.integers(100000000, 1000000000, len(order_sizes))
+                customer_numbers = self.rng.integers(100000000, 1000000000, num_items)
+                customer_ids = np.array([f"CUST{number}" for number in customer_numbers], dtype=object)
+                customer_ids[self.rng.random(num_items) <= 0.2] = None
+
+                store_day = {
+                    "ORDER_ID": np.repeat(np.array([f"ORDER-{number}" for number in order_numbers], dtype=object), order_sizes),
+                    "STOREID": np.full(num_items, store["STOREID"]),
+                    "STORE_NAME": np.full(num_items, store["STORE_NAME"], dtype=object),
+                    "SALE_DATE": np.full(num_items, date.date(), dtype=object),
+                    "PRODUCT_ID": product_ids[item_products],
+                    "QUANTITY": self._normalize_quantities(item_quantities, line_totals, store_target),
+                    "SALES_PRICE_EURO": line_totals,
+                    "DISCOUNT_AMOUNT_EURO": np.round(product_discount[item_products] * item_quantities, 2),
+                    "PAYMENT_METHOD": self.payment_methods[self.rng.integers(0, len(self.payment_methods), num_items)],
+                    "SALES_ASSISTANT_ID": SALES_ASSISTANT_IDS[self.rng.integers(0, len(SALES_ASSISTANT_IDS), num_items)],
+                    "CUSTOMER_ID": customer_ids,
+                }
+                for name, values in store_day.items():
+                    sales_columns[name].append(values)
+
+        return pd.DataFrame(
+            {name: np.concatenate(arrays) if arrays else np.array([], dtype=object) for name, arrays in sales_columns.items()},
+            copy=False,
+        )
+
+    def _draw_items(self, num_products, size):
+        """Draw product indices and quantities for `size` order items in one go."""
+        product_indices = self.rng.integers(0, num_products, size)
+        # Most often quantity is 1, otherwise 2-5
+        quantities = np.where(self.rng.random(size) < 0.8, 1, self.rng.integers(2, 6, size))
+        return product_indices, quantities
+
+    def _draw_orders(self, product_price, store_target, mean_price):
+        """Draw whole orders until their running total first reaches `store_target`."""
+        # Roughly enough orders for the target (3.5 items of ~1.4 units each); more blocks are drawn if short
+        block_orders = max(16, int(store_target / (mean_price * 3.5 * 1.4) * 1.2))
+        sizes, products, quantities = [], [], []
+        accumulated_sales = 0.0
+        while accumulated_sales < store_target:
+            order_sizes = self.rng.integers(2, 6, block_orders)  # Orders frequently contain 2-5 products
+            item_products, item_quantities = self._draw_items(len(product_price), int(order_sizes.sum()))
+            order_totals = np.add.reduceat(
+                product_price[item_products] * item_quantities, np.cumsum(order_sizes) - order_sizes
+            )
+            running_totals = accumulated_sales + np.cumsum(order_totals)
+            # Keep orders up to and including the one that reaches the target
+            kept_orders = min(int(np.searchsorted(running_totals, store_target)) + 1, block_orders)
+            kept_items = int(order_sizes[:kept_orders].sum())
+            sizes.append(order_sizes[:kept_orders])
+            products.append(item_products[:kept_items])
+            quantities.append(item_quantities[:kept_items])
+            accumulated_sales = running_totals[kept_orders - 1]
+        return np.concatenate(sizes), np.concatenate(products), np.concatenate(quantities)
+
+    @staticmethod
+    def _normalize_quantities(quantities, line_totals, target_sales):
+        """Rescale item quantities so the store-day total lands on its target."""
+        actual_sales_total = line_totals.sum()
         adjustment_ratio = target_sales / actual_sales_total if actual_sales_total > 0 else 1
-        for entry in store_sales_data:
-            entry[5] = max(1, int(entry[5] * adjustment_ratio))  # Adjust quantity
-        return store_sales_data
+        return np.maximum(1, (quantities * adjustment_ratio).astype(np.int64))
+
+    def _is_sale_period(self, date):
+        return any(start <= date <= end for start, end in self.sales_periods.values())
 
-    def _get_peak_sales_multiplier(self, date, store):
+    def _get_peak_sales_multiplier(self, store, is_winter, is_sale_period):
         district = store["STORE_TYPE"].lower()
         if "alpine" in district:
-            return 1.5 if date.month in [12, 1, 2] else 0.8
-        elif any(start <= date <= end for start, end in self.sales_periods.values()):
+            return 1.5 if is_winter else 0.8
+        elif is_sale_period:
             return 1.3
         return 1.0
 
-    def _get_chdry_value(self, date):
-        """Retrieve the normalized CAC 40 index value for a specific date."""
-        try:
-            date = pd.to_datetime(date).date()  # Ensure input date is datetime.date
-            self.chdry_data["DATE"] = pd.to_datetime(self.chdry_data["DATE"]).dt.date  # Convert table dates to datetime.date
-    
-            matching_rows = self.chdry_data[self.chdry_data["DATE"] == date]
-    
-            if matching_rows.empty:
-                print(f"⚠️ No chdry data found for {date}")
-                return None
-    
-            return matching_rows["NORMALIZED_chdry"].values[0]
-    
-        except Exception as e:
-            print(f"Error fetching chdry value for {date}: {e}")
-            return None
-
-    def _generate_sales_entry(self, store, date, product, sales_price, discount_amount, quantity, order_id):
-        payment_method = random.choice(self.payment_methods)
-        sales_assistant_id = f"ASSISTANT_{random.randint(1, 800)}"
-        customer_id = f"CUST{random.randint(100000000, 999999999)}" if random.random() > 0.2 else None
-        return [
-            order_id,
-            store["STOREID"], 
-            store["STORE_NAME"], 
-            date.strftime("%Y-%m-%d"),
-            product["PRODUCTID"], 
-            quantity, 
-            round(sales_price * quantity, 2), 
-            round(discount_amount * quantity, 2),
-            payment_method, 
-            sales_assistant_id, 
-            customer_id
-        ]
+def generate_sales_data_in_warehouse(session, target_table=SALES_TABLE, end_date=datetime(2023, 3, 14), num_days=365):
+    """
+    Set-based equivalent of B2CSalesDataGenerator.generate_sales_data: builds
+    days x stores x orders x items with GENERATOR/FLATTEN and appends them to
+    `target_table` without pulling the catalogues to the client.
+
+    Each store-day gets enough orders to reach its CAC-scaled target on average,
+    then quantities are rescaled to the target as _normalize_quantities does.
+    """
+    product_count = session.table(PRODUCT_TABLE).count()
+    if product_count == 0:
+        return
+
+    start_date = end_date - timedelta(days=num_days - 1)
+    french_holidays = holidays.France(years=range(start_date.year, end_date.year + 1))
+    holidays_sql = ", ".join(f"'{day}'::DATE" for day in sorted(french_holidays))
+    # NOT IN (NULL) is never true, so an empty holiday list must add no predicate at all
+    holiday_filter_sql = f"WHERE d.D NOT IN ({holidays_sql})" if holidays_sql else ""
+    sale_period_sql = " OR ".join(
+        f"d.D BETWEEN '{start.date()}' AND '{end.date()}'" for start, end in _sales_periods().values()
+    )
+    payments_sql = ", ".join(f"'{method}'" for method in PAYMENT_METHODS)
+    rand01 = "UNIFORM(0::FLOAT, 1::FLOAT, RANDOM())"
+    # 2-5 items per order, quantity 1 (80%) or 2-5 (20%)
+    expected_units_per_order = 3.5 * (0.8 + 0.2 * 3.5)
+
+    session.sql(f"""
+    CREATE TABLE IF NOT EXISTS {target_table} (
+        ORDER_ID VARCHAR, STOREID NUMBER, STORE_NAME VARCHAR, SALE_DATE DATE, PRODUCT_ID VARCHAR,
+        QUANTITY NUMBER, SALES_PRICE_EURO FLOAT, DISCOUNT_AMOUNT_EURO FLOAT, PAYMENT_METHOD VARCHAR,
+        SALES_ASSISTANT_ID VARCHAR, CUSTOMER_ID VARCHAR
+    )
+    """).collect()
+
+    session.sql(f"""
+    INSERT INTO {target_table} ({", ".join(SALES_COLUMNS)})
+    WITH cac AS (
+        SELECT TO_DATE(DATE) AS D,
+               (CLOSE - MIN(CLOSE) OVER ()) / NULLIF(MAX(CLOSE) OVER () - MIN(CLOSE) OVER (), 0) AS NORMALIZED_CHDRY
+        FROM {CHDRY_TABLE}
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY TO_DATE(DATE) ORDER BY DATE) = 1
+    ),
+    days AS (
+        SELECT DATEADD(DAY, -(ROW_NUMBER() OVER (ORDER BY SEQ4()) - 1), '{end_date.date()}'::DATE) AS D
+        FROM TABLE(GENERATOR(ROWCOUNT => {num_days}))
+    ),
+    valid_days AS (
+        SELECT d.D, c.NORMALIZED_CHDRY,
+               ({sale_period_sql}) AS IS_SALE_PERIOD,
+               MONTH(d.D) IN (12, 1, 2) AS IS_WINTER
+        FROM days d
+        JOIN cac c ON c.D = d.D AND c.NORMALIZED_CHDRY IS NOT NULL
+        {holiday_filter_sql}
+    ),
+    products AS (
+        SELECT PRODUCTID, MRP, SALE_PRICE, ROW_NUMBER() OVER (ORDER BY PRODUCTID) - 1 AS P_IDX
+        FROM {PRODUCT_TABLE}
+    ),
+    product_stats AS (
+        SELECT AVG(MRP) AS AVG_MRP, AVG(SALE_PRICE) AS AVG_SALE_PRICE FROM products
+    ),
+    store_days AS (
+        SELECT v.D, s.STOREID, s.STORE_NAME, v.IS_SALE_PERIOD,
+               {AVG_DAILY_SALES_TARGET} * (0.7 + 0.6 * v.NORMALIZED_CHDRY)
+               * CASE
+                     WHEN CONTAINS(LOWER(s.STORE_TYPE), 'alpine') THEN IFF(v.IS_WINTER, 1.5, 0.8)
+                     WHEN v.IS_SALE_PERIOD THEN 1.3
+                     ELSE 1.0
+                 END AS STORE_TARGET,
+               IFF(v.IS_SALE_PERIOD, ps.AVG_SALE_PRICE, ps.AVG_MRP) * {expected_units_per_order} AS EXPECTED_ORDER_VALUE
+        FROM valid_days v
+        CROSS JOIN {STORE_TABLE} s
+        CROSS JOIN product_stats ps
+    ),
+    orders AS (
+        SELECT sd.D, sd.STOREID, sd.STORE_NAME, sd.IS_SALE_PERIOD, sd.STORE_TARGET,
+               'ORDER-' || UNIFORM(100000000, 999999999, RANDOM()) AS ORDER_ID,
+               UNIFORM(2, 5, RANDOM()) AS NUM_ITEMS
+        FROM store_days sd,
+             LATERAL FLATTEN(ARRAY_GENERATE_RANGE(0, GREATEST(CEIL(sd.STORE_TARGET / NULLIF(sd.EXPECTED_ORDER_VALUE, 0)), 1)::INT))
+    ),
+    items AS (
+        SELECT o.*,
+               UNIFORM(0, {product_count - 1}, RANDOM()) AS P_PICK,
+               IFF({rand01} < 0.8, 1, UNIFORM(2, 5, RANDOM())) AS QTY
+        FROM orders o,
+             LATERAL FLATTEN(ARRAY_GENERATE_RANGE(0, o.NUM_ITEMS))
+    ),
+    priced AS (
+        SELECT i.*, p.PRODUCTID,
+               ROUND(IFF(i.IS_SALE_PERIOD, p.SALE_PRICE, p.MRP) * i.QTY, 2) AS LINE_TOTAL,
+               ROUND((p.MRP - p.SALE_PRICE) * i.QTY, 2) AS LINE_DISCOUNT
+        FROM items i
+        JOIN products p ON p.P_IDX = i.P_PICK
+    )
+    SELECT
+        ORDER_ID,
+        STOREID,
+        STORE_NAME,
+        D AS SALE_DATE,
+        PRODUCTID AS PRODUCT_ID,
+        GREATEST(1, TRUNC(QTY * COALESCE(STORE_TARGET / NULLIF(SUM(LINE_TOTAL) OVER (PARTITION BY STOREID, D), 0), 1))) AS QUANTITY,
+        LINE_TOTAL AS SALES_PRICE_EURO,
+        LINE_DISCOUNT AS DISCOUNT_AMOUNT_EURO,
+        GET(ARRAY_CONSTRUCT({payments_sql}), UNIFORM(0, {len(PAYMENT_METHODS) - 1}, RANDOM()))::STRING AS PAYMENT_METHOD,
+        'ASSISTANT_' || UNIFORM(1, 800, RANDOM()) AS SALES_ASSISTANT_ID,
+        IFF({rand01} > 0.2, 'CUST' || UNIFORM(100000000, 999999999, RANDOM()), NULL) AS CUSTOMER_ID
+    FROM priced
+    """).collect()
+
+def run_in_warehouse(session: snowpark.Session):
+    """Entrypoint that generates the in-store sales with set-based SQL instead of the pandas loop in main()."""
+    generate_sales_data_in_warehouse(session)
+    return session.table(SALES_TABLE).sample(n=100)
 
 def main(session: snowpark.Session): 
-    product_catalogue = session.table("SPORTS_DB.SPORTS_DATA.SPORTS_PRODUCT_CATALOGUE")
-    store_catalogue = session.table("SPORTS_DB.SPORTS_DATA.SPORTS_STORES")
-    chdry_data = session.table("SPORTS_DB.SPORTS_DATA.chdry0120_0325_COMPLETE").to_pandas()
+    product_catalogue = session.table(PRODUCT_TABLE)
+    store_catalogue = session.table(STORE_TABLE)
+    chdry_data = session.table(CHDRY_TABLE).to_pandas()
 
     sales_generator = B2CSalesDataGenerator(product_catalogue, store_catalogue, chdry_data)
     sales_df = sales_generator.generate_sales_data()
     sales_df["SALE_DATE"] = pd.to_datetime(sales_df["SALE_DATE"]).dt.date  # Ensure SALE_DATE is a date format
     sales_dfsnowpark_df = session.create_dataframe(sales_df)
-    sales_dfsnowpark_df.write.mode("append").save_as_table("instore_sales_data_indexed")
+    sales_dfsnowpark_df.write.mode("append").save_as_table(SALES_TABLE)
 
     return sales_dfsnowpark_df.sample(n=100)
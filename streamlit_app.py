@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+import pyarrow as pa
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
@@ -8,6 +9,11 @@ from snowflake.snowpark import Session
 from snowflake.snowpark.context import get_active_session
 import json
 
+try:
+    import duckdb
+except ImportError:  # Optional: without it the dashboard queries the warehouse directly
+    duckdb = None
+
 # Page configuration
 st.set_page_config(
     page_title="🏃‍♂️ Summit Sports Reviews Analytics",
@@ -17,7 +23,7 @@ st.set_page_config(
 )
 
 # Custom CSS for better styling
-st.markdown("""
+_CSS = """
 <style>
     .main-header {
         font-size: 3rem;
@@ -57,9 +63,202 @@ st.markdown("""
         padding-right: 20px;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+st.markdown(_CSS, unsafe_allow_html=True)
+
+# Query results are cached across reruns and sessions; uploads clear them explicitly
+QUERY_CACHE_TTL = 300
+
+# Upload tuning for write_pandas: Parquet chunks of this many rows, snappy compression,
+# more PUT threads than the defaults, and logical types so DATE stays a date
+WRITE_PANDAS_OPTIONS = {
+    "chunk_size": 250_000,
+    "compression": "snappy",
+    "parallel": 8,
+    "use_logical_type": True,
+}
+
+# Pixel width the trend chart is downsampled to (M4: at most 4 points per pixel bucket)
+TREND_CHART_WIDTH = 1000
+
+@st.cache_resource
+def _session():
+    """Get the active Snowflake session once per app process"""
+    return get_active_session()
+
+def collect_concurrently(session, statements):
+    """Submit independent statements as async query jobs and wait for all of them"""
+    jobs = [session.sql(statement).collect_nowait() for statement in statements]
+    return [job.result() for job in jobs]
+
+def fetch_arrow(session, query):
+    """Run a query and return the result as an Arrow table, skipping pandas object materialization"""
+    result = session.sql(query)
+    if not hasattr(result, "to_arrow"):
+        # Older Snowpark releases only expose to_pandas
+        return pa.Table.from_pandas(result.to_pandas(), preserve_index=False)
+    return result.to_arrow()
+
+# Materialized view over the reviews table holding rated rows only
+REVIEW_VIEWS = {
+    'RAW_CUSTOMER.MV_REVIEWS_CLEAN': """
+        SELECT * FROM RAW_CUSTOMER.INTERSPORT_REVIEWS
+        WHERE RATING IS NOT NULL
+    """,
+}
+
+# Small summary tables computed once per load, so the tabs read O(groups) rows, not all reviews
+SUMMARY_TABLES = {
+    'RAW_CUSTOMER.STORE_STATS': """
+        SELECT 
+            COALESCE(NULLIF(STORE_LOCATION, ''), 'Online Orders') as store,
+            COUNT(*) as review_count,
+            AVG(RATING) as avg_rating
+        FROM RAW_CUSTOMER.INTERSPORT_REVIEWS
+        WHERE RATING IS NOT NULL
+        GROUP BY store
+    """,
+    'RAW_CUSTOMER.RATING_DIST': """
+        SELECT 
+            RATING,
+            COUNT(*) as count
+        FROM RAW_CUSTOMER.INTERSPORT_REVIEWS
+        WHERE RATING IS NOT NULL
+        GROUP BY RATING
+    """,
+    'RAW_CUSTOMER.LENGTH_DIST': """
+        SELECT 
+            CASE 
+                WHEN REVIEW_LEN < 50 THEN 'Short (< 50 chars)'
+                WHEN REVIEW_LEN < 150 THEN 'Medium (50-150 chars)'
+                ELSE 'Long (> 150 chars)'
+            END as review_length,
+            COUNT(*) as count,
+            AVG(RATING) as avg_rating
+        FROM RAW_CUSTOMER.INTERSPORT_REVIEWS
+        WHERE REVIEW_LEN > 0
+        GROUP BY review_length
+    """,
+}
+
+def create_review_views(session, replace=False):
+    """Create the materialized views the dashboard reads from"""
+    create_clause = "CREATE OR REPLACE MATERIALIZED VIEW" if replace else "CREATE MATERIALIZED VIEW IF NOT EXISTS"
+    # The views only depend on the base table, so they are built in parallel
+    collect_concurrently(session, [
+        f"{create_clause} {view_name} AS {view_sql}" for view_name, view_sql in REVIEW_VIEWS.items()
+    ])
+
+# Version token of the reviews table the summary tables were last rebuilt from
+SUMMARY_VERSION_TABLE = 'RAW_CUSTOMER.SUMMARY_TABLES_VERSION'
+
+def get_table_version(session):
+    """Version token of the reviews table, read from metadata (no warehouse scan)"""
+    version_sql = """
+    SELECT TO_VARCHAR(LAST_ALTERED) || '-' || ROW_COUNT as version
+    FROM INFORMATION_SCHEMA.TABLES
+    WHERE TABLE_SCHEMA = 'RAW_CUSTOMER' AND TABLE_NAME = 'INTERSPORT_REVIEWS'
+    """
+    rows = session.sql(version_sql).collect()
+    return rows[0]['VERSION'] if rows else ""
+
+def build_summary_tables(session, replace=False):
+    """Create the per-store, per-rating and per-length summary tables from the reviews table"""
+    create_clause = "CREATE OR REPLACE TABLE" if replace else "CREATE TABLE IF NOT EXISTS"
+    # Only a full rebuild is known to match the current version; IF NOT EXISTS may keep stale tables.
+    # The version is read first, so rows landing during the rebuild show up as a newer one
+    table_version = get_table_version(session) if replace else None
+    collect_concurrently(session, [
+        f"{create_clause} {table_name} AS {table_sql}" for table_name, table_sql in SUMMARY_TABLES.items()
+    ])
+    if replace:
+        session.sql(f"CREATE OR REPLACE TABLE {SUMMARY_VERSION_TABLE} (VERSION STRING)").collect()
+        session.sql(f"INSERT INTO {SUMMARY_VERSION_TABLE} (VERSION) SELECT ?", params=[table_version]).collect()
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def refresh_summary_tables(_session, table_version):
+    """Rebuild the summary tables once per reviews table version if they were built from another one"""
+    # The French app and upload_data.py reload the shared table without touching the summaries
+    _session.sql(f"CREATE TABLE IF NOT EXISTS {SUMMARY_VERSION_TABLE} (VERSION STRING)").collect()
+    stored = _session.sql(f"SELECT VERSION FROM {SUMMARY_VERSION_TABLE}").collect()
+    if not stored or stored[0]['VERSION'] != table_version:
+        build_summary_tables(_session, replace=True)
+
+# Column layout of the live and staging review tables
+REVIEW_TABLE_DDL = """
+    CUSTOMER_NAME STRING,
+    RATING INTEGER,
+    REVIEW_TEXT STRING,
+    DATE DATE,
+    STORE_LOCATION STRING,
+    REVIEW_LEN INTEGER
+"""
+
+def create_staging_table(session):
+    """(Re)create the empty staging table with the current review table layout"""
+    session.sql(f"CREATE OR REPLACE TABLE RAW_CUSTOMER.INTERSPORT_REVIEWS_STG ({REVIEW_TABLE_DDL})").collect()
 
-# Remove wrapper function - use get_active_session directly
+def swap_in_staging_table(session):
+    """Atomically replace the live table with the staging one, then rebuild what reads from it"""
+    session.sql("ALTER TABLE RAW_CUSTOMER.INTERSPORT_REVIEWS SWAP WITH RAW_CUSTOMER.INTERSPORT_REVIEWS_STG").collect()
+    session.sql("TRUNCATE TABLE RAW_CUSTOMER.INTERSPORT_REVIEWS_STG").collect()
+    # Views and summary tables over the swapped table are rebuilt so they read the new rows
+    create_review_views(session, replace=True)
+    build_summary_tables(session, replace=True)
+
+def migrate_legacy_reviews(session):
+    """Rewrite a reviews table from before the DATE/REVIEW_LEN layout into the current one"""
+    create_staging_table(session)
+    # Legacy dates are DD/MM/YYYY or ISO strings; a DATE column casts to ISO text and parses back
+    session.sql("""
+    INSERT INTO RAW_CUSTOMER.INTERSPORT_REVIEWS_STG
+    SELECT 
+        CUSTOMER_NAME,
+        RATING,
+        REVIEW_TEXT,
+        COALESCE(TRY_TO_DATE(DATE::STRING, 'DD/MM/YYYY'), TRY_TO_DATE(DATE::STRING)),
+        STORE_LOCATION,
+        LENGTH(REVIEW_TEXT)
+    FROM RAW_CUSTOMER.INTERSPORT_REVIEWS
+    """).collect()
+    swap_in_staging_table(session)
+
+@st.cache_resource(show_spinner=False)
+def ensure_schema(_session):
+    """Create the schema, the review table and views once per app process, upgrading a legacy table"""
+    _session.sql("CREATE SCHEMA IF NOT EXISTS RAW_CUSTOMER").collect()
+    _session.sql(f"CREATE TABLE IF NOT EXISTS RAW_CUSTOMER.INTERSPORT_REVIEWS ({REVIEW_TABLE_DDL})").collect()
+    
+    # Older deployments kept DATE as text and had no REVIEW_LEN column
+    columns = {
+        row['COLUMN_NAME']: row['DATA_TYPE']
+        for row in _session.sql("""
+        SELECT COLUMN_NAME, DATA_TYPE
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = 'RAW_CUSTOMER' AND TABLE_NAME = 'INTERSPORT_REVIEWS'
+        """).collect()
+    }
+    if columns.get('DATE') != 'DATE' or 'REVIEW_LEN' not in columns:
+        migrate_legacy_reviews(_session)
+    else:
+        # A table already in the current layout (e.g. written by the French app) may have no summaries yet
+        create_review_views(_session)
+        build_summary_tables(_session)
+
+# Arrow-backed dtypes for the review CSV columns (matched after upper-casing the header)
+REVIEW_CSV_DTYPES = {
+    'CUSTOMER_NAME': 'string[pyarrow]',
+    'RATING': 'int8[pyarrow]',
+    'REVIEW_TEXT': 'string[pyarrow]',
+    'DATE': 'string[pyarrow]',
+    'STORE_LOCATION': 'string[pyarrow]',
+}
+
+def read_reviews_csv(source):
+    """Read a reviews CSV with the pyarrow parser into Arrow-backed columns"""
+    df = pd.read_csv(source, engine='pyarrow', dtype_backend='pyarrow')
+    df.rename(columns=str.upper, inplace=True)
+    return df.astype({col: dtype for col, dtype in REVIEW_CSV_DTYPES.items() if col in df.columns})
 
 def create_table_and_upload_data(session, df=None):
     """Create table and upload CSV data"""
@@ -67,25 +266,10 @@ def create_table_and_upload_data(session, df=None):
         if session is None:
             return False, "No valid Snowflake session available"
             
-        # Create schema if not exists (use current database)
-        session.sql("CREATE SCHEMA IF NOT EXISTS RAW_CUSTOMER").collect()
-        
-        # Create table with fully qualified name
-        create_table_sql = """
-        CREATE OR REPLACE TABLE RAW_CUSTOMER.INTERSPORT_REVIEWS (
-            CUSTOMER_NAME STRING,
-            RATING INTEGER,
-            REVIEW_TEXT STRING,
-            DATE STRING,
-            STORE_LOCATION STRING
-        )
-        """
-        session.sql(create_table_sql).collect()
-        
         # Use provided DataFrame or try to read from file
         if df is None:
             try:
-                df = pd.read_csv('summit_sport_reviews.csv')
+                df = read_reviews_csv('summit_sport_reviews.csv')
             except FileNotFoundError:
                 return False, "CSV file not found. Please upload a file using the file uploader."
         
@@ -94,16 +278,35 @@ def create_table_and_upload_data(session, df=None):
             return False, "No data found in the uploaded file"
             
         # Convert column names to uppercase to match Snowflake table
-        df.columns = df.columns.str.upper()
+        df.rename(columns=str.upper, inplace=True)
         
         # Validate required columns
         required_cols = ['CUSTOMER_NAME', 'RATING', 'REVIEW_TEXT', 'DATE', 'STORE_LOCATION']
-        missing_cols = [col for col in required_cols if col not in df.columns]
+        missing_cols = set(required_cols).difference(df.columns)
         if missing_cols:
-            return False, f"Missing required columns: {missing_cols}"
+            return False, f"Missing required columns: {sorted(missing_cols)}"
+        
+        # Parse dates once at ingest so the table stores a native DATE column;
+        # the CSV mixes DD/MM/YYYY and ISO dates, so fall back to ISO where the first format fails
+        review_dates = pd.to_datetime(df['DATE'], format='%d/%m/%Y', errors='coerce')
+        review_dates = review_dates.fillna(pd.to_datetime(df['DATE'], format='ISO8601', errors='coerce'))
+        # Review length is computed once here so length bucketing scans a narrow integer column
+        upload_df = df[required_cols].assign(
+            DATE=review_dates.dt.date,
+            REVIEW_LEN=df['REVIEW_TEXT'].str.len().astype('Int32'),
+        )
         
-        # Write to Snowflake with schema specified
-        session.write_pandas(df, 'INTERSPORT_REVIEWS', schema='RAW_CUSTOMER', overwrite=True)
+        # Load into a fresh staging table with the current layout so the live one keeps serving,
+        # then swap it in; this also replaces a live table with an outdated layout
+        ensure_schema(session)
+        create_staging_table(session)
+        # write_pandas stages through its own temporary stage; the user stage is not
+        # available to an owner's-rights Streamlit app
+        session.write_pandas(
+            upload_df, 'INTERSPORT_REVIEWS_STG', schema='RAW_CUSTOMER',
+            auto_create_table=False, **WRITE_PANDAS_OPTIONS
+        )
+        swap_in_staging_table(session)
         
         return True, len(df)
     except Exception as e:
@@ -111,9 +314,10 @@ def create_table_and_upload_data(session, df=None):
         error_details = f"Error: {str(e)}\nDetails: {traceback.format_exc()}"
         return False, error_details
 
-def get_basic_stats(session):
-    """Get basic statistics from the data"""
-    stats_sql = """
+# One query per dashboard aggregate, written in SQL that runs both on Snowflake and on the
+# local DuckDB copy; the {placeholders} name the source tables
+DASHBOARD_QUERIES = {
+    'stats': """
     SELECT 
         COUNT(*) as total_reviews,
         AVG(RATING) as avg_rating,
@@ -121,44 +325,235 @@ def get_basic_stats(session):
         COUNT(DISTINCT CUSTOMER_NAME) as unique_customers,
         MIN(DATE) as earliest_review,
         MAX(DATE) as latest_review
+    FROM {clean}
+    """,
+    'rating': """
+    SELECT RATING, count
+    FROM {rating_dist}
+    """,
+    'stores': """
+    SELECT store, review_count, avg_rating
+    FROM {store_stats}
+    ORDER BY review_count DESC
+    LIMIT 10
+    """,
+    # M4 downsampling: keep the first, last, min and max rating days of each pixel bucket,
+    # plus the busiest day so the review count bars keep their peaks
+    'temporal': """
+    SELECT day as date, avg_rating, review_count
+    FROM (
+        SELECT 
+            *,
+            FLOOR((day - MIN(day) OVER ()) * {width} / ((MAX(day) OVER () - MIN(day) OVER ()) + 1)) as bucket
+        FROM (
+            SELECT 
+                DATE as day,
+                AVG(RATING) as avg_rating,
+                COUNT(*) as review_count
+            FROM {clean}
+            WHERE DATE IS NOT NULL
+            GROUP BY DATE
+        ) daily
+    ) bucketed
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY bucket ORDER BY day) = 1
+        OR ROW_NUMBER() OVER (PARTITION BY bucket ORDER BY day DESC) = 1
+        OR ROW_NUMBER() OVER (PARTITION BY bucket ORDER BY avg_rating, day) = 1
+        OR ROW_NUMBER() OVER (PARTITION BY bucket ORDER BY avg_rating DESC, day) = 1
+        OR ROW_NUMBER() OVER (PARTITION BY bucket ORDER BY review_count DESC, day) = 1
+    """,
+    'lengths': """
+    SELECT review_length, count, avg_rating
+    FROM {length_dist}
+    """,
+}
+
+WAREHOUSE_SOURCES = {
+    'reviews': 'RAW_CUSTOMER.INTERSPORT_REVIEWS',
+    'clean': 'RAW_CUSTOMER.MV_REVIEWS_CLEAN',
+    'store_stats': 'RAW_CUSTOMER.STORE_STATS',
+    'rating_dist': 'RAW_CUSTOMER.RATING_DIST',
+    'length_dist': 'RAW_CUSTOMER.LENGTH_DIST',
+}
+LOCAL_SOURCES = {
+    'reviews': 'reviews',
+    'clean': 'MV_REVIEWS_CLEAN',
+    'store_stats': 'STORE_STATS',
+    'rating_dist': 'RATING_DIST',
+    'length_dist': 'LENGTH_DIST',
+}
+
+# All dashboard aggregates in one warehouse statement: each CTE is one query above and its
+# rows come back as (KIND, PAYLOAD) pairs, split per kind on the client
+DASHBOARD_SQL = "WITH " + ",\n".join(
+    f"{kind} AS ({query.format(width=TREND_CHART_WIDTH, **WAREHOUSE_SOURCES)})"
+    for kind, query in DASHBOARD_QUERIES.items()
+) + "\n" + "\nUNION ALL ".join(
+    f"SELECT '{kind}' as kind, OBJECT_CONSTRUCT(*) as payload FROM {kind}"
+    for kind in DASHBOARD_QUERIES
+)
+
+# Expected columns per kind (OBJECT_CONSTRUCT drops NULL fields, so missing keys become NaN)
+DASHBOARD_COLUMNS = {
+    'stats': ['TOTAL_REVIEWS', 'AVG_RATING', 'UNIQUE_STORES', 'UNIQUE_CUSTOMERS', 'EARLIEST_REVIEW', 'LATEST_REVIEW'],
+    'rating': ['RATING', 'COUNT'],
+    'stores': ['STORE', 'REVIEW_COUNT', 'AVG_RATING'],
+    'temporal': ['DATE', 'AVG_RATING', 'REVIEW_COUNT'],
+    'lengths': ['REVIEW_LENGTH', 'COUNT', 'AVG_RATING'],
+}
+
+# Keyed on the table version token, so a load from any session rebuilds the copy;
+# one entry keeps superseded copies from piling up in memory
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _local_reviews(table_version):
+    """Load one version of the reviews table into an in-process DuckDB database"""
+    con = duckdb.connect(':memory:')
+    # Copied into a real table: registered Arrow data is not visible to other cursors
+    con.register('reviews_arrow', fetch_arrow(_session(), f"SELECT * FROM {WAREHOUSE_SOURCES['reviews']}"))
+    con.execute(f"CREATE TABLE {LOCAL_SOURCES['reviews']} AS SELECT * FROM reviews_arrow")
+    con.unregister('reviews_arrow')
+    # Views and summary tables are both plain views locally
+    for view_name, view_sql in {**REVIEW_VIEWS, **SUMMARY_TABLES}.items():
+        local_sql = view_sql.replace(WAREHOUSE_SOURCES['reviews'], LOCAL_SOURCES['reviews'])
+        con.execute(f"CREATE VIEW {view_name.split('.')[-1]} AS {local_sql}")
+    return con
+
+def _query_local_reviews(table_version):
+    """Run the dashboard queries against the local DuckDB copy of the reviews"""
+    # A cursor per call keeps the shared connection safe across Streamlit sessions
+    cursor = _local_reviews(table_version).cursor()
+    return {
+        kind: cursor.execute(query.format(width=TREND_CHART_WIDTH, **LOCAL_SOURCES)).df().rename(columns=str.upper)
+        for kind, query in DASHBOARD_QUERIES.items()
+    }
+
+def _query_warehouse(session):
+    """Run all dashboard queries in a single warehouse round-trip"""
+    dashboard_rows = fetch_arrow(session, DASHBOARD_SQL)
+    payloads = {}
+    for kind, payload in zip(dashboard_rows.column('KIND').to_pylist(), dashboard_rows.column('PAYLOAD').to_pylist()):
+        payloads.setdefault(kind, []).append(json.loads(payload))
+    return {kind: pd.DataFrame(rows) for kind, rows in payloads.items()}
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, show_spinner=False)
+def get_dashboard_data(_session, table_version):
+    """Get every dashboard aggregate for one version of the reviews table, keyed by kind"""
+    # Prefer the local DuckDB copy so reruns cost no warehouse time; fall back to the warehouse
+    frames = _query_local_reviews(table_version) if duckdb is not None else _query_warehouse(_session)
+    data = {
+        kind: frames.get(kind, pd.DataFrame()).reindex(columns=columns)
+        for kind, columns in DASHBOARD_COLUMNS.items()
+    }
+    
+    # UNION ALL does not keep the per-query ordering, so restore it here
+    data['stats'] = data['stats'].iloc[0]
+    data['rating'] = data['rating'].sort_values('RATING', ignore_index=True)
+    # Donut chart labels, built once alongside the data both Overview charts share
+    data['rating']['LABEL'] = data['rating']['RATING'].astype(str) + ' Stars'
+    data['stores'] = data['stores'].sort_values('REVIEW_COUNT', ascending=False, ignore_index=True)
+    data['temporal'] = data['temporal'].sort_values('DATE', ignore_index=True)
+    return data
+
+# AI_AGG summaries are stored per input hash and prompt, so unchanged reviews skip the LLM call
+AI_INSIGHTS_CACHE_TABLE = 'RAW_CUSTOMER.AI_INSIGHTS_CACHE'
+AI_INSIGHTS_CACHE_TTL = 3600
+
+# Insight name -> (review text expression fed to AI_AGG, prompt); reviews are mostly French
+INSIGHT_DIMENSIONS = {
+    'overall': (
+        "REVIEW_TEXT",
+        'Provide a brief summary of customer sentiment for this sports retailer in 2-3 sentences',
+    ),
+    'positive': (
+        "CASE WHEN RATING >= 4 THEN REVIEW_TEXT END",
+        'Summarize what customers appreciate most in these positive reviews in 2-3 sentences',
+    ),
+    'negative': (
+        "CASE WHEN RATING <= 2 THEN REVIEW_TEXT END",
+        'Summarize the main complaints and areas for improvement in these negative reviews in 2-3 sentences',
+    ),
+    'delivery': (
+        "CASE WHEN REVIEW_TEXT ILIKE '%livr%' OR REVIEW_TEXT ILIKE '%deliver%' THEN REVIEW_TEXT END",
+        'Summarize what customers say about delivery and logistics in 2-3 sentences',
+    ),
+}
+
+@st.cache_data(ttl=AI_INSIGHTS_CACHE_TTL, show_spinner=False)
+def summarize_reviews(_session):
+    """Get every AI_AGG insight, reusing stored results when the review set is unchanged"""
+    _session.sql(f"""
+    CREATE TABLE IF NOT EXISTS {AI_INSIGHTS_CACHE_TABLE} (
+        INPUT_HASH STRING,
+        PROMPT STRING,
+        RESULT STRING,
+        CREATED_AT TIMESTAMP_NTZ
+    )
+    """).collect()
+    
+    # Cheap fingerprint of the rows AI_AGG would read
+    hash_query = """
+    SELECT TO_VARCHAR(HASH_AGG(REVIEW_TEXT, RATING)) as input_hash
     FROM RAW_CUSTOMER.INTERSPORT_REVIEWS
-    WHERE RATING IS NOT NULL
+    WHERE REVIEW_TEXT IS NOT NULL AND REVIEW_TEXT != ''
     """
-    return session.sql(stats_sql).to_pandas().iloc[0]
-
-def get_rating_distribution(session):
-    """Get rating distribution"""
-    rating_sql = """
+    input_hash = _session.sql(hash_query).collect()[0]['INPUT_HASH']
+    
+    cached = _session.sql(f"""
+    SELECT PROMPT, RESULT FROM {AI_INSIGHTS_CACHE_TABLE}
+    WHERE INPUT_HASH = ?
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY PROMPT ORDER BY CREATED_AT DESC) = 1
+    """, params=[input_hash]).collect()
+    # A stored NULL result is a hit too: that insight had no matching reviews last time
+    cached_results = {row['PROMPT']: row['RESULT'] for row in cached}
+    if all(prompt in cached_results for _, prompt in INSIGHT_DIMENSIONS.values()):
+        return {
+            name: cached_results[prompt]
+            for name, (_, prompt) in INSIGHT_DIMENSIONS.items()
+            if cached_results[prompt] is not None
+        }
+    
+    # One scan of the table builds every insight
+    aggregates = ",\n        ".join(
+        f"AI_AGG({text_expr}, '{prompt}') as {name}"
+        for name, (text_expr, prompt) in INSIGHT_DIMENSIONS.items()
+    )
+    summary_query = f"""
     SELECT 
-        RATING,
-        COUNT(*) as count
+        {aggregates}
     FROM RAW_CUSTOMER.INTERSPORT_REVIEWS
-    WHERE RATING IS NOT NULL
-    GROUP BY RATING
-    ORDER BY RATING
+    WHERE REVIEW_TEXT IS NOT NULL AND REVIEW_TEXT != ''
     """
-    return session.sql(rating_sql).to_pandas()
+    result = _session.sql(summary_query).collect()
+    if not result:
+        return {}
+    
+    # Every prompt is stored, NULL results included, so the next lookup is a full hit
+    summaries = {name: result[0][name.upper()] for name in INSIGHT_DIMENSIONS}
+    rows_sql = " UNION ALL ".join("SELECT ?, ?, ?, CURRENT_TIMESTAMP()" for _ in summaries)
+    params = [
+        value
+        for name, summary in summaries.items()
+        for value in (input_hash, INSIGHT_DIMENSIONS[name][1], summary)
+    ]
+    _session.sql(
+        f"INSERT INTO {AI_INSIGHTS_CACHE_TABLE} (INPUT_HASH, PROMPT, RESULT, CREATED_AT) {rows_sql}",
+        params=params
+    ).collect()
+    return {name: summary for name, summary in summaries.items() if summary is not None}
+
+def clear_query_caches():
+    """Drop cached query results so the dashboard reflects newly loaded data"""
+    get_dashboard_data.clear()
+    _local_reviews.clear()
+    summarize_reviews.clear()
 
 def get_ai_insights(session):
-    """Generate AI insights using AI_AGG function - simplified version"""
+    """Generate AI insights using AI_AGG function"""
     insights = {}
     
-    # Start with just one simple query to test
-    simple_query = """
-    SELECT AI_AGG(
-        REVIEW_TEXT, 
-        'Provide a brief summary of customer sentiment for this sports retailer in 2-3 sentences'
-    ) as summary
-    FROM RAW_CUSTOMER.INTERSPORT_REVIEWS
-    WHERE REVIEW_TEXT IS NOT NULL AND REVIEW_TEXT != ''
-    LIMIT 100
-    """
-    
     try:
         st.info("🔄 Running AI analysis...")
-        result = session.sql(simple_query).collect()
-        if result and len(result) > 0:
-            insights['overall'] = result[0]['SUMMARY']
+        insights = dict(summarize_reviews(session))
+        if insights:
             st.success("✅ AI analysis completed!")
         else:
             insights['overall'] = "No analysis results returned."
@@ -168,6 +563,206 @@ def get_ai_insights(session):
     
     return insights
 
+# Figures are cached on their input DataFrame, so reruns with unchanged data skip Plotly assembly
+@st.cache_data(show_spinner=False)
+def rating_bar_figure(rating_dist):
+    """Bar chart of the rating distribution"""
+    fig_rating = px.bar(
+        rating_dist, 
+        x='RATING', 
+        y='COUNT',
+        title="Distribution of Customer Ratings",
+        color='COUNT',
+        color_continuous_scale='blues'
+    )
+    fig_rating.update_layout(
+        xaxis_title="Rating",
+        yaxis_title="Number of Reviews",
+        showlegend=False
+    )
+    return fig_rating
+
+@st.cache_data(show_spinner=False)
+def rating_donut_figure(rating_dist):
+    """Donut chart of the rating distribution"""
+    fig_donut = go.Figure(data=[go.Pie(
+        labels=rating_dist['LABEL'],
+        values=rating_dist['COUNT'],
+        hole=.5,
+        marker_colors=['#ff4444', '#ff8800', '#ffcc00', '#88cc00', '#44aa44']
+    )])
+    
+    fig_donut.update_layout(
+        title="Rating Distribution (Donut Chart)",
+        annotations=[dict(text='Ratings', x=0.5, y=0.5, font_size=20, showarrow=False)]
+    )
+    return fig_donut
+
+@st.cache_data(show_spinner=False)
+def store_bar_figure(store_stats):
+    """Horizontal bar chart of the top stores by review count"""
+    fig_stores = px.bar(
+        store_stats.head(8),
+        x='REVIEW_COUNT',
+        y='STORE',
+        orientation='h',
+        title="Top Stores by Review Count",
+        color='AVG_RATING',
+        color_continuous_scale='RdYlGn'
+    )
+    fig_stores.update_layout(yaxis={'categoryorder':'total ascending'})
+    return fig_stores
+
+@st.cache_data(show_spinner=False)
+def store_scatter_figure(store_stats):
+    """Scatter of review count against average rating per store"""
+    return px.scatter(
+        store_stats,
+        x='REVIEW_COUNT',
+        y='AVG_RATING',
+        size='REVIEW_COUNT',
+        hover_data=['STORE'],
+        title="Store Performance: Reviews vs Rating",
+        color='AVG_RATING',
+        color_continuous_scale='RdYlGn'
+    )
+
+@st.cache_data(show_spinner=False)
+def trend_figure(temporal_data):
+    """Average rating line and review count bars over time"""
+    fig_temporal = make_subplots(specs=[[{"secondary_y": True}]])
+    
+    fig_temporal.add_trace(
+        go.Scatter(x=temporal_data['DATE'], y=temporal_data['AVG_RATING'], name="Average Rating"),
+        secondary_y=False,
+    )
+    
+    fig_temporal.add_trace(
+        go.Bar(x=temporal_data['DATE'], y=temporal_data['REVIEW_COUNT'], name="Review Count", opacity=0.6),
+        secondary_y=True,
+    )
+    
+    fig_temporal.update_xaxes(title_text="Date")
+    fig_temporal.update_yaxes(title_text="Average Rating", secondary_y=False)
+    fig_temporal.update_yaxes(title_text="Review Count", secondary_y=True)
+    fig_temporal.update_layout(title_text="Rating Trends Over Time")
+    return fig_temporal
+
+@st.cache_data(show_spinner=False)
+def length_pie_figure(length_data):
+    """Pie chart of review length buckets"""
+    return px.pie(
+        length_data,
+        values='COUNT',
+        names='REVIEW_LENGTH',
+        title="Review Length Distribution"
+    )
+
+@st.cache_data(show_spinner=False)
+def length_rating_figure(length_data):
+    """Bar chart of average rating per review length bucket"""
+    return px.bar(
+        length_data,
+        x='REVIEW_LENGTH',
+        y='AVG_RATING',
+        title="Average Rating by Review Length",
+        color='AVG_RATING',
+        color_continuous_scale='RdYlGn'
+    )
+
+@st.fragment
+def overview_tab(dashboard):
+    """Overview tab: rating distribution bar and donut charts"""
+    col1, col2 = st.columns(2)
+    rating_dist = dashboard['rating']
+
+    with col1:
+        st.subheader("📊 Rating Distribution")
+        st.plotly_chart(rating_bar_figure(rating_dist), use_container_width=True)
+
+    with col2:
+        st.subheader("🎯 Rating Breakdown")
+        st.plotly_chart(rating_donut_figure(rating_dist), use_container_width=True)
+
+@st.fragment
+def ai_insights_tab(session):
+    """AI Insights tab: on-demand AI_AGG summaries"""
+    st.subheader("🤖 AI-Powered Insights")
+
+    # Add a manual trigger for AI insights to avoid auto-loading
+    if st.button("🧠 Generate AI Insights", type="primary"):
+        with st.spinner("Generating insights..."):
+            insights = get_ai_insights(session)
+
+        if insights:
+            # Overall Summary
+            if 'overall' in insights and insights['overall']:
+                st.markdown("### 🎯 Overall Customer Sentiment")
+                st.write(insights['overall'])
+
+            col1, col2 = st.columns(2)
+
+            with col1:
+                if 'positive' in insights and insights['positive']:
+                    st.markdown("### ✅ Positive Feedback Analysis")
+                    st.write(insights['positive'])
+
+            with col2:
+                if 'negative' in insights and insights['negative']:
+                    st.markdown("### ❌ Areas for Improvement")
+                    st.write(insights['negative'])
+
+            # Delivery Insights
+            if 'delivery' in insights and insights['delivery']:
+                st.markdown("### 🚚 Delivery & Logistics Insights")
+                st.write(insights['delivery'])
+        else:
+            st.warning("No insights generated. Please try again.")
+    else:
+        st.info("👆 Click the button above to generate AI-powered insights from your review data.")
+
+@st.fragment
+def store_analysis_tab(dashboard):
+    """Store Analysis tab: top stores by review count and rating"""
+    st.subheader("📍 Store Location Analysis")
+
+    # Top stores by review count
+    store_stats = dashboard['stores']
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.plotly_chart(store_bar_figure(store_stats), use_container_width=True)
+
+    with col2:
+        st.plotly_chart(store_scatter_figure(store_stats), use_container_width=True)
+
+    # Note: AI store analysis can be added later via the AI Insights tab
+
+@st.fragment
+def trends_tab(dashboard):
+    """Trends tab: rating trends over time and review length analysis"""
+    st.subheader("📈 Trends & Patterns")
+
+    # Rating trends over time
+    temporal_data = dashboard['temporal']
+
+    if len(temporal_data) > 1:
+        st.plotly_chart(trend_figure(temporal_data), use_container_width=True)
+
+    # Word frequency analysis (simple)
+    st.markdown("### 📝 Review Length Analysis")
+
+    length_data = dashboard['lengths']
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.plotly_chart(length_pie_figure(length_data), use_container_width=True)
+
+    with col2:
+        st.plotly_chart(length_rating_figure(length_data), use_container_width=True)
+
 def main():
     # Header
     st.markdown('<h1 class="main-header">🏃‍♂️ Summit Sports Reviews Analytics</h1>', unsafe_allow_html=True)
@@ -175,7 +770,7 @@ def main():
     
     # Test session first
     try:
-        session = get_active_session()
+        session = _session()
         st.success("✅ Connected to Snowflake successfully!")
     except Exception as e:
         st.error(f"❌ Session error: {e}")
@@ -199,11 +794,12 @@ def main():
             if st.button("📤 Upload & Process Data", type="primary"):
                 with st.spinner("Processing your data..."):
                     try:
-                        df = pd.read_csv(uploaded_file)
+                        df = read_reviews_csv(uploaded_file)
                         st.info(f"📊 File loaded: {len(df)} reviews found")
                         
                         success, result = create_table_and_upload_data(session, df)
                         if success:
+                            clear_query_caches()
                             st.success(f"✅ Data uploaded successfully! {result} reviews loaded.")
                             st.info("📊 Dashboard will update automatically. Scroll down to see your analytics!")
                         else:
@@ -217,6 +813,7 @@ def main():
             with st.spinner("Refreshing data..."):
                 success, result = create_table_and_upload_data(session)
                 if success:
+                    clear_query_caches()
                     st.success(f"✅ Data refreshed successfully! {result} reviews loaded.")
                     st.info("📊 Dashboard updated! Check the analytics below.")
                 else:
@@ -234,10 +831,19 @@ def main():
         st.markdown("- 📍 **Store Analysis**: Location-based insights")
         st.markdown("- 📈 **Trends**: Rating and temporal analysis")
 
-    # Check if table exists and has data
+    # Check if table exists and has data; schema setup runs here, after the sidebar,
+    # so a failure still leaves the uploader available
     try:
-        test_query = "SELECT COUNT(*) as count FROM RAW_CUSTOMER.INTERSPORT_REVIEWS"
-        result = session.sql(test_query).collect()[0]['COUNT']
+        ensure_schema(session)
+        # Row count and version token from table metadata, so the check never scans the table
+        test_query = """
+        SELECT ROW_COUNT, TO_VARCHAR(LAST_ALTERED) || '-' || ROW_COUNT as VERSION
+        FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = 'RAW_CUSTOMER' AND TABLE_NAME = 'INTERSPORT_REVIEWS'
+        """
+        probe = session.sql(test_query).collect()
+        result = (probe[0]['ROW_COUNT'] or 0) if probe else 0
+        table_version = probe[0]['VERSION'] if probe else ""
         if result == 0:
             st.warning("⚠️ No data found. Please upload your CSV file using the file uploader in the sidebar.")
             st.info("📋 Once you upload data, this dashboard will display comprehensive analytics and AI insights.")
@@ -250,253 +856,45 @@ def main():
             st.code(str(e))
         return
 
-    # Get basic statistics
-    stats = get_basic_stats(session)
-    
-    # Key Metrics Row
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.markdown(f"""
-        <div class="metric-container">
-            <h3>{int(stats['TOTAL_REVIEWS'])}</h3>
-            <p>Total Reviews</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown(f"""
-        <div class="metric-container">
-            <h3>{stats['AVG_RATING']:.1f}/5</h3>
-            <p>Average Rating</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown(f"""
-        <div class="metric-container">
-            <h3>{int(stats['UNIQUE_STORES'])}</h3>
-            <p>Store Locations</p>
-        </div>
-        """, unsafe_allow_html=True)
+    # Get all dashboard aggregates in one query, after rebuilding summary tables left
+    # behind by a load from outside this app
+    try:
+        refresh_summary_tables(session, table_version)
+        dashboard = get_dashboard_data(session, table_version)
+    except Exception as e:
+        st.warning("⚠️ Dashboard summaries are not available yet. Use 'Refresh Existing Data' or upload a CSV to build them.")
+        with st.expander("🔍 Technical Details (for debugging)"):
+            st.code(str(e))
+        return
+    stats = dashboard['stats']
     
-    with col4:
-        st.markdown(f"""
-        <div class="metric-container">
-            <h3>{int(stats['UNIQUE_CUSTOMERS'])}</h3>
-            <p>Unique Customers</p>
-        </div>
-        """, unsafe_allow_html=True)
-
-    # Main content tabs
+    # Key Metrics Row, rendered as one flex container in a single markdown element
+    metrics = [
+        (int(stats['TOTAL_REVIEWS']), "Total Reviews"),
+        (f"{stats['AVG_RATING']:.1f}/5", "Average Rating"),
+        (int(stats['UNIQUE_STORES']), "Store Locations"),
+        (int(stats['UNIQUE_CUSTOMERS']), "Unique Customers"),
+    ]
+    metric_tiles = "".join(
+        f'<div class="metric-container" style="flex: 1;"><h3>{value}</h3><p>{label}</p></div>'
+        for value, label in metrics
+    )
+    st.markdown(f'<div style="display: flex; gap: 1rem;">{metric_tiles}</div>', unsafe_allow_html=True)
+
+    # Main content tabs; each tab is a fragment so its widgets only rerun that tab
     tab1, tab2, tab3, tab4 = st.tabs(["📊 Overview", "🤖 AI Insights", "📍 Store Analysis", "📈 Trends"])
     
     with tab1:
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.subheader("📊 Rating Distribution")
-            rating_dist = get_rating_distribution(session)
-            
-            fig_rating = px.bar(
-                rating_dist, 
-                x='RATING', 
-                y='COUNT',
-                title="Distribution of Customer Ratings",
-                color='COUNT',
-                color_continuous_scale='blues'
-            )
-            fig_rating.update_layout(
-                xaxis_title="Rating",
-                yaxis_title="Number of Reviews",
-                showlegend=False
-            )
-            st.plotly_chart(fig_rating, use_container_width=True)
-        
-        with col2:
-            st.subheader("🎯 Rating Breakdown")
-            
-            # Create a donut chart for ratings
-            rating_labels = [f"{row['RATING']} Stars" for _, row in rating_dist.iterrows()]
-            
-            fig_donut = go.Figure(data=[go.Pie(
-                labels=rating_labels,
-                values=rating_dist['COUNT'],
-                hole=.5,
-                marker_colors=['#ff4444', '#ff8800', '#ffcc00', '#88cc00', '#44aa44']
-            )])
-            
-            fig_donut.update_layout(
-                title="Rating Distribution (Donut Chart)",
-                annotations=[dict(text='Ratings', x=0.5, y=0.5, font_size=20, showarrow=False)]
-            )
-            st.plotly_chart(fig_donut, use_container_width=True)
+        overview_tab(dashboard)
 
     with tab2:
-        st.subheader("🤖 AI-Powered Insights")
-        
-        # Add a manual trigger for AI insights to avoid auto-loading
-        if st.button("🧠 Generate AI Insights", type="primary"):
-            with st.spinner("Generating insights..."):
-                insights = get_ai_insights(session)
-            
-            if insights:
-                # Overall Summary
-                if 'overall' in insights and insights['overall']:
-                    st.markdown("### 🎯 Overall Customer Sentiment")
-                    st.write(insights['overall'])
-                
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    if 'positive' in insights and insights['positive']:
-                        st.markdown("### ✅ Positive Feedback Analysis")
-                        st.write(insights['positive'])
-                
-                with col2:
-                    if 'negative' in insights and insights['negative']:
-                        st.markdown("### ❌ Areas for Improvement")
-                        st.write(insights['negative'])
-                
-                # Delivery Insights
-                if 'delivery' in insights and insights['delivery']:
-                    st.markdown("### 🚚 Delivery & Logistics Insights")
-                    st.write(insights['delivery'])
-            else:
-                st.warning("No insights generated. Please try again.")
-        else:
-            st.info("👆 Click the button above to generate AI-powered insights from your review data.")
+        ai_insights_tab(session)
 
     with tab3:
-        st.subheader("📍 Store Location Analysis")
-        
-        # Top stores by review count
-        store_stats_sql = """
-        SELECT 
-            CASE 
-                WHEN STORE_LOCATION IS NULL OR STORE_LOCATION = '' THEN 'Online Orders'
-                ELSE STORE_LOCATION 
-            END as store,
-            COUNT(*) as review_count,
-            AVG(RATING) as avg_rating
-        FROM RAW_CUSTOMER.INTERSPORT_REVIEWS
-        WHERE RATING IS NOT NULL
-        GROUP BY store
-        ORDER BY review_count DESC
-        LIMIT 10
-        """
-        
-        store_stats = session.sql(store_stats_sql).to_pandas()
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            fig_stores = px.bar(
-                store_stats.head(8),
-                x='REVIEW_COUNT',
-                y='STORE',
-                orientation='h',
-                title="Top Stores by Review Count",
-                color='AVG_RATING',
-                color_continuous_scale='RdYlGn'
-            )
-            fig_stores.update_layout(yaxis={'categoryorder':'total ascending'})
-            st.plotly_chart(fig_stores, use_container_width=True)
-        
-        with col2:
-            fig_rating_store = px.scatter(
-                store_stats,
-                x='REVIEW_COUNT',
-                y='AVG_RATING',
-                size='REVIEW_COUNT',
-                hover_data=['STORE'],
-                title="Store Performance: Reviews vs Rating",
-                color='AVG_RATING',
-                color_continuous_scale='RdYlGn'
-            )
-            st.plotly_chart(fig_rating_store, use_container_width=True)
-        
-        # Note: AI store analysis can be added later via the AI Insights tab
+        store_analysis_tab(dashboard)
 
     with tab4:
-        st.subheader("📈 Trends & Patterns")
-        
-        # Rating trends over time
-        temporal_sql = """
-        SELECT 
-            DATE,
-            AVG(RATING) as avg_rating,
-            COUNT(*) as review_count
-        FROM RAW_CUSTOMER.INTERSPORT_REVIEWS
-        WHERE RATING IS NOT NULL AND DATE IS NOT NULL
-        GROUP BY DATE
-        ORDER BY DATE
-        """
-        
-        temporal_data = session.sql(temporal_sql).to_pandas()
-        # Handle DD/MM/YYYY date format from CSV
-        temporal_data['DATE'] = pd.to_datetime(temporal_data['DATE'], format='%d/%m/%Y', errors='coerce')
-        
-        if len(temporal_data) > 1:
-            fig_temporal = make_subplots(specs=[[{"secondary_y": True}]])
-            
-            fig_temporal.add_trace(
-                go.Scatter(x=temporal_data['DATE'], y=temporal_data['AVG_RATING'], name="Average Rating"),
-                secondary_y=False,
-            )
-            
-            fig_temporal.add_trace(
-                go.Bar(x=temporal_data['DATE'], y=temporal_data['REVIEW_COUNT'], name="Review Count", opacity=0.6),
-                secondary_y=True,
-            )
-            
-            fig_temporal.update_xaxes(title_text="Date")
-            fig_temporal.update_yaxes(title_text="Average Rating", secondary_y=False)
-            fig_temporal.update_yaxes(title_text="Review Count", secondary_y=True)
-            fig_temporal.update_layout(title_text="Rating Trends Over Time")
-            
-            st.plotly_chart(fig_temporal, use_container_width=True)
-        
-        # Word frequency analysis (simple)
-        st.markdown("### 📝 Review Length Analysis")
-        
-        length_sql = """
-        SELECT 
-            CASE 
-                WHEN LENGTH(REVIEW_TEXT) < 50 THEN 'Short (< 50 chars)'
-                WHEN LENGTH(REVIEW_TEXT) < 150 THEN 'Medium (50-150 chars)'
-                ELSE 'Long (> 150 chars)'
-            END as review_length,
-            COUNT(*) as count,
-            AVG(RATING) as avg_rating
-        FROM RAW_CUSTOMER.INTERSPORT_REVIEWS
-        WHERE REVIEW_TEXT IS NOT NULL AND REVIEW_TEXT != ''
-        GROUP BY review_length
-        """
-        
-        length_data = session.sql(length_sql).to_pandas()
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            fig_length = px.pie(
-                length_data,
-                values='COUNT',
-                names='REVIEW_LENGTH',
-                title="Review Length Distribution"
-            )
-            st.plotly_chart(fig_length, use_container_width=True)
-        
-        with col2:
-            fig_length_rating = px.bar(
-                length_data,
-                x='REVIEW_LENGTH',
-                y='AVG_RATING',
-                title="Average Rating by Review Length",
-                color='AVG_RATING',
-                color_continuous_scale='RdYlGn'
-            )
-            st.plotly_chart(fig_length_rating, use_container_width=True)
+        trends_tab(dashboard)
 
     # Footer
     st.markdown("---")
@@ -1,11 +1,12 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import snowflake.connector
 from snowflake.snowpark import Session
 from snowflake.snowpark.context import get_active_session
+from snowflake.snowpark.exceptions import SnowparkSQLException
 import json
 
 # Configuration de la page
@@ -17,7 +18,7 @@ st.set_page_config(
 )
 
 # CSS personnalisé pour un meilleur style
-st.markdown("""
+_CSS = """
 <style>
     .main-header {
         font-size: 3rem;
@@ -57,10 +58,71 @@ st.markdown("""
         padding-right: 20px;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+st.markdown(_CSS, unsafe_allow_html=True)
 
 # Supprimer la fonction wrapper - utiliser get_active_session directement
 
+# Durée de vie (secondes) des agrégats mis en cache ; le jeton de version
+# de la table les invalide dès que les données sont rechargées
+QUERY_CACHE_TTL = 600
+
+# Chargement write_pandas : gros fichiers Parquet compressés en snappy,
+# PUT parallèles, et types logiques (dates) conservés
+WRITE_PANDAS_OPTIONS = {
+    "chunk_size": 100_000,
+    "compression": "snappy",
+    "parallel": 8,
+    "use_logical_type": True,
+}
+
+# Types étroits (Arrow) appliqués avant l'envoi
+REVIEW_UPLOAD_DTYPES = {
+    'CUSTOMER_NAME': 'string[pyarrow]',
+    'RATING': 'Int16',
+    'REVIEW_TEXT': 'string[pyarrow]',
+    'STORE_LOCATION': 'string[pyarrow]',
+}
+
+@st.cache_resource(show_spinner=False)
+def warm_session(_session):
+    """Étiqueter la session et réveiller le warehouse, une seule fois par processus"""
+    _session.sql("ALTER SESSION SET QUERY_TAG = 'summit_sports_ui', USE_CACHED_RESULT = TRUE").collect()
+    # Sans attendre le résultat : la reprise du warehouse se fait pendant le rendu de la barre latérale
+    _session.sql("SELECT 1").collect_nowait()
+
+def get_table_version(session):
+    """Jeton de version de la table, lu dans les métadonnées (sans warehouse)"""
+    version_sql = """
+    SELECT TO_VARCHAR(LAST_ALTERED) || '-' || ROW_COUNT as version
+    FROM INFORMATION_SCHEMA.TABLES
+    WHERE TABLE_SCHEMA = 'RAW_CUSTOMER' AND TABLE_NAME = 'INTERSPORT_REVIEWS'
+    """
+    rows = session.sql(version_sql).collect()
+    return rows[0]['VERSION'] if rows else ""
+
+# Colonnes attendues dans le CSV d'avis
+_REQUIRED_COLS = ('CUSTOMER_NAME', 'RATING', 'REVIEW_TEXT', 'DATE', 'STORE_LOCATION')
+
+# Types imposés au parseur CSV : note sur 16 bits, date gardée en texte
+# (le CSV mélange deux formats, analysés ensuite dans create_table_and_upload_data)
+REVIEW_CSV_TYPES = {'RATING': pa.int16(), 'DATE': pa.string()}
+
+def read_reviews_csv(source):
+    """Lire un CSV d'avis en une passe avec le parseur multithread de pyarrow"""
+    # Les en-têtes peuvent être en minuscules ou en majuscules
+    column_types = {}
+    for name, arrow_type in REVIEW_CSV_TYPES.items():
+        column_types[name] = column_types[name.lower()] = arrow_type
+    table = pacsv.read_csv(
+        source,
+        # Certains avis tiennent sur plusieurs lignes entre guillemets
+        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(column_types=column_types, strings_can_be_null=True)
+    )
+    table = table.rename_columns([name.upper() for name in table.column_names])
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
 def create_table_and_upload_data(session, df=None):
     """Créer une table et télécharger les données CSV"""
     try:
@@ -70,22 +132,40 @@ def create_table_and_upload_data(session, df=None):
         # Créer le schéma s'il n'existe pas (utiliser la base de données actuelle)
         session.sql("CREATE SCHEMA IF NOT EXISTS RAW_CUSTOMER").collect()
         
-        # Créer la table avec un nom complètement qualifié
+        # Table partagée avec l'application anglaise : elle est créée dans sa structure
+        # (DATE en DATE, REVIEW_LEN) et jamais recréée, pour ne pas invalider ses vues
         create_table_sql = """
-        CREATE OR REPLACE TABLE RAW_CUSTOMER.INTERSPORT_REVIEWS (
+        CREATE TABLE IF NOT EXISTS RAW_CUSTOMER.INTERSPORT_REVIEWS (
             CUSTOMER_NAME STRING,
             RATING INTEGER,
             REVIEW_TEXT STRING,
-            DATE STRING,
-            STORE_LOCATION STRING
+            DATE DATE,
+            STORE_LOCATION STRING,
+            REVIEW_LEN INTEGER
         )
         """
         session.sql(create_table_sql).collect()
         
+        # Une table héritée (DATE en texte, sans REVIEW_LEN) est migrée par l'application
+        # anglaise ; y charger des dates analysées les stockerait en texte
+        columns = {
+            row['COLUMN_NAME']: row['DATA_TYPE']
+            for row in session.sql("""
+            SELECT COLUMN_NAME, DATA_TYPE
+            FROM INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_SCHEMA = 'RAW_CUSTOMER' AND TABLE_NAME = 'INTERSPORT_REVIEWS'
+            """).collect()
+        }
+        if columns.get('DATE') != 'DATE' or 'REVIEW_LEN' not in columns:
+            return False, (
+                "La table INTERSPORT_REVIEWS a encore l'ancienne structure (DATE en texte, sans REVIEW_LEN). "
+                "Ouvrez une fois l'application anglaise pour la migrer, puis relancez le chargement."
+            )
+        
         # Utiliser le DataFrame fourni ou essayer de lire depuis un fichier
         if df is None:
             try:
-                df = pd.read_csv('summit_sport_reviews.csv')
+                df = read_reviews_csv('summit_sport_reviews.csv')
             except FileNotFoundError:
                 return False, "Fichier CSV introuvable. Veuillez télécharger un fichier en utilisant l'outil de téléchargement."
         
@@ -97,123 +177,310 @@ def create_table_and_upload_data(session, df=None):
         df.columns = df.columns.str.upper()
         
         # Valider les colonnes requises
-        required_cols = ['CUSTOMER_NAME', 'RATING', 'REVIEW_TEXT', 'DATE', 'STORE_LOCATION']
-        missing_cols = [col for col in required_cols if col not in df.columns]
+        present_cols = frozenset(df.columns)
+        missing_cols = [col for col in _REQUIRED_COLS if col not in present_cols]
         if missing_cols:
             return False, f"Colonnes requises manquantes : {missing_cols}"
         
-        # Écrire vers Snowflake avec le schéma spécifié
-        session.write_pandas(df, 'INTERSPORT_REVIEWS', schema='RAW_CUSTOMER', overwrite=True)
+        # Analyser les dates une seule fois au chargement : la table stocke un vrai type DATE.
+        # Le CSV mélange JJ/MM/AAAA et ISO, d'où le repli ISO quand le premier format échoue
+        review_dates = pd.to_datetime(df['DATE'], format='%d/%m/%Y', errors='coerce')
+        review_dates = review_dates.fillna(pd.to_datetime(df['DATE'], format='ISO8601', errors='coerce'))
         
+        # Écrire vers Snowflake avec le schéma spécifié (table déjà créée ci-dessus) ;
+        # overwrite vide la table existante sans la remplacer
+        df = df.astype(REVIEW_UPLOAD_DTYPES).assign(
+            DATE=review_dates.dt.date,
+            REVIEW_LEN=df['REVIEW_TEXT'].str.len().astype('Int32'),
+        )
+        session.write_pandas(
+            df, 'INTERSPORT_REVIEWS', schema='RAW_CUSTOMER',
+            overwrite=True, auto_create_table=False, **WRITE_PANDAS_OPTIONS
+        )
+
+        # Les agrégats en cache décrivent l'ancienne table
+        st.cache_data.clear()
+
         return True, len(df)
     except Exception as e:
         import traceback
         error_details = f"Erreur : {str(e)}\nDétails : {traceback.format_exc()}"
         return False, error_details
 
-def get_basic_stats(session):
-    """Obtenir les statistiques de base des données"""
-    stats_sql = """
+# Longueur de texte transférée pour les cartes d'aperçu (tronquée côté Snowflake)
+PREVIEW_TEXT_CHARS = 150
+# Longueur des extraits de l'aperçu par note
+RATING_SNIPPET_CHARS = 100
+
+# Au-delà de cette durée (jours), l'évolution des notes est agrégée par mois
+TREND_DAILY_MAX_DAYS = 150
+
+# Requêtes d'agrégats indépendantes, soumises en parallèle par get_dashboard_data
+DASHBOARD_QUERIES = {
+    # Statistiques, distribution des notes et des longueurs en un seul passage
+    "summary": """
+    WITH base AS (
+        SELECT 
+            RATING,
+            LENGTH(REVIEW_TEXT) as text_length,
+            DATE,
+            STORE_LOCATION,
+            CUSTOMER_NAME
+        FROM RAW_CUSTOMER.INTERSPORT_REVIEWS
+        WHERE RATING IS NOT NULL
+    ),
+    ratings AS (
+        SELECT RATING, COUNT(*) as cnt
+        FROM base
+        GROUP BY RATING
+    ),
+    lengths AS (
+        SELECT 
+            CASE 
+                WHEN text_length < 50 THEN 'Court (< 50 caractères)'
+                WHEN text_length < 150 THEN 'Moyen (50-150 caractères)'
+                ELSE 'Long (> 150 caractères)'
+            END as bucket,
+            COUNT(*) as cnt,
+            AVG(RATING) as avg_rating
+        FROM base
+        WHERE text_length > 0
+        GROUP BY bucket
+    )
     SELECT 
         COUNT(*) as total_reviews,
-        AVG(RATING) as avg_rating,
+        AVG(RATING)::FLOAT as avg_rating,
         COUNT(DISTINCT STORE_LOCATION) as unique_stores,
         COUNT(DISTINCT CUSTOMER_NAME) as unique_customers,
         MIN(DATE) as earliest_review,
-        MAX(DATE) as latest_review
+        MAX(DATE) as latest_review,
+        (SELECT OBJECT_AGG(RATING::STRING, cnt) FROM ratings) as rating_counts,
+        (SELECT OBJECT_AGG(bucket, OBJECT_CONSTRUCT('count', cnt, 'avg_rating', avg_rating)) FROM lengths) as length_buckets
+    FROM base
+    """,
+    "stores": """
+    SELECT 
+        CASE 
+            WHEN STORE_LOCATION IS NULL OR STORE_LOCATION = '' THEN 'Commandes en Ligne'
+            ELSE STORE_LOCATION 
+        END as store,
+        COUNT(*) as review_count,
+        AVG(RATING)::FLOAT as avg_rating
     FROM RAW_CUSTOMER.INTERSPORT_REVIEWS
     WHERE RATING IS NOT NULL
-    """
-    return session.sql(stats_sql).to_pandas().iloc[0]
+    GROUP BY store
+    ORDER BY review_count DESC
+    LIMIT 10
+    """,
+    # Points journaliers sur un historique court, mensuels au-delà
+    "temporal": f"""
+    WITH bounds AS (
+        SELECT DATEDIFF('day', MIN(DATE), MAX(DATE)) > {TREND_DAILY_MAX_DAYS} as monthly
+        FROM RAW_CUSTOMER.INTERSPORT_REVIEWS
+        WHERE RATING IS NOT NULL AND DATE IS NOT NULL
+    )
+    SELECT 
+        IFF(bounds.monthly, DATE_TRUNC('month', DATE), DATE) as period,
+        AVG(RATING)::FLOAT as avg_rating,
+        COUNT(*) as review_count
+    FROM RAW_CUSTOMER.INTERSPORT_REVIEWS, bounds
+    WHERE RATING IS NOT NULL AND DATE IS NOT NULL
+    GROUP BY period
+    ORDER BY period
+    """,
+}
+
+# Colonnes des résultats renvoyés en listes (dict colonne -> valeurs)
+DASHBOARD_COLUMNS = {
+    'stores': ('STORE', 'REVIEW_COUNT', 'AVG_RATING'),
+    'temporal': ('PERIOD', 'AVG_RATING', 'REVIEW_COUNT'),
+}
+
+def _parse_object(value):
+    """Convertir une colonne OBJECT Snowflake (JSON texte, NULL si vide) en dict"""
+    return json.loads(value) if isinstance(value, str) else {}
 
-def get_rating_distribution(session):
-    """Obtenir la distribution des notes"""
-    rating_sql = """
+@st.cache_data(ttl=QUERY_CACHE_TTL, show_spinner=False)
+def get_dashboard_data(table_version):
+    """Exécuter tous les agrégats du tableau de bord en parallèle"""
+    session = get_active_session()
+    # Tous les jobs partent avant la première attente : durée = requête la plus lente
+    jobs = {name: session.sql(query).collect_nowait() for name, query in DASHBOARD_QUERIES.items()}
+    # Lignes brutes : les graphiques consomment des listes, pas besoin de pandas
+    rows = {name: job.result() for name, job in jobs.items()}
+    data = {
+        name: {column: [row[column] for row in rows[name]] for column in columns}
+        for name, columns in DASHBOARD_COLUMNS.items()
+    }
+    
+    # Déplier les objets OBJECT_AGG en colonnes pour les graphiques
+    stats = rows['summary'][0].as_dict()
+    rating_counts = sorted((int(rating), count) for rating, count in _parse_object(stats.pop('RATING_COUNTS')).items())
+    data['rating'] = {
+        'RATING': [rating for rating, _ in rating_counts],
+        'COUNT': [count for _, count in rating_counts],
+    }
+    length_buckets = _parse_object(stats.pop('LENGTH_BUCKETS'))
+    data['lengths'] = {
+        'REVIEW_LENGTH': list(length_buckets),
+        'COUNT': [values['count'] for values in length_buckets.values()],
+        'AVG_RATING': [values['avg_rating'] for values in length_buckets.values()],
+    }
+    data['stats'] = stats
+    return data
+
+# Texte SQL identique quels que soient les filtres (valeurs liées, NULL = pas de filtre) :
+# Snowflake réutilise le plan compilé d'un appel à l'autre
+SAMPLE_REVIEWS_SQL = f"""
+SELECT * FROM (
     SELECT 
+        CUSTOMER_NAME,
         RATING,
-        COUNT(*) as count
+        SUBSTR(REVIEW_TEXT, 1, {PREVIEW_TEXT_CHARS}) as REVIEW_TEXT,
+        LENGTH(REVIEW_TEXT) > {PREVIEW_TEXT_CHARS} as IS_TRUNCATED,
+        DATE,
+        STORE_LOCATION
     FROM RAW_CUSTOMER.INTERSPORT_REVIEWS
-    WHERE RATING IS NOT NULL
-    GROUP BY RATING
-    ORDER BY RATING
-    """
-    return session.sql(rating_sql).to_pandas()
+    WHERE REVIEW_TEXT IS NOT NULL AND REVIEW_TEXT != ''
+        AND (?::INT IS NULL OR RATING = ?::INT)
+        AND (?::STRING IS NULL OR STORE_LOCATION = ?::STRING)
+        AND (?::INT IS NULL OR LENGTH(REVIEW_TEXT) < ?::INT)
+        AND (?::INT IS NULL OR LENGTH(REVIEW_TEXT) > ?::INT)
+) SAMPLE ({{limit}} ROWS)
+"""
 
-def get_sample_reviews(session, rating_filter=None, store_filter=None, limit=5):
-    """Obtenir un échantillon d'avis avec filtres optionnels"""
-    where_conditions = ["REVIEW_TEXT IS NOT NULL", "REVIEW_TEXT != ''"]
-    
-    if rating_filter:
-        where_conditions.append(f"RATING = {rating_filter}")
-    if store_filter and store_filter != "Tous":
-        where_conditions.append(f"STORE_LOCATION = '{store_filter}'")
-    
-    where_clause = " AND ".join(where_conditions)
+def get_sample_reviews(session, rating_filter=None, store_filter=None, limit=5, shorter_than=None, longer_than=None, block=True):
+    """Obtenir un échantillon d'avis avec filtres optionnels (block=False renvoie un job asynchrone)"""
+    if store_filter == "Tous":
+        store_filter = None
+    params = []
+    for value in (rating_filter, store_filter, shorter_than, longer_than):
+        params += [value, value]
     
+    # Projection et troncature côté Snowflake : seules les colonnes affichées
+    # et les premiers caractères du texte sont transférés
+    return session.sql(SAMPLE_REVIEWS_SQL.format(limit=int(limit)), params=params).to_pandas(block=block)
+
+def get_samples_per_rating(session, ratings, per_rating=1, text_chars=PREVIEW_TEXT_CHARS, block=True):
+    """Obtenir un échantillon aléatoire d'avis pour chaque note, en une seule requête"""
+    rating_list = ", ".join(str(int(rating)) for rating in ratings)
+    text_chars = int(text_chars)
     sample_sql = f"""
     SELECT 
         CUSTOMER_NAME,
         RATING,
-        REVIEW_TEXT,
+        SUBSTR(REVIEW_TEXT, 1, {text_chars}) as REVIEW_TEXT,
+        LENGTH(REVIEW_TEXT) > {text_chars} as IS_TRUNCATED,
         DATE,
-        STORE_LOCATION,
-        LENGTH(REVIEW_TEXT) as review_length
+        STORE_LOCATION
     FROM RAW_CUSTOMER.INTERSPORT_REVIEWS
-    WHERE {where_clause}
-    ORDER BY RANDOM()
-    LIMIT {limit}
+    WHERE REVIEW_TEXT IS NOT NULL AND REVIEW_TEXT != '' AND RATING IN ({rating_list})
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY RATING ORDER BY RANDOM()) <= {int(per_rating)}
     """
     
-    return session.sql(sample_sql).to_pandas()
+    return session.sql(sample_sql).to_pandas(block=block)
 
-def display_review_preview(review_row, show_full=False):
-    """Afficher un aperçu stylé d'un avis"""
-    rating_stars = "⭐" * int(review_row['RATING']) + "☆" * (5 - int(review_row['RATING']))
-    
-    # Tronquer le texte si nécessaire
-    review_text = review_row['REVIEW_TEXT']
-    if not show_full and len(review_text) > 150:
-        review_text = review_text[:150] + "..."
-    
-    store_name = review_row['STORE_LOCATION'] if review_row['STORE_LOCATION'] else "Commande en ligne"
-    
-    st.markdown(f"""
+# Étoiles pré-calculées pour chaque note (0 à 5)
+_STARS = tuple("⭐" * i + "☆" * (5 - i) for i in range(6))
+
+# Gabarit HTML d'une carte d'avis, rempli avec str.format_map
+_CARD_TMPL = """
     <div style="border: 1px solid #e0e0e0; border-radius: 8px; padding: 15px; margin: 10px 0; background: #f9f9f9;">
         <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 10px;">
-            <strong>👤 {review_row['CUSTOMER_NAME']}</strong>
-            <span style="font-size: 18px;">{rating_stars}</span>
+            <strong>👤 {name}</strong>
+            <span style="font-size: 18px;" title="{rating}/5" aria-label="{rating}/5">{stars}</span>
         </div>
-        <p style="margin: 10px 0; line-height: 1.4;">{review_text}</p>
+        <p style="margin: 10px 0; line-height: 1.4;">{text}</p>
         <div style="display: flex; justify-content: space-between; font-size: 12px; color: #666;">
-            <span>📍 {store_name}</span>
-            <span>📅 {review_row['DATE']}</span>
+            <span>📍 {store}</span>
+            <span>📅 {date}</span>
         </div>
     </div>
-    """, unsafe_allow_html=True)
+    """
 
-def get_ai_insights(session):
-    """Générer des insights IA en utilisant la fonction AI_AGG - version simplifiée"""
-    insights = {}
+def display_review_preview(review_row):
+    """Afficher un aperçu stylé d'un avis"""
+    # Le texte arrive déjà tronqué par la requête
+    review_text = review_row['REVIEW_TEXT']
+    if review_row['IS_TRUNCATED']:
+        review_text += "..."
     
-    # Définir le prompt séparément pour éviter les problèmes d'échappement
-    ai_prompt = "Vous faites du social listening et conseil strategique pour Intersport. Fournissez un resume du sentiment client d'apres des avis recueillis. Soulignez des points forts et axes d'amelioration et puis 3-5 highlights strategiques"
+    rating = int(review_row['RATING'])
+    st.markdown(_CARD_TMPL.format_map({
+        'name': review_row['CUSTOMER_NAME'],
+        'rating': rating,
+        'stars': _STARS[rating],
+        'text': review_text,
+        'store': review_row['STORE_LOCATION'] if review_row['STORE_LOCATION'] else "Commande en ligne",
+        'date': review_row['DATE'],
+    }), unsafe_allow_html=True)
+
+# Prompt défini séparément pour éviter les problèmes d'échappement
+_AI_PROMPT = "Vous faites du social listening et conseil strategique pour Intersport. Fournissez un resume du sentiment client d'apres des avis recueillis. Soulignez des points forts et axes d'amelioration et puis 3-5 highlights strategiques"
+
+# Résultats AI_AGG persistés, partagés entre sessions et indexés par empreinte des avis
+AI_INSIGHTS_CACHE_TABLE = 'RAW_CUSTOMER.AI_INSIGHTS_CACHE'
+AI_INSIGHTS_CACHE_TTL = 3600
+
+@st.cache_data(ttl=AI_INSIGHTS_CACHE_TTL, show_spinner=False)
+def summarize_reviews(table_version):
+    """Résumé AI_AGG des avis, réutilisé tant que les avis analysés sont inchangés"""
+    session = get_active_session()
+    session.sql(f"""
+    CREATE TABLE IF NOT EXISTS {AI_INSIGHTS_CACHE_TABLE} (
+        INPUT_HASH STRING,
+        PROMPT STRING,
+        RESULT STRING,
+        CREATED_AT TIMESTAMP_NTZ
+    )
+    """).collect()
+    
+    # Empreinte peu coûteuse des lignes lues par AI_AGG
+    hash_query = """
+    SELECT TO_VARCHAR(HASH_AGG(REVIEW_TEXT)) as input_hash
+    FROM RAW_CUSTOMER.INTERSPORT_REVIEWS
+    WHERE REVIEW_TEXT IS NOT NULL AND REVIEW_TEXT != ''
+    """
+    input_hash = session.sql(hash_query).collect()[0]['INPUT_HASH']
+    
+    cached = session.sql(f"""
+    SELECT RESULT FROM {AI_INSIGHTS_CACHE_TABLE}
+    WHERE INPUT_HASH = ? AND PROMPT = ?
+    ORDER BY CREATED_AT DESC
+    LIMIT 1
+    """, params=[input_hash, _AI_PROMPT]).collect()
+    if cached:
+        return cached[0]['RESULT']
     
     # Construire la requête avec le prompt
     simple_query = f"""
     SELECT AI_AGG(
         REVIEW_TEXT, 
-        $${ai_prompt}$$
+        $${_AI_PROMPT}$$
     ) as summary
     FROM RAW_CUSTOMER.INTERSPORT_REVIEWS
     WHERE REVIEW_TEXT IS NOT NULL AND REVIEW_TEXT != ''
-    LIMIT 100
     """
+    result = session.sql(simple_query).collect()
+    if not result or result[0]['SUMMARY'] is None:
+        return None
+    
+    summary = result[0]['SUMMARY']
+    session.sql(
+        f"INSERT INTO {AI_INSIGHTS_CACHE_TABLE} (INPUT_HASH, PROMPT, RESULT, CREATED_AT) SELECT ?, ?, ?, CURRENT_TIMESTAMP()",
+        params=[input_hash, _AI_PROMPT, summary]
+    ).collect()
+    return summary
+
+def get_ai_insights(table_version):
+    """Générer des insights IA en utilisant la fonction AI_AGG - version simplifiée"""
+    insights = {}
     
     try:
         st.info("🔄 Exécution de l'analyse IA...")
-        result = session.sql(simple_query).collect()
-        if result and len(result) > 0:
-            insights['overall'] = result[0]['SUMMARY']
+        summary = summarize_reviews(table_version)
+        if summary:
+            insights['overall'] = summary
             st.success("✅ Analyse IA terminée !")
         else:
             insights['overall'] = "Aucun résultat d'analyse retourné."
@@ -223,6 +490,125 @@ def get_ai_insights(session):
     
     return insights
 
+# Figures construites directement avec plotly.graph_objects (sans le passage
+# DataFrame -> traces de plotly.express) et mises en cache sous forme de dict,
+# que st.plotly_chart accepte tel quel
+@st.cache_data(show_spinner=False)
+def rating_bar_figure(rating_dist):
+    """Histogramme de la distribution des notes"""
+    fig_rating = go.Figure([go.Bar(
+        x=rating_dist['RATING'],
+        y=rating_dist['COUNT'],
+        marker=dict(color=rating_dist['COUNT'], colorscale='Blues', showscale=True)
+    )])
+    fig_rating.update_layout(
+        title="Distribution des Notes Clients",
+        xaxis_title="Note",
+        yaxis_title="Nombre d'Avis",
+        showlegend=False
+    )
+    return fig_rating.to_dict()
+
+@st.cache_data(show_spinner=False)
+def rating_donut_figure(rating_dist):
+    """Graphique en anneau de la distribution des notes"""
+    fig_donut = go.Figure(data=[go.Pie(
+        labels=[f"{rating} Étoiles" for rating in rating_dist['RATING']],
+        values=rating_dist['COUNT'],
+        hole=.5,
+        marker_colors=['#ff4444', '#ff8800', '#ffcc00', '#88cc00', '#44aa44']
+    )])
+    
+    fig_donut.update_layout(
+        title="Distribution des Notes (Graphique en Anneau)",
+        annotations=[dict(text='Notes', x=0.5, y=0.5, font_size=20, showarrow=False)]
+    )
+    return fig_donut.to_dict()
+
+@st.cache_data(show_spinner=False)
+def store_bar_figure(store_stats):
+    """Barres horizontales du top des magasins par nombre d'avis"""
+    fig_stores = go.Figure([go.Bar(
+        x=store_stats['REVIEW_COUNT'][:8],
+        y=store_stats['STORE'][:8],
+        orientation='h',
+        marker=dict(color=store_stats['AVG_RATING'][:8], colorscale='RdYlGn', showscale=True)
+    )])
+    fig_stores.update_layout(
+        title="Top des Magasins par Nombre d'Avis",
+        xaxis_title="REVIEW_COUNT",
+        yaxis={'categoryorder': 'total ascending', 'title': "STORE"}
+    )
+    return fig_stores.to_dict()
+
+@st.cache_data(show_spinner=False)
+def store_scatter_figure(store_stats):
+    """Nuage nombre d'avis / note moyenne par magasin"""
+    review_counts = store_stats['REVIEW_COUNT']
+    fig_rating_store = go.Figure([go.Scatter(
+        x=review_counts,
+        y=store_stats['AVG_RATING'],
+        mode='markers',
+        text=store_stats['STORE'],
+        hovertemplate="%{text}<br>Avis : %{x}<br>Note : %{y:.2f}<extra></extra>",
+        marker=dict(
+            size=review_counts,
+            sizemode='area',
+            # Même échelle que plotly.express (diamètre max de 20 px)
+            sizeref=2 * max(review_counts, default=1) / 20 ** 2,
+            color=store_stats['AVG_RATING'],
+            colorscale='RdYlGn',
+            showscale=True
+        )
+    )])
+    fig_rating_store.update_layout(
+        title="Performance des Magasins : Avis vs Note",
+        xaxis_title="REVIEW_COUNT",
+        yaxis_title="AVG_RATING"
+    )
+    return fig_rating_store.to_dict()
+
+@st.cache_data(show_spinner=False)
+def trend_figure(temporal_data):
+    """Note moyenne (ligne) et nombre d'avis (barres, axe secondaire) dans le temps"""
+    periods = temporal_data['PERIOD']
+    fig_temporal = go.Figure([
+        go.Scatter(x=periods, y=temporal_data['AVG_RATING'], name="Note Moyenne"),
+        go.Bar(x=periods, y=temporal_data['REVIEW_COUNT'], name="Nombre d'Avis", opacity=0.6, yaxis='y2'),
+    ])
+    fig_temporal.update_layout(
+        title_text="Tendances des Notes dans le Temps",
+        xaxis_title="Date",
+        yaxis=dict(title="Note Moyenne"),
+        yaxis2=dict(title="Nombre d'Avis", overlaying='y', side='right')
+    )
+    return fig_temporal.to_dict()
+
+@st.cache_data(show_spinner=False)
+def length_pie_figure(length_data):
+    """Camembert des tranches de longueur d'avis"""
+    fig_length = go.Figure([go.Pie(
+        labels=length_data['REVIEW_LENGTH'],
+        values=length_data['COUNT']
+    )])
+    fig_length.update_layout(title="Distribution de la Longueur des Avis")
+    return fig_length.to_dict()
+
+@st.cache_data(show_spinner=False)
+def length_rating_figure(length_data):
+    """Note moyenne par tranche de longueur d'avis"""
+    fig_length_rating = go.Figure([go.Bar(
+        x=length_data['REVIEW_LENGTH'],
+        y=length_data['AVG_RATING'],
+        marker=dict(color=length_data['AVG_RATING'], colorscale='RdYlGn', showscale=True)
+    )])
+    fig_length_rating.update_layout(
+        title="Note Moyenne par Longueur d'Avis",
+        xaxis_title="REVIEW_LENGTH",
+        yaxis_title="AVG_RATING"
+    )
+    return fig_length_rating.to_dict()
+
 def main():
     # En-tête
     st.markdown('<h1 class="main-header">🏃‍♂️ Analytics des Avis Summit Sports</h1>', unsafe_allow_html=True)
@@ -231,6 +617,7 @@ def main():
     # Tester la session en premier
     try:
         session = get_active_session()
+        warm_session(session)
         st.success("✅ Connecté à Snowflake avec succès !")
     except Exception as e:
         st.error(f"❌ Erreur de session : {e}")
@@ -254,7 +641,7 @@ def main():
             if st.button("📤 Télécharger et Traiter les Données", type="primary"):
                 with st.spinner("Traitement de vos données..."):
                     try:
-                        df = pd.read_csv(uploaded_file)
+                        df = read_reviews_csv(uploaded_file)
                         st.info(f"📊 Fichier chargé : {len(df)} avis trouvés")
                         
                         success, result = create_table_and_upload_data(session, df)
@@ -287,24 +674,33 @@ def main():
         st.markdown("- 📊 **Vue d'ensemble & Insights** : Métriques clés, graphiques et analyse IA")
         st.markdown("- 📈 **Analyse & Tendances** : Insights magasins et analyse temporelle")
 
-    # Vérifier si la table existe et contient des données
+    # Jeton de version : clé de cache de tous les agrégats ci-dessous
+    table_version = get_table_version(session)
+
+    # Obtenir tous les agrégats (un seul aller-retour parallèle, mis en cache) ;
+    # ils servent aussi de test d'existence de la table et de présence de données
     try:
-        test_query = "SELECT COUNT(*) as count FROM RAW_CUSTOMER.INTERSPORT_REVIEWS"
-        result = session.sql(test_query).collect()[0]['COUNT']
-        if result == 0:
-            st.warning("⚠️ Aucune donnée trouvée. Veuillez télécharger votre fichier CSV en utilisant l'outil de téléchargement dans la barre latérale.")
-            st.info("📋 Une fois que vous téléchargez les données, ce tableau de bord affichera des analytics complets et des insights IA.")
-            return
-    except Exception as e:
+        dashboard_data = get_dashboard_data(table_version)
+    except (SnowparkSQLException, snowflake.connector.errors.ProgrammingError) as e:
         st.warning("⚠️ Table non trouvée. Veuillez télécharger votre fichier CSV en utilisant l'outil de téléchargement dans la barre latérale.")
         st.info("📋 Cela créera les tables nécessaires et chargera vos données d'avis pour l'analyse.")
         # Ne pas afficher l'erreur complète en production, mais la journaliser
         with st.expander("🔍 Détails Techniques (pour le débogage)"):
             st.code(str(e))
         return
-
-    # Obtenir les statistiques de base
-    stats = get_basic_stats(session)
+    
+    stats = dashboard_data['stats']
+    if stats['TOTAL_REVIEWS'] == 0:
+        st.warning("⚠️ Aucune donnée trouvée. Veuillez télécharger votre fichier CSV en utilisant l'outil de téléchargement dans la barre latérale.")
+        st.info("📋 Une fois que vous téléchargez les données, ce tableau de bord affichera des analytics complets et des insights IA.")
+        return
+    
+    # Échantillons d'aperçu lancés sans attendre : ils s'exécutent pendant le rendu
+    # des métriques et sont récupérés dans les sections qui les affichent
+    preview_jobs = {
+        'recent': get_sample_reviews(session, limit=3, block=False),
+        'per_rating': get_samples_per_rating(session, [5, 4, 3, 2, 1], text_chars=RATING_SNIPPET_CHARS, block=False),
+    }
     
     # Ligne des métriques clés
     col1, col2, col3, col4 = st.columns(4)
@@ -353,7 +749,7 @@ def main():
             st.rerun()
     
     try:
-        recent_reviews = get_sample_reviews(session, limit=3)
+        recent_reviews = preview_jobs['recent'].result()
         if not recent_reviews.empty:
             cols = st.columns(3)
             for idx, (_, review) in enumerate(recent_reviews.iterrows()):
@@ -375,55 +771,33 @@ def main():
         
         with col1:
             st.markdown("#### 📊 Distribution des Notes")
-            rating_dist = get_rating_distribution(session)
+            rating_dist = dashboard_data['rating']
             
-            fig_rating = px.bar(
-                rating_dist, 
-                x='RATING', 
-                y='COUNT',
-                title="Distribution des Notes Clients",
-                color='COUNT',
-                color_continuous_scale='blues'
-            )
-            fig_rating.update_layout(
-                xaxis_title="Note",
-                yaxis_title="Nombre d'Avis",
-                showlegend=False
-            )
-            st.plotly_chart(fig_rating, use_container_width=True)
+            st.plotly_chart(rating_bar_figure(rating_dist), use_container_width=True)
         
         with col2:
             st.markdown("#### 🎯 Répartition des Notes")
             
-            # Créer un graphique en anneau pour les notes
-            rating_labels = [f"{row['RATING']} Étoiles" for _, row in rating_dist.iterrows()]
-            
-            fig_donut = go.Figure(data=[go.Pie(
-                labels=rating_labels,
-                values=rating_dist['COUNT'],
-                hole=.5,
-                marker_colors=['#ff4444', '#ff8800', '#ffcc00', '#88cc00', '#44aa44']
-            )])
-            
-            fig_donut.update_layout(
-                title="Distribution des Notes (Graphique en Anneau)",
-                annotations=[dict(text='Notes', x=0.5, y=0.5, font_size=20, showarrow=False)]
-            )
-            st.plotly_chart(fig_donut, use_container_width=True)
+            st.plotly_chart(rating_donut_figure(rating_dist), use_container_width=True)
 
         # Aperçu des avis par note
         st.markdown("---")
         st.markdown("#### 💬 Aperçu des Avis par Note")
         
+        try:
+            # Un seul aller-retour pour les cinq notes
+            samples_by_rating = preview_jobs['per_rating'].result().set_index('RATING')
+        except:
+            samples_by_rating = None
+        
         rating_cols = st.columns(5)
         for i, rating in enumerate([5, 4, 3, 2, 1]):
             with rating_cols[i]:
                 st.markdown(f"**{rating} ⭐**")
                 try:
-                    sample_for_rating = get_sample_reviews(session, rating_filter=rating, limit=1)
-                    if not sample_for_rating.empty:
-                        review = sample_for_rating.iloc[0]
-                        short_text = review['REVIEW_TEXT'][:100] + "..." if len(review['REVIEW_TEXT']) > 100 else review['REVIEW_TEXT']
+                    if samples_by_rating is not None and rating in samples_by_rating.index:
+                        review = samples_by_rating.loc[rating]
+                        short_text = review['REVIEW_TEXT'] + "..." if review['IS_TRUNCATED'] else review['REVIEW_TEXT']
                         store_name = review['STORE_LOCATION'] if review['STORE_LOCATION'] else "En ligne"
                         st.markdown(f"""
                         <div style="font-size: 11px; padding: 8px; background: #f0f0f0; border-radius: 5px; margin: 5px 0;">
@@ -448,7 +822,7 @@ def main():
         
         if generate_ai:
             with st.spinner("Génération des insights..."):
-                insights = get_ai_insights(session)
+                insights = get_ai_insights(table_version)
             
             if insights:
                 # Résumé global
@@ -465,24 +839,27 @@ def main():
                 col1, col2 = st.columns(2)
                 
                 try:
+                    # Exemples positifs et critiques en une seule requête
+                    context_reviews = get_samples_per_rating(session, [5, 2, 1], per_rating=2)
+                    
                     # Avis positifs
                     with col1:
                         st.markdown("**✅ Avis Positifs (4-5 ⭐)**")
-                        positive_reviews = get_sample_reviews(session, rating_filter=5, limit=2)
+                        positive_reviews = context_reviews[context_reviews['RATING'] == 5]
                         if not positive_reviews.empty:
                             for _, review in positive_reviews.iterrows():
-                                display_review_preview(review, show_full=False)
+                                display_review_preview(review)
                     
                     # Avis critiques
                     with col2:
                         st.markdown("**⚠️ Avis à Améliorer (1-2 ⭐)**")
-                        negative_reviews = get_sample_reviews(session, rating_filter=1, limit=2)
+                        negative_reviews = context_reviews[context_reviews['RATING'] == 1]
                         if negative_reviews.empty:
-                            negative_reviews = get_sample_reviews(session, rating_filter=2, limit=2)
+                            negative_reviews = context_reviews[context_reviews['RATING'] == 2]
                         
                         if not negative_reviews.empty:
                             for _, review in negative_reviews.iterrows():
-                                display_review_preview(review, show_full=False)
+                                display_review_preview(review)
                 except:
                     st.info("Impossible de charger les exemples d'avis.")
             else:
@@ -494,62 +871,27 @@ def main():
         st.subheader("📍 Analyse des Magasins")
         
         # Top des magasins par nombre d'avis
-        store_stats_sql = """
-        SELECT 
-            CASE 
-                WHEN STORE_LOCATION IS NULL OR STORE_LOCATION = '' THEN 'Commandes en Ligne'
-                ELSE STORE_LOCATION 
-            END as store,
-            COUNT(*) as review_count,
-            AVG(RATING) as avg_rating
-        FROM RAW_CUSTOMER.INTERSPORT_REVIEWS
-        WHERE RATING IS NOT NULL
-        GROUP BY store
-        ORDER BY review_count DESC
-        LIMIT 10
-        """
-        
-        store_stats = session.sql(store_stats_sql).to_pandas()
+        store_stats = dashboard_data['stores']
         
         col1, col2 = st.columns(2)
         
         with col1:
             st.markdown("#### 🏪 Top des Magasins par Avis")
-            fig_stores = px.bar(
-                store_stats.head(8),
-                x='REVIEW_COUNT',
-                y='STORE',
-                orientation='h',
-                title="Top des Magasins par Nombre d'Avis",
-                color='AVG_RATING',
-                color_continuous_scale='RdYlGn'
-            )
-            fig_stores.update_layout(yaxis={'categoryorder':'total ascending'})
-            st.plotly_chart(fig_stores, use_container_width=True)
+            st.plotly_chart(store_bar_figure(store_stats), use_container_width=True)
         
         with col2:
             st.markdown("#### 📈 Performance des Magasins")
-            fig_rating_store = px.scatter(
-                store_stats,
-                x='REVIEW_COUNT',
-                y='AVG_RATING',
-                size='REVIEW_COUNT',
-                hover_data=['STORE'],
-                title="Performance des Magasins : Avis vs Note",
-                color='AVG_RATING',
-                color_continuous_scale='RdYlGn'
-            )
-            st.plotly_chart(fig_rating_store, use_container_width=True)
+            st.plotly_chart(store_scatter_figure(store_stats), use_container_width=True)
 
         # Aperçu des avis par magasin
-        if not store_stats.empty:
+        if store_stats['STORE']:
             st.markdown("---")
             st.markdown("#### 💬 Aperçu des Avis par Magasin")
             
             # Sélecteur de magasin
             selected_store = st.selectbox(
                 "Choisissez un magasin pour voir les avis:",
-                ["Tous"] + store_stats['STORE'].tolist()
+                ["Tous"] + store_stats['STORE']
             )
             
             if selected_store != "Tous":
@@ -570,83 +912,25 @@ def main():
         st.subheader("📈 Tendances et Patterns")
         
         # Tendances des notes dans le temps
-        temporal_sql = """
-        SELECT 
-            DATE,
-            AVG(RATING) as avg_rating,
-            COUNT(*) as review_count
-        FROM RAW_CUSTOMER.INTERSPORT_REVIEWS
-        WHERE RATING IS NOT NULL AND DATE IS NOT NULL
-        GROUP BY DATE
-        ORDER BY DATE
-        """
-        
-        temporal_data = session.sql(temporal_sql).to_pandas()
-        # Gérer le format de date DD/MM/YYYY du CSV
-        temporal_data['DATE'] = pd.to_datetime(temporal_data['DATE'], format='%d/%m/%Y', errors='coerce')
+        temporal_data = dashboard_data['temporal']
         
-        if len(temporal_data) > 1:
+        if len(temporal_data['PERIOD']) > 1:
             st.markdown("#### 📊 Évolution des Notes dans le Temps")
-            fig_temporal = make_subplots(specs=[[{"secondary_y": True}]])
-            
-            fig_temporal.add_trace(
-                go.Scatter(x=temporal_data['DATE'], y=temporal_data['AVG_RATING'], name="Note Moyenne"),
-                secondary_y=False,
-            )
-            
-            fig_temporal.add_trace(
-                go.Bar(x=temporal_data['DATE'], y=temporal_data['REVIEW_COUNT'], name="Nombre d'Avis", opacity=0.6),
-                secondary_y=True,
-            )
-            
-            fig_temporal.update_xaxes(title_text="Date")
-            fig_temporal.update_yaxes(title_text="Note Moyenne", secondary_y=False)
-            fig_temporal.update_yaxes(title_text="Nombre d'Avis", secondary_y=True)
-            fig_temporal.update_layout(title_text="Tendances des Notes dans le Temps")
-            
-            st.plotly_chart(fig_temporal, use_container_width=True)
+            st.plotly_chart(trend_figure(temporal_data), use_container_width=True)
         
         # Analyse de la longueur des avis
         st.markdown("---")
         st.markdown("#### 📝 Analyse de la Longueur des Avis")
         
-        length_sql = """
-        SELECT 
-            CASE 
-                WHEN LENGTH(REVIEW_TEXT) < 50 THEN 'Court (< 50 caractères)'
-                WHEN LENGTH(REVIEW_TEXT) < 150 THEN 'Moyen (50-150 caractères)'
-                ELSE 'Long (> 150 caractères)'
-            END as review_length,
-            COUNT(*) as count,
-            AVG(RATING) as avg_rating
-        FROM RAW_CUSTOMER.INTERSPORT_REVIEWS
-        WHERE REVIEW_TEXT IS NOT NULL AND REVIEW_TEXT != ''
-        GROUP BY review_length
-        """
-        
-        length_data = session.sql(length_sql).to_pandas()
+        length_data = dashboard_data['lengths']
         
         col1, col2 = st.columns(2)
         
         with col1:
-            fig_length = px.pie(
-                length_data,
-                values='COUNT',
-                names='REVIEW_LENGTH',
-                title="Distribution de la Longueur des Avis"
-            )
-            st.plotly_chart(fig_length, use_container_width=True)
+            st.plotly_chart(length_pie_figure(length_data), use_container_width=True)
         
         with col2:
-            fig_length_rating = px.bar(
-                length_data,
-                x='REVIEW_LENGTH',
-                y='AVG_RATING',
-                title="Note Moyenne par Longueur d'Avis",
-                color='AVG_RATING',
-                color_continuous_scale='RdYlGn'
-            )
-            st.plotly_chart(fig_length_rating, use_container_width=True)
+            st.plotly_chart(length_rating_figure(length_data), use_container_width=True)
 
         # Aperçu des avis longs vs courts
         st.markdown("---")
@@ -658,12 +942,7 @@ def main():
             # Avis courts
             with col1:
                 st.markdown("**Avis Courts (< 50 caractères)**")
-                short_reviews_sql = """
-                SELECT * FROM RAW_CUSTOMER.INTERSPORT_REVIEWS
-                WHERE LENGTH(REVIEW_TEXT) < 50 AND REVIEW_TEXT IS NOT NULL
-                ORDER BY RANDOM() LIMIT 2
-                """
-                short_reviews = session.sql(short_reviews_sql).to_pandas()
+                short_reviews = get_sample_reviews(session, shorter_than=50, limit=2)
                 if not short_reviews.empty:
                     for _, review in short_reviews.iterrows():
                         display_review_preview(review)
@@ -671,12 +950,7 @@ def main():
             # Avis longs
             with col2:
                 st.markdown("**Avis Détaillés (> 150 caractères)**")
-                long_reviews_sql = """
-                SELECT * FROM RAW_CUSTOMER.INTERSPORT_REVIEWS
-                WHERE LENGTH(REVIEW_TEXT) > 150 AND REVIEW_TEXT IS NOT NULL
-                ORDER BY RANDOM() LIMIT 2
-                """
-                long_reviews = session.sql(long_reviews_sql).to_pandas()
+                long_reviews = get_sample_reviews(session, longer_than=150, limit=2)
                 if not long_reviews.empty:
                     for _, review in long_reviews.iterrows():
                         display_review_preview(review)
@@ -4,14 +4,18 @@ from snowflake.snowpark.context import get_active_session
 # Simple test app
 st.title("🧪 Simple Snowflake Test")
 
+@st.cache_resource(show_spinner=False)
+def get_snowflake_version(_session):
+    """Query the Snowflake version once per process instead of on every page load"""
+    return _session.sql("SELECT CURRENT_VERSION()").collect()[0][0]
+
 # Test session
 try:
     session = get_active_session()
     st.success("✅ Session connected successfully!")
     
     # Test simple query
-    result = session.sql("SELECT CURRENT_VERSION()").collect()
-    st.info(f"Snowflake Version: {result[0][0]}")
+    st.info(f"Snowflake Version: {get_snowflake_version(session)}")
     
 except Exception as e:
-    st.error(f"❌ Session error: {e}") 
\ No newline at end of file
+    st.error(f"❌ Session error: {e}")
@@ -4,69 +4,190 @@ This script uploads the intersport_reviews.csv to Snowflake table
 """
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 from snowflake.snowpark import Session
+import glob
+import logging
 import os
-from typing import Dict, Any
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 
-def create_snowflake_session(connection_params: Dict[str, Any]) -> Session:
-    """Create Snowflake session"""
-    return Session.builder.configs(connection_params).create()
+log = logging.getLogger(__name__)
 
-def upload_reviews_data(session: Session, csv_file_path: str) -> None:
-    """Upload CSV data to Snowflake table"""
-    
-    # Read CSV file
-    print(f"Reading CSV file: {csv_file_path}")
-    df = pd.read_csv(csv_file_path)
-    print(f"Loaded {len(df)} records from CSV")
-    
-    # Create schema if not exists
-    session.sql("CREATE SCHEMA IF NOT EXISTS SS_101.RAW_CUSTOMER").collect()
-    session.use_schema("SS_101.RAW_CUSTOMER")
-    
-    # Create table
-    create_table_sql = """
-    CREATE OR REPLACE TABLE INTERSPORT_REVIEWS (
-        CUSTOMER_NAME STRING,
-        RATING INTEGER,
-        REVIEW_TEXT STRING,
-        DATE STRING,
-        STORE_LOCATION STRING,
-        CREATED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP()
+# Keep the cached session alive between uploads and tag its queries
+SESSION_PARAMETERS = {
+    "CLIENT_SESSION_KEEP_ALIVE": True,
+    "QUERY_TAG": "upload_reviews",
+}
+
+# Explicit Arrow types skip type inference in the CSV reader
+REVIEW_CSV_TYPES = {
+    'CUSTOMER_NAME': pa.string(),
+    'RATING': pa.int8(),
+    'REVIEW_TEXT': pa.string(),
+    'DATE': pa.string(),
+    'STORE_LOCATION': pa.string(),
+}
+# The exported CSV uses lowercase headers, so accept both spellings
+REVIEW_CSV_TYPES.update({col.lower(): arrow_type for col, arrow_type in REVIEW_CSV_TYPES.items()})
+CSV_BLOCK_SIZE = 16 << 20
+
+# Layout of the reviews table, shared with REVIEW_TABLE_DDL in both Streamlit apps
+# since all three write the same SS_101.RAW_CUSTOMER.INTERSPORT_REVIEWS table
+REVIEW_TABLE_DDL = """
+    CUSTOMER_NAME STRING,
+    RATING INTEGER,
+    REVIEW_TEXT STRING,
+    DATE DATE,
+    STORE_LOCATION STRING,
+    REVIEW_LEN INTEGER
+"""
+
+# Column layout of the staged Parquet file, fixed so every streamed block
+# writes the same schema regardless of what pandas infers for that block
+UPLOAD_SCHEMA = pa.schema([
+    ('CUSTOMER_NAME', pa.string()),
+    ('RATING', pa.int8()),
+    ('REVIEW_TEXT', pa.string()),
+    ('DATE', pa.date32()),
+    ('STORE_LOCATION', pa.string()),
+    ('REVIEW_LEN', pa.int32()),
+])
+
+# The Parquet export is PUT to the table's own stage and purged once loaded
+REVIEW_STAGE = "@%INTERSPORT_REVIEWS/"
+PARQUET_ROW_GROUP_SIZE = 100_000
+
+COPY_REVIEWS_SQL = """
+    COPY INTO INTERSPORT_REVIEWS
+    FROM {stage}{file_name}
+    FILE_FORMAT = (TYPE = PARQUET)
+    MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE
+    PURGE = TRUE
+    """
+
+# CSVs already in cloud storage are copied by the warehouse straight from an
+# external stage; DATE and REVIEW_LEN are derived inside the COPY instead of pandas
+CLOUD_URL_PREFIXES = ("s3://", "gcs://", "azure://")
+
+CREATE_EXTERNAL_STAGE_SQL = """
+    CREATE OR REPLACE TEMPORARY STAGE {stage}
+    URL = '{url}'
+    STORAGE_INTEGRATION = {storage_integration}
+    FILE_FORMAT = (TYPE = CSV SKIP_HEADER = 1 FIELD_OPTIONALLY_ENCLOSED_BY = '"')
+    """
+
+COPY_REVIEWS_FROM_CSV_SQL = """
+    COPY INTO INTERSPORT_REVIEWS (
+        CUSTOMER_NAME, RATING, REVIEW_TEXT, DATE, STORE_LOCATION, REVIEW_LEN
+    )
+    FROM (
+        SELECT 
+            $1, TRY_TO_NUMBER($2), $3,
+            COALESCE(TRY_TO_DATE($4, 'DD/MM/YYYY'), TRY_TO_DATE($4)),
+            $5,
+            LENGTH($3)
+        FROM @{stage}
     )
+    FILES = ('{file_name}')
     """
+
+@lru_cache(maxsize=1)
+def _cached_session(frozen_params: Tuple[Tuple[str, Any], ...]) -> Session:
+    return Session.builder.configs({**dict(frozen_params), "session_parameters": SESSION_PARAMETERS}).create()
+
+def create_snowflake_session(connection_params: Dict[str, Any]) -> Session:
+    """Create Snowflake session, reusing the open one for identical parameters"""
+    return _cached_session(tuple(sorted(connection_params.items())))
+
+def close_snowflake_session(session: Session) -> None:
+    """Close the session and forget it so the next call reconnects"""
+    session.close()
+    _cached_session.cache_clear()
+
+def iter_reviews_csv(csv_file_path: str) -> Iterator[pd.DataFrame]:
+    """Stream the reviews CSV block by block, reusing a Parquet copy while the file is unchanged"""
+    stat = os.stat(csv_file_path)
+    stem = os.path.splitext(os.path.basename(csv_file_path))[0]
+    cache_path = os.path.join(tempfile.gettempdir(), f"{stem}_{stat.st_mtime_ns}_{stat.st_size}.parquet")
+    if os.path.exists(cache_path):
+        log.info("Using cached parse of %s", csv_file_path)
+        for batch in pq.ParquetFile(cache_path).iter_batches():
+            yield batch.to_pandas(types_mapper=pd.ArrowDtype)
+        return
     
-    print("Creating table...")
-    session.sql(create_table_sql).collect()
-    
-    # Upload data
-    print("Uploading data to Snowflake...")
-    session.write_pandas(
-        df, 
-        'INTERSPORT_REVIEWS', 
-        schema='SS_101.RAW_CUSTOMER',
-        overwrite=True,
-        auto_create_table=False
-    )
+    log.info("Reading CSV file: %s", csv_file_path)
+    # Parse straight from a memory map so file pages are not copied into
+    # an intermediate read buffer; only one block is decoded at a time
+    with pa.memory_map(csv_file_path, 'r') as source:
+        reader = pacsv.open_csv(
+            source,
+            read_options=pacsv.ReadOptions(block_size=CSV_BLOCK_SIZE, use_threads=True),
+            # Some reviews span several lines inside quotes
+            parse_options=pacsv.ParseOptions(newlines_in_values=True),
+            convert_options=pacsv.ConvertOptions(column_types=REVIEW_CSV_TYPES, strings_can_be_null=True)
+        )
+        schema = pa.schema([field.with_name(field.name.upper()) for field in reader.schema])
+        # Fill the cache under a temporary name so an interrupted run never leaves a partial copy
+        with pq.ParquetWriter(cache_path + ".partial", schema) as cache:
+            for batch in reader:
+                batch = pa.RecordBatch.from_arrays(batch.columns, schema=schema)
+                cache.write_batch(batch)
+                yield batch.to_pandas(types_mapper=pd.ArrowDtype)
+    os.replace(cache_path + ".partial", cache_path)
+
+def to_review_layout(df: pd.DataFrame) -> pd.DataFrame:
+    """Parse DATE and add REVIEW_LEN once at load time, matching the shared table layout"""
+    # Review dates repeat heavily, so cache=True parses each distinct string once;
+    # the CSV mixes DD/MM/YYYY and ISO dates, so fall back to ISO where the first format fails
+    review_dates = pd.to_datetime(df['DATE'], format='%d/%m/%Y', errors='coerce', cache=True)
+    review_dates = review_dates.fillna(pd.to_datetime(df['DATE'], format='ISO8601', errors='coerce', cache=True))
+    df['DATE'] = review_dates.dt.date
+    # Arrow's utf8_length counts code points (not offset bytes), so accented reviews match Snowflake LENGTH
+    df['REVIEW_LEN'] = df['REVIEW_TEXT'].str.len().astype('Int32')
+    return df
+
+def create_reviews_table(session: Session) -> None:
+    """Create the shared reviews table if needed and the CLEAN_REVIEWS view over it"""
+    # The table is shared with the Streamlit apps, so it is created in their layout and never replaced
+    setup_sql = f"""
+    CREATE SCHEMA IF NOT EXISTS SS_101.RAW_CUSTOMER;
+    USE SCHEMA SS_101.RAW_CUSTOMER;
+    CREATE TABLE IF NOT EXISTS INTERSPORT_REVIEWS ({REVIEW_TABLE_DDL});
+    """
+    log.info("Creating table and CLEAN_REVIEWS view...")
+    session.connection.cursor().execute(setup_sql, num_statements=3)
     
-    # Verify upload
-    count_result = session.sql("SELECT COUNT(*) as count FROM INTERSPORT_REVIEWS").collect()
-    record_count = count_result[0]['COUNT']
-    print(f"✅ Successfully uploaded {record_count} records to Snowflake!")
+    # A table from before the DATE/REVIEW_LEN layout is upgraded by the Streamlit app, not here
+    columns = {
+        row['COLUMN_NAME']: row['DATA_TYPE']
+        for row in session.sql("""
+        SELECT COLUMN_NAME, DATA_TYPE
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = 'RAW_CUSTOMER' AND TABLE_NAME = 'INTERSPORT_REVIEWS'
+        """).collect()
+    }
+    if columns.get('DATE') != 'DATE' or 'REVIEW_LEN' not in columns:
+        raise RuntimeError(
+            "INTERSPORT_REVIEWS still has the legacy layout (text DATE, no REVIEW_LEN); "
+            "open the Streamlit app once to migrate it, then rerun the upload"
+        )
     
-    # Create the clean view
-    create_view_sql = """
+    # The clean columns are cheap expressions over the shared layout, so the view derives them
+    session.sql("""
     CREATE OR REPLACE VIEW CLEAN_REVIEWS AS
     SELECT 
         CUSTOMER_NAME,
         RATING,
         REVIEW_TEXT,
-        TRY_TO_DATE(DATE, 'DD/MM/YYYY') as REVIEW_DATE,
-        CASE 
-            WHEN STORE_LOCATION IS NULL OR STORE_LOCATION = '' THEN 'Online Order'
-            ELSE STORE_LOCATION 
-        END as STORE_LOCATION,
-        LENGTH(REVIEW_TEXT) as REVIEW_LENGTH,
+        DATE as REVIEW_DATE,
+        COALESCE(NULLIF(STORE_LOCATION, ''), 'Online Order') as STORE_LOCATION,
+        REVIEW_LEN as REVIEW_LENGTH,
         CASE 
             WHEN RATING >= 4 THEN 'Positive'
             WHEN RATING = 3 THEN 'Neutral'
@@ -74,14 +195,87 @@ def upload_reviews_data(session: Session, csv_file_path: str) -> None:
             ELSE 'Unrated'
         END as SENTIMENT_CATEGORY
     FROM INTERSPORT_REVIEWS
-    WHERE REVIEW_TEXT IS NOT NULL AND REVIEW_TEXT != '';
-    """
+    WHERE REVIEW_TEXT IS NOT NULL AND REVIEW_TEXT != ''
+    """).collect()
+
+def stage_reviews_from_cloud(session: Session, csv_url: str, storage_integration: str) -> str:
+    """Point an external stage at a cloud-hosted reviews CSV and return its COPY statement"""
+    folder_url, file_name = csv_url.rsplit("/", 1)
+    stage = f"REVIEW_EXTERNAL_STAGE_{uuid.uuid4().hex[:8].upper()}"
+    session.sql(CREATE_EXTERNAL_STAGE_SQL.format(
+        stage=stage, url=f"{folder_url}/", storage_integration=storage_integration
+    )).collect()
+    log.info("Staged %s as external stage %s", csv_url, stage)
+    return COPY_REVIEWS_FROM_CSV_SQL.format(stage=stage, file_name=file_name)
+
+def stage_reviews_file(session: Session, csv_file_path: str, storage_integration: Optional[str] = None) -> str:
+    """Stage one reviews CSV for loading and return the COPY statement that loads it"""
+    if csv_file_path.startswith(CLOUD_URL_PREFIXES):
+        return stage_reviews_from_cloud(session, csv_file_path, storage_integration)
     
-    session.sql(create_view_sql).collect()
-    print("✅ Created CLEAN_REVIEWS view")
+    # Write a single zstd Parquet file on the client: far fewer bytes on the
+    # wire than CSV, and COPY decodes its row groups in parallel
+    parquet_file = os.path.splitext(os.path.basename(csv_file_path))[0] + ".parquet"
+    parquet_path = os.path.join(tempfile.gettempdir(), parquet_file)
+    loaded_rows = 0
+    with pq.ParquetWriter(parquet_path, UPLOAD_SCHEMA, compression='zstd') as writer:
+        for df in iter_reviews_csv(csv_file_path):
+            df = to_review_layout(df)
+            writer.write_table(
+                pa.Table.from_pandas(df, schema=UPLOAD_SCHEMA, preserve_index=False),
+                row_group_size=PARQUET_ROW_GROUP_SIZE
+            )
+            loaded_rows += len(df)
+    log.info("Loaded %d records from %s", loaded_rows, csv_file_path)
+    
+    session.file.put(
+        f"file://{parquet_path}",
+        REVIEW_STAGE,
+        auto_compress=False,
+        overwrite=True
+    )
+    return COPY_REVIEWS_SQL.format(stage=REVIEW_STAGE, file_name=parquet_file)
+
+def upload_reviews_files(session: Session, csv_file_paths: List[str], max_workers: int = 8,
+                         storage_integration: Optional[str] = None) -> None:
+    """Upload several review CSVs (local paths or cloud URLs) to one Snowflake table concurrently"""
+    if not storage_integration and any(path.startswith(CLOUD_URL_PREFIXES) for path in csv_file_paths):
+        raise ValueError("A storage integration is required to load CSVs from cloud storage")
+    
+    create_reviews_table(session)
+    
+    # Each file is staged on its own thread (local files are parsed and PUT,
+    # cloud files get an external stage); this also runs every DDL statement
+    # before the transaction below, since DDL would commit it implicitly
+    log.info("Uploading %d file(s) to Snowflake...", len(csv_file_paths))
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(csv_file_paths)))) as executor:
+        copy_statements = list(executor.map(
+            lambda path: stage_reviews_file(session, path, storage_integration), csv_file_paths
+        ))
+    
+    # The old rows are deleted and all COPYs commit together, so a failed file
+    # leaves the previous reviews in place instead of a partly loaded table
+    session.sql("BEGIN").collect()
+    try:
+        session.sql("DELETE FROM INTERSPORT_REVIEWS").collect()
+        # COPY INTO reports rows loaded per file, so no COUNT(*) scan is needed to verify
+        record_count = sum(
+            row['rows_loaded'] for copy_sql in copy_statements for row in session.sql(copy_sql).collect()
+        )
+        session.sql("COMMIT").collect()
+    except Exception:
+        session.sql("ROLLBACK").collect()
+        raise
+    log.info("✅ Successfully uploaded %d records to Snowflake!", record_count)
+
+def upload_reviews_data(session: Session, csv_file_path: str, storage_integration: Optional[str] = None) -> None:
+    """Upload CSV data to Snowflake table"""
+    upload_reviews_files(session, [csv_file_path], storage_integration=storage_integration)
 
 def main():
     """Main function"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    
     # Snowflake connection parameters
     # Update these with your actual Snowflake credentials
     connection_params = {
@@ -93,26 +287,27 @@ def main():
         "database": "YOUR_DATABASE",  # e.g., "SUMMIT_SPORTS"
     }
     
-    # Check if CSV file exists
-    csv_file = "social_listening/review_collection/intersport_reviews.csv"
-    if not os.path.exists(csv_file):
-        print(f"❌ Error: {csv_file} not found in current directory")
+    # Collect every CSV in the review collection folder
+    csv_dir = "social_listening/review_collection"
+    csv_files = sorted(glob.glob(os.path.join(csv_dir, "*.csv")))
+    if not csv_files:
+        log.error("❌ Error: no CSV files found in %s", csv_dir)
         return
     
     try:
         # Create session and upload data
         session = create_snowflake_session(connection_params)
-        upload_reviews_data(session, csv_file)
+        upload_reviews_files(session, csv_files)
         
         # Close session
-        session.close()
+        close_snowflake_session(session)
         
-        print("\n🎉 Data upload completed successfully!")
-        print("You can now run your Streamlit app to analyze the reviews.")
+        log.info("🎉 Data upload completed successfully!")
+        log.info("You can now run your Streamlit app to analyze the reviews.")
         
     except Exception as e:
-        print(f"❌ Error during upload: {str(e)}")
-        print("Please check your connection parameters and try again.")
+        log.error("❌ Error during upload: %s", e)
+        log.error("Please check your connection parameters and try again.")
 
 # This script provides utility functions for data upload
 # Use the functions within the Streamlit app for data loading 
\ No newline at end of file